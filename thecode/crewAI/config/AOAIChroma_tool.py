@@ -13,19 +13,18 @@ __name__ = 'Azure OpenAI and ChromaDB tool'
 
 
 import os
-import chromadb
+import time
 import litellm
-import json
 
-from litellm import AzureOpenAI, completion
-from chromadb import PersistentClient, Settings
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 from crewai_tools import BaseTool
 from pydantic import BaseModel, Field
 from typing import Annotated, Optional, Type
 from dotenv import load_dotenv
 from datetime import datetime
 
+from .chroma_memory import get_memory_store, memory_id
+from .memory_context import select_memories
+
 load_dotenv()
 
 
@@ -43,56 +42,25 @@ class AzureOpenAIChromaTool(BaseTool):
     args_schema: Type[BaseModel] = AzureOpenAIChromaToolSchema
 
     def _run(self, prompt: str, user_id: str, max_memory_records: int = 5) -> str:
-        print("Setting up Azure OpenAI client...")
-        # Azure OpenAI setup
-        azure_client_instance = AzureOpenAI(
-            api_key=os.getenv("AZURE_API_KEY"),
-            azure_endpoint=os.getenv("AZURE_API_BASE"),
-            api_version=os.getenv("AZURE_API_VERSION"),
-            azure_deployment=os.getenv("AZURE_CHAT_DEPLOYMENT")
-        )
-        
-        print("Setting up ChromaDB client...")
-        # ChromaDB setup
-        client = chromadb.PersistentClient(path="c:/chroma/chroma_memory")
-        embedding_function = OpenAIEmbeddingFunction(
-            api_type="azure",
-            api_key=os.getenv("AZURE_API_KEY"), 
-            model_name=os.getenv("AZURE_OPENAI_EMBEDDED_MODEL"),
-            deployment_id=os.getenv("AZURE_OPENAI_EMBEDDED_DEPLOYMENT"),
-            api_base=os.getenv("AZURE_API_BASE"),
-        )
-        
-        collection = client.get_or_create_collection(
-            name='nlp_memory',
-            embedding_function=embedding_function
-        )
+        # The Chroma client, embedding function and collections are shared by all calls in this process
+        store = get_memory_store()
 
         print("Retrieving user memory...")
-        # Retrieve user memory
-        memory = collection.query(
-            query_texts=[prompt],
-            #query_texts=[user_id],
+        # Retrieve user memory; only this user's memories are searched
+        result = store.query(
+            user_id,
+            prompt,
             n_results=max_memory_records,
-            include=["documents", "distances", "metadatas"]
-        ).get("documents", [])
+            include=["documents", "distances", "metadatas", "embeddings"]
+        )
 
-        #print("\033[93mMemory retrieved:\033[0m", memory)
+        #print("\033[93mMemory retrieved:\033[0m", result.get("documents"))
         
-        print("Extracting data from the memory...")
-        extracted_memory = []
-        for memory_entry in memory:
-            #print(f"Processing memory entry: {memory_entry}")
-            for item in memory_entry:
-                try:
-                    #parsed_item = json.loads(item)
-                    #print(f"Parsed item: {parsed_item}")
-                    extracted_memory.append(item)
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing memory entry: {e}")
-        print("Extraction complete.")
-
-        memory = extracted_memory
+        print("Selecting memory for the context...")
+        # Distance cutoff, redundancy filter and token budget keep the combined prompt bounded
+        memory, selection = select_memories(result)
+        print(f"Selection complete: {len(memory)} of {selection['retrieved']} retrieved, about {selection['tokens']} tokens "
+              f"(too distant: {selection['distant']}, redundant: {selection['redundant']}, over budget: {selection['over_budget']}).")
         
         if memory:
             print("Memory found.")
@@ -123,26 +91,22 @@ Response as JSON.
         
         # Generate completion with Azure OpenAI
         response = litellm.completion(
-            model = f"azure/{os.getenv("AZURE_CHAT_DEPLOYMENT")}",
+            model = f"azure/{os.getenv('AZURE_CHAT_DEPLOYMENT')}",
             messages = messages,
         )        
         
         chat_output = response.choices[0].message.content
         
-        print("Storing new memory...")
-        # Store new memory
+        print("Queueing new memory...")
+        # Store new memory; the store writes it from a background thread so the answer is returned now
         memory_entry = {
             "user_id": user_id,
             "prompt": prompt,
-            #"date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # epoch seconds, used by memory_compaction.py for age-based eviction
+            "created": time.time(),
             #"response": chat_output
         }
-        #collection.add(
-        collection.upsert(
-            documents=str(chat_output),
-            metadatas=[memory_entry],
-            ids=[f"{user_id}_{hash(prompt)}"]
-        )
+        store.upsert(memory_id(user_id, prompt), str(chat_output), memory_entry, store.user_collection_name(user_id))
         
         print("Process completed.")
         return chat_output
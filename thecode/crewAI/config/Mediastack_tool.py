@@ -1,15 +1,18 @@
 from crewai_tools import BaseTool
-import requests
 import os
 from pydantic import BaseModel, Field
 from typing import Any, Optional, Type
 
+from .news_articles import from_mediastack
+from .output_formatter import format_tool_output, pop_format_options
+from .response_cache import cached_aget, cached_get
+
 
 class MediastackNewsTool(BaseTool):
     name: str = "MediastackNewsTool"
     description: str = "Fetches the latest news articles from the Mediastack API."
 
-    def _run(self, keywords: str, **kwargs) -> dict:
+    def _run(self, keywords: str, **kwargs) -> str:
         """
         Fetches the latest news articles from the Mediastack API based on the provided parameters.
 
@@ -40,10 +43,29 @@ class MediastackNewsTool(BaseTool):
                 sort (str, optional): Sort order of the news articles. Defaults to "published_desc".
                 limit (int, optional): Maximum number of news articles to retrieve. Defaults to 10.
                 offset (int, optional): Number of news articles to skip. Defaults to 0.
+                date (str, optional): A date ("2024-05-01") or date range ("2024-05-01,2024-05-03") of publication.
 
         Returns:
-            dict: A dictionary containing the news articles or an error message.
+            str: The news articles formatted within the tool output token budget, or an error message.
         """
+        options = pop_format_options(kwargs)
+        base_url, params = self._build_request(keywords, **kwargs)
+        response = cached_get("mediastack", base_url, params=params)
+        return self._format(self._parse_response(response), **options)
+
+    async def _arun(self, keywords: str, **kwargs) -> str:
+        """Async version of _run, using the shared async HTTP client. Accepts the same arguments."""
+        options = pop_format_options(kwargs)
+        return self._format(await self._arun_json(keywords, **kwargs), **options)
+
+    async def _arun_json(self, keywords: str, **kwargs) -> dict:
+        """Like _arun, but return the raw Mediastack answer (used by the news fan-out to normalize articles)."""
+        pop_format_options(kwargs)
+        base_url, params = self._build_request(keywords, **kwargs)
+        response = await cached_aget("mediastack", base_url, params=params)
+        return self._parse_response(response)
+
+    def _build_request(self, keywords: str, **kwargs):
         api_key = os.getenv("MEDIASTACK_API_KEY")
         if not api_key:
             raise ValueError("MEDIASTACK_API_KEY must be set as an environment variable.")
@@ -60,10 +82,20 @@ class MediastackNewsTool(BaseTool):
             "limit": kwargs.get('limit', 10),
             "offset": kwargs.get('offset', 0),
         }
-        
-        response = requests.get(base_url, params=params)
-        
+        if kwargs.get('date'):
+            params["date"] = kwargs['date']  # e.g. "2024-05-01,2024-05-03"
+        return base_url, params
+
+    def _parse_response(self, response) -> dict:
         if response.status_code == 200:
             return response.json()
         else:
             return {"error": response.status_code, "message": response.text}
+
+    def _format(self, answer: dict, **options) -> str:
+        """Render the articles compactly within the tool output token budget; errors are returned as before."""
+        if "error" in answer:
+            return str(answer)
+        records = [article.to_dict() for article in from_mediastack(answer)]
+        return format_tool_output(records, ("title", "url", "source", "published", "snippet"),
+                                  empty_message="No news articles found.", **options)
@@ -1,20 +1,42 @@
 from crewai_tools import BaseTool
-import requests
 import os
 
+from datetime import datetime
+
+from .news_articles import from_newsdata
+from .output_formatter import format_tool_output
+from .response_cache import cached_aget, cached_get
+
 
 class LatestNewsTool(BaseTool):
     name: str = "LatestNewsTool"
     description: str = "Fetches the latest news articles from Newsdata.io."
 
-    def _run(self, query: str, size: int = 10,language: str = "en",category:str = "science,technology,other",removeduplicate:int = 1) -> dict:
+    def _run(self, query: str, size: int = 10,language: str = "en",category:str = "science,technology,other",removeduplicate:int = 1) -> str:
+        base_url, params = self._build_request(query, size, language, category, removeduplicate)
+        response = cached_get("newsdata", base_url, params=params)
+        return self._format(self._parse_response(response))
+
+    async def _arun(self, query: str, size: int = 10,language: str = "en",category:str = "science,technology,other",removeduplicate:int = 1) -> str:
+        """Async version of _run, using the shared async HTTP client."""
+        return self._format(await self._arun_json(query, size, language, category, removeduplicate))
+
+    async def _arun_json(self, query: str, size: int = 10,language: str = "en",category:str = "science,technology,other",removeduplicate:int = 1, page: str = None) -> dict:
+        """Like _arun, but return the raw Newsdata answer (used by the news fan-out to normalize articles). `page` is the nextPage cursor of a previous answer."""
+        base_url, params = self._build_request(query, size, language, category, removeduplicate, page)
+        response = await cached_aget("newsdata", base_url, params=params)
+        return self._parse_response(response)
+
+    def _build_request(self, query: str, size: int, language: str, category: str, removeduplicate: int, page: str = None):
         api_key = os.getenv("NEWSDATA_API_KEY")
         if not api_key:
             raise ValueError("NEWSDATA_API_KEY must be set as an environment variable.")
         
-        # Ensure size does not exceed the limit for free users
-        if size > 10:
-            size = 10
+        # Newsdata caps size per plan (10 on the free plan); NEWSDATA_MAX_SIZE raises it for paid plans
+        max_size = int(os.getenv("NEWSDATA_MAX_SIZE", 10))
+        if size > max_size:
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Newsdata: size {size} reduced to {max_size} (NEWSDATA_MAX_SIZE)")
+            size = max_size
             
         #url = f"https://newsdata.io/api/1/news?apikey={api_key}&q={query}&size={size}"
         base_url = "https://newsdata.io/api/1/latest"
@@ -27,10 +49,20 @@ class LatestNewsTool(BaseTool):
             'category': category,
             'removeduplicate': removeduplicate,
         }
-        
-        response = requests.get(base_url,params)
-        
+        if page:
+            params['page'] = page
+        return base_url, params
+
+    def _parse_response(self, response) -> dict:
         if response.status_code == 200:
             return response.json()
         else:
             return {"error": response.status_code, "message": response.text}
+
+    def _format(self, answer: dict) -> str:
+        """Render the articles compactly within the tool output token budget; errors are returned as before."""
+        if "error" in answer or answer.get("status") == "error":
+            return str(answer)
+        records = [article.to_dict() for article in from_newsdata(answer)]
+        return format_tool_output(records, ("title", "url", "source", "published", "snippet"),
+                                  empty_message="No articles found.")
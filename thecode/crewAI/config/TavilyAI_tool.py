@@ -1,13 +1,68 @@
 
 from crewai_tools import BaseTool
 from tavily import TavilyClient, MissingAPIKeyError, InvalidAPIKeyError, UsageLimitExceededError
+import asyncio
 import os
 
+try:
+    from tavily import AsyncTavilyClient
+except ImportError:  # older tavily-python releases have no async client
+    AsyncTavilyClient = None
+
+from .news_articles import from_tavily
+from .output_formatter import format_tool_output, pop_format_options
+from .rate_limiter import quota_exhausted
+from .response_cache import cached_acall, cached_call
+
+
+def _tavily_api_key() -> str:
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        raise ValueError("TAVILY_API_KEY must be set as an environment variable.")
+    return api_key
+
+
+def _tavily_call(provider: str, method: str, query: str, search_params: dict, action: str):
+    """Call a TavilyClient method through the response cache."""
+    api_key = _tavily_api_key()
+    try:
+        return cached_call(
+            provider, method, dict(query=query, **search_params),
+            lambda: getattr(TavilyClient(api_key=api_key), method)(query, **search_params),
+        )
+    except UsageLimitExceededError as e:
+        raise quota_exhausted(provider, str(e) or "usage limit exceeded") from e
+    except (MissingAPIKeyError, InvalidAPIKeyError) as e:
+        raise RuntimeError(f"An error occurred while {action}: {e}") from e
+
+
+async def _tavily_acall(provider: str, method: str, query: str, search_params: dict, action: str):
+    """Async version of _tavily_call. Falls back to the sync client in a worker thread without AsyncTavilyClient."""
+    api_key = _tavily_api_key()
+    if AsyncTavilyClient is not None:
+        afetch = lambda: getattr(AsyncTavilyClient(api_key=api_key), method)(query, **search_params)
+    else:
+        afetch = lambda: asyncio.to_thread(getattr(TavilyClient(api_key=api_key), method), query, **search_params)
+    try:
+        return await cached_acall(provider, method, dict(query=query, **search_params), afetch)
+    except UsageLimitExceededError as e:
+        raise quota_exhausted(provider, str(e) or "usage limit exceeded") from e
+    except (MissingAPIKeyError, InvalidAPIKeyError) as e:
+        raise RuntimeError(f"An error occurred while {action}: {e}") from e
+
+
+def _format_search(answer: dict, **options) -> str:
+    """Render a Tavily search answer compactly within the tool output token budget."""
+    records = [article.to_dict() for article in from_tavily(answer)]
+    header = f"Answer: {answer['answer']}" if answer.get("answer") else None
+    return format_tool_output(records, ("title", "url", "published", "snippet"), header=header, **options)
+
+
 class TavilySearchGeneralTool(BaseTool):
     name: str = "Tavily Search Tool"
     description: str = "Performs general search queries using the Tavily API."
 
-    def _run(self, query: str, **kwargs) -> dict:
+    def _run(self, query: str, **kwargs) -> str:
         """
         Perform a general search query using the Tavily API.
 
@@ -25,37 +80,41 @@ class TavilySearchGeneralTool(BaseTool):
                 include_image_descriptions (bool): If True, include image descriptions in the results. Default is False.
 
         Returns:
-            dict: The search results returned by the Tavily API.
+            str: The search results returned by the Tavily API, formatted within the tool output token budget.
 
         """
-        api_key = os.getenv("TAVILY_API_KEY")
-        if not api_key:
-            raise ValueError("TAVILY_API_KEY must be set as an environment variable.")
-        
-        try:
-            tavily_client = TavilyClient(api_key=api_key)
-            response = tavily_client.search(
-                query,
-                max_results=kwargs.get('max_results', 25),
-                include_answer=kwargs.get('include_answer', True),
-                search_depth=kwargs.get('search_depth', "basic"),
-                topic="general",
-                days=kwargs.get('days', 30),
-                include_domains=kwargs.get('include_domains'),
-                exclude_domains=kwargs.get('exclude_domains'),
-                include_raw_content=kwargs.get('include_raw_content', False),
-                include_images=kwargs.get('include_images', False),
-                include_image_descriptions=kwargs.get('include_image_descriptions', False)
-            )
-            return response
-        except (MissingAPIKeyError, InvalidAPIKeyError, UsageLimitExceededError) as e:
-            raise RuntimeError(f"An error occurred while performing search: {e}") from e
+        options = pop_format_options(kwargs)
+        return _format_search(_tavily_call("tavily_general", "search", query, self._search_params(**kwargs), "performing search"), **options)
+
+    async def _arun(self, query: str, **kwargs) -> str:
+        """Async version of _run. Accepts the same arguments and returns the same result."""
+        options = pop_format_options(kwargs)
+        return _format_search(await self._arun_json(query, **kwargs), **options)
+
+    async def _arun_json(self, query: str, **kwargs) -> dict:
+        """Like _arun, but return the raw Tavily answer (used by the news fan-out to normalize articles)."""
+        pop_format_options(kwargs)
+        return await _tavily_acall("tavily_general", "search", query, self._search_params(**kwargs), "performing search")
+
+    def _search_params(self, **kwargs) -> dict:
+        return dict(
+            max_results=kwargs.get('max_results', 25),
+            include_answer=kwargs.get('include_answer', True),
+            search_depth=kwargs.get('search_depth', "basic"),
+            topic="general",
+            days=kwargs.get('days', 30),
+            include_domains=kwargs.get('include_domains'),
+            exclude_domains=kwargs.get('exclude_domains'),
+            include_raw_content=kwargs.get('include_raw_content', False),
+            include_images=kwargs.get('include_images', False),
+            include_image_descriptions=kwargs.get('include_image_descriptions', False)
+        )
 
 class TavilySearchNewsTool(BaseTool):
     name: str = "Tavily News Search Tool"
     description: str = "Performs news-specific search queries using the Tavily API."
 
-    def _run(self, query: str, **kwargs) -> dict:
+    def _run(self, query: str, **kwargs) -> str:
         """
         Perform a news-specific search query using the Tavily API.
 
@@ -73,31 +132,35 @@ class TavilySearchNewsTool(BaseTool):
                 include_image_descriptions (bool): If True, include image descriptions in the results. Default is False.
 
         Returns:
-            dict: The search results returned by the Tavily API.
+            str: The search results returned by the Tavily API, formatted within the tool output token budget.
 
         """
-        api_key = os.getenv("TAVILY_API_KEY")
-        if not api_key:
-            raise ValueError("TAVILY_API_KEY must be set as an environment variable.")
-        
-        try:
-            tavily_client = TavilyClient(api_key=api_key)
-            response = tavily_client.search(
-                query,
-                max_results=kwargs.get('max_results', 25),
-                include_answer=kwargs.get('include_answer', False),
-                search_depth=kwargs.get('search_depth', "basic"),
-                topic="news",
-                days=kwargs.get('days', 3),
-                include_domains=kwargs.get('include_domains'),
-                exclude_domains=kwargs.get('exclude_domains'),
-                include_raw_content=kwargs.get('include_raw_content', False),
-                include_images=kwargs.get('include_images', False),
-                include_image_descriptions=kwargs.get('include_image_descriptions', False)
-            )
-            return response
-        except (MissingAPIKeyError, InvalidAPIKeyError, UsageLimitExceededError) as e:
-            raise RuntimeError(f"An error occurred while performing search: {e}") from e
+        options = pop_format_options(kwargs)
+        return _format_search(_tavily_call("tavily_news", "search", query, self._search_params(**kwargs), "performing search"), **options)
+
+    async def _arun(self, query: str, **kwargs) -> str:
+        """Async version of _run. Accepts the same arguments and returns the same result."""
+        options = pop_format_options(kwargs)
+        return _format_search(await self._arun_json(query, **kwargs), **options)
+
+    async def _arun_json(self, query: str, **kwargs) -> dict:
+        """Like _arun, but return the raw Tavily answer (used by the news fan-out to normalize articles)."""
+        pop_format_options(kwargs)
+        return await _tavily_acall("tavily_news", "search", query, self._search_params(**kwargs), "performing search")
+
+    def _search_params(self, **kwargs) -> dict:
+        return dict(
+            max_results=kwargs.get('max_results', 25),
+            include_answer=kwargs.get('include_answer', False),
+            search_depth=kwargs.get('search_depth', "basic"),
+            topic="news",
+            days=kwargs.get('days', 3),
+            include_domains=kwargs.get('include_domains'),
+            exclude_domains=kwargs.get('exclude_domains'),
+            include_raw_content=kwargs.get('include_raw_content', False),
+            include_images=kwargs.get('include_images', False),
+            include_image_descriptions=kwargs.get('include_image_descriptions', False)
+        )
 
 
 class TavilyContextTool(BaseTool):
@@ -123,25 +186,22 @@ class TavilyContextTool(BaseTool):
             str: The search context returned by the Tavily API.
 
         """
-        api_key = os.getenv("TAVILY_API_KEY")
-        if not api_key:
-            raise ValueError("TAVILY_API_KEY must be set as an environment variable.")
-        
-        try:
-            tavily_client = TavilyClient(api_key=api_key)
-            context = tavily_client.get_search_context(
-                query,
-                search_depth=kwargs.get('search_depth', "basic"),
-                topic=kwargs.get('topic', "general"),
-                days=kwargs.get('days', 30),
-                max_tokens=kwargs.get('max_tokens', 4000),
-                max_results=kwargs.get('max_results', 5),
-                include_domains=kwargs.get('include_domains'),
-                exclude_domains=kwargs.get('exclude_domains')
-            )
-            return context
-        except (MissingAPIKeyError, InvalidAPIKeyError, UsageLimitExceededError) as e:
-            raise RuntimeError(f"An error occurred while generating context: {e}") from e
+        return _tavily_call("tavily_context", "get_search_context", query, self._search_params(**kwargs), "generating context")
+
+    async def _arun(self, query: str, **kwargs) -> str:
+        """Async version of _run. Accepts the same arguments and returns the same result."""
+        return await _tavily_acall("tavily_context", "get_search_context", query, self._search_params(**kwargs), "generating context")
+
+    def _search_params(self, **kwargs) -> dict:
+        return dict(
+            search_depth=kwargs.get('search_depth', "basic"),
+            topic=kwargs.get('topic', "general"),
+            days=kwargs.get('days', 30),
+            max_tokens=kwargs.get('max_tokens', 4000),
+            max_results=kwargs.get('max_results', 5),
+            include_domains=kwargs.get('include_domains'),
+            exclude_domains=kwargs.get('exclude_domains')
+        )
 
 
 class TavilyQnATool(BaseTool):
@@ -165,22 +225,19 @@ class TavilyQnATool(BaseTool):
         Returns:
             str: The answer returned by the Tavily API.
         """
-        api_key = os.getenv("TAVILY_API_KEY")
-        if not api_key:
-            raise ValueError("TAVILY_API_KEY must be set as an environment variable.")
-        
-        try:
-            tavily_client = TavilyClient(api_key=api_key)
-            answer = tavily_client.qna_search(
-                query,
-                search_depth=kwargs.get('search_depth', "advanced"),
-                topic=kwargs.get('topic', "general"),
-                days=kwargs.get('days', 30),
-                max_results=kwargs.get('max_results', 5),
-                include_domains=kwargs.get('include_domains'),
-                exclude_domains=kwargs.get('exclude_domains')
-            )
-            return answer
-        except (MissingAPIKeyError, InvalidAPIKeyError, UsageLimitExceededError) as e:
-            raise RuntimeError(f"An error occurred while performing QnA search: {e}") from e
+        return _tavily_call("tavily_qna", "qna_search", query, self._search_params(**kwargs), "performing QnA search")
+
+    async def _arun(self, query: str, **kwargs) -> str:
+        """Async version of _run. Accepts the same arguments and returns the same result."""
+        return await _tavily_acall("tavily_qna", "qna_search", query, self._search_params(**kwargs), "performing QnA search")
+
+    def _search_params(self, **kwargs) -> dict:
+        return dict(
+            search_depth=kwargs.get('search_depth', "advanced"),
+            topic=kwargs.get('topic', "general"),
+            days=kwargs.get('days', 30),
+            max_results=kwargs.get('max_results', 5),
+            include_domains=kwargs.get('include_domains'),
+            exclude_domains=kwargs.get('exclude_domains')
+        )
 
@@ -12,7 +12,6 @@ __author__ = 'https://github.com/voytas75'
 __name__ = 'Bing Web Search Tool'
 
 
-import requests
 import os
 
 from typing import Annotated
@@ -20,6 +19,10 @@ from crewai_tools import Tool, BaseTool
 from pydantic import BaseModel, Field
 from typing import Any, Optional, Type
 
+from .news_articles import from_bing_news
+from .output_formatter import format_tool_output, pop_format_options
+from .response_cache import cached_aget, cached_get
+
 
 class BingWebSearchToolSchema(BaseModel):
     query: Annotated[
@@ -133,6 +136,22 @@ class BingWebSearchTool(BaseTool):
         Returns:
             str: A list of search results.
         """
+        options = pop_format_options(kwargs)
+        endpoint, headers, params = self._build_request(query, **kwargs)
+
+        # Make the request to the Bing Search API
+        response = cached_get("bing_web", endpoint, params=params, headers=headers)
+        return self._parse_response(response, **options)
+
+    async def _arun(self, query: str, **kwargs) -> str:
+        """Async version of _run, using the shared async HTTP client. Accepts the same arguments."""
+        options = pop_format_options(kwargs)
+        endpoint, headers, params = self._build_request(query, **kwargs)
+        response = await cached_aget("bing_web", endpoint, params=params, headers=headers)
+        return self._parse_response(response, **options)
+
+    def _build_request(self, query: str, **kwargs):
+        """Return the (endpoint, headers, params) of a Bing Web Search request."""
         count = kwargs.get("count", 50)
         responseFilter = kwargs.get("responseFilter", "Webpages")
         safeSearch = kwargs.get("safeSearch", "Moderate")
@@ -166,40 +185,24 @@ class BingWebSearchTool(BaseTool):
         if not endpoint.endswith("/v7.0/search"):
             endpoint = f"{endpoint.rstrip('/')}/v7.0/search"
 
-        # Make the request to the Bing Search API
-        response = requests.get(endpoint, headers=headers, params=params)
-        response.raise_for_status()
+        return endpoint, headers, params
 
-        # Parse the response and extract web pages
-        result_list = []
+    def _parse_response(self, response, **options) -> str:
+        """Format the web pages of a Bing Web Search response within the tool output token budget."""
+        response.raise_for_status()
         webpages = response.json().get("webPages", {}).get("value", [])
-
-        
-        # Check if the response is empty and return an adequate message if it is
-        if not webpages:
-            return "No search results found for the given query."
-
-        # Extract relevant information from each web page
-        for page in webpages:
-            result_list.append(
-                "\n".join(
-                    [
-                        f"Name: {page.get('name', 'N/A')}",
-                        f"URL: {page.get('url', 'N/A')}",
-                        f"Date Published: {page.get('datePublished', 'N/A')}",
-                        #f"Date Published Freshness: {page.get('datePublishedFreshnessText', 'N/A')}",
-                        #f"Family Friendly: {page.get('isFamilyFriendly', 'N/A')}",
-                        f"Display URL: {page.get('displayUrl', 'N/A')}",
-                        f"Snippet: {page.get('snippet', 'N/A')}",
-                        #f"Date Last Crawled: {page.get('dateLastCrawled', 'N/A')}",
-                        f"Language: {page.get('language', 'N/A')}",
-                        "---"
-                    ]
-                )
-            )
-        content = "\n".join(result_list)
-        
-        return content
+        records = [
+            {
+                "title": page.get("name"),
+                "url": page.get("url"),
+                "published": page.get("datePublished"),
+                "snippet": page.get("snippet"),
+                "language": page.get("language"),
+            }
+            for page in webpages
+        ]
+        return format_tool_output(records, ("title", "url", "published", "snippet"),
+                                  empty_message="No search results found for the given query.", **options)
 
 
 def Autogen_run_bing_web_search_tool(
@@ -290,7 +293,7 @@ def Autogen_run_bing_web_search_tool(
         endpoint = f"{endpoint.rstrip('/')}/v7.0/search"
 
     # Make the request to the Bing Search API
-    response = requests.get(endpoint, headers=headers, params=params)
+    response = cached_get("bing_web", endpoint, params=params, headers=headers)
     print(f"Request URL: {response.url}")
     print(f"Response Status Code: {response.status_code}")
     response.raise_for_status()
@@ -486,6 +489,30 @@ class BingNewsSearchTool(BaseTool):
         Returns:
             str: A list of search results.
         """
+        options = pop_format_options(kwargs)
+        endpoint, headers, params = self._build_request(query, **kwargs)
+
+        # Make the request to the Bing News Search API
+        response = cached_get("bing_news", endpoint, params=params, headers=headers)
+        return self._parse_response(response, **options)
+
+    async def _arun(self, query: str, **kwargs) -> str:
+        """Async version of _run, using the shared async HTTP client. Accepts the same arguments."""
+        options = pop_format_options(kwargs)
+        endpoint, headers, params = self._build_request(query, **kwargs)
+        response = await cached_aget("bing_news", endpoint, params=params, headers=headers)
+        return self._parse_response(response, **options)
+
+    async def _arun_json(self, query: str, **kwargs) -> dict:
+        """Like _arun, but return the raw Bing News JSON answer (used by the news fan-out to normalize articles)."""
+        pop_format_options(kwargs)
+        endpoint, headers, params = self._build_request(query, **kwargs)
+        response = await cached_aget("bing_news", endpoint, params=params, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def _build_request(self, query: str, **kwargs):
+        """Return the (endpoint, headers, params) of a Bing News Search request."""
         count = kwargs.get("count", 50)
         freshness = kwargs.get("freshness", "Month")
         offset = kwargs.get("offset", 0)
@@ -534,42 +561,11 @@ class BingNewsSearchTool(BaseTool):
         if not endpoint.endswith("/v7.0/news/search"):
             endpoint = f"{endpoint.rstrip('/')}/v7.0/news/search"
 
-        # Make the request to the Bing News Search API
-        response = requests.get(endpoint, headers=headers, params=params)
+        return endpoint, headers, params
+
+    def _parse_response(self, response, **options) -> str:
+        """Format the news articles of a Bing News Search response within the tool output token budget."""
         response.raise_for_status()
-    
-        # Parse the response and extract news articles
-        result_list = []
-        news_articles = response.json().get("value", [])
-
-        # Check if the response is empty and return an adequate message if it is
-        if not news_articles:
-            return "No news articles found for the given query."
-
-        # Extract relevant information from each news article
-        for article in news_articles:
-            result_list.append(
-                "\n".join(
-                    [
-                        f"Name: {article.get('name')}",
-                        f"URL: {article.get('url')}",
-                        f"Description: {article.get('description')}",
-                        #"About: " + ", ".join(
-                        #    [f"ReadLink: {about.get('readLink')}, Name: {about.get('name')}"
-                        #     for about in article.get('about', [])]
-                        #),
-                        "\n".join(
-                            [
-                                f"Provider Name: {provider.get('name')}"
-                                #f"\nProvider Type: {provider.get('_type')}"
-                                for provider in article.get('provider', [])
-                            ]
-                        ),
-                        f"DatePublished: {article.get('datePublished')}",
-                        "---"
-                    ]
-                )
-            )
-        content = "\n".join(result_list)
-        
-        return content   
+        records = [article.to_dict() for article in from_bing_news(response.json())]
+        return format_tool_output(records, ("title", "url", "source", "published", "snippet"),
+                                  empty_message="No news articles found for the given query.", **options)
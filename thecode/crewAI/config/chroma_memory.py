@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+"""
+chroma_memory.py: Process-wide ChromaDB memory store for AzureOpenAIChromaTool.
+The persistent Chroma client, the Azure embedding function and the memory collection are created
+once per process and shared by every tool call, instead of being rebuilt for each prompt.
+The storage path and collection name come from CHROMA_MEMORY_PATH and CHROMA_MEMORY_COLLECTION.
+Embeddings go through the two-tier embedding cache (see embedding_cache.py) unless EMBEDDING_CACHE_ENABLED is false.
+New memories are written behind: upsert() puts them on a bounded queue and a background thread stores
+them in batches, so the tool returns its answer without waiting on embedding and disk writes.
+Retrieval is scoped to one user: every user has a collection of their own (nlp_memory__<user>), so a query
+searches only that user's index; MEMORY_USER_SCOPE=filter keeps one shared collection and filters on the
+user_id metadata instead. Memories written before per-user collections existed sit in the shared collection
+until `python -m config.memory_compaction` moves them, so while it holds records (and MEMORY_USER_SCOPE is
+not set) the store keeps using the filter scope.
+close_memory_store() flushes the queue and releases the store; it also runs at interpreter exit.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import atexit
+import hashlib
+import os
+import queue
+import re
+import threading
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import chromadb
+
+from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+
+from .embedding_cache import CachedEmbeddingFunction, EmbeddingDiskCache
+from .response_cache import default_cache_dir
+
+
+DEFAULT_MEMORY_PATH = "c:/chroma/chroma_memory"
+DEFAULT_COLLECTION = "nlp_memory"
+USER_SCOPES = ("collection", "filter")
+
+
+def memory_id(user_id: str, prompt: str) -> str:
+    """
+    Stable record ID of a user's memory for a prompt.
+
+    Unlike Python's hash(), which is salted per process, the same user and prompt (ignoring case and
+    whitespace) map to the same ID in every run, so re-asking a question updates its memory in place.
+    """
+    normalized = " ".join(str(prompt).split()).lower()
+    return f"{user_id}_{hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:32]}"
+
+
+def azure_embedding_function() -> OpenAIEmbeddingFunction:
+    return OpenAIEmbeddingFunction(
+        api_type="azure",
+        api_key=os.getenv("AZURE_API_KEY"),
+        model_name=os.getenv("AZURE_OPENAI_EMBEDDED_MODEL"),
+        deployment_id=os.getenv("AZURE_OPENAI_EMBEDDED_DEPLOYMENT"),
+        api_base=os.getenv("AZURE_API_BASE"),
+    )
+
+
+_embedding_cache: Optional[CachedEmbeddingFunction] = None
+
+
+def cached_embedding_function():
+    """
+    The Azure embedding function behind the embedding cache.
+
+    Settings: EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_MB and EMBEDDING_CACHE_MEMORY_ITEMS.
+    """
+    global _embedding_cache
+    embedding_function = azure_embedding_function()
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").strip().lower() not in ("1", "true", "yes", "on"):
+        return embedding_function
+    _embedding_cache = CachedEmbeddingFunction(
+        embedding_function,
+        namespace=f"{os.getenv('AZURE_OPENAI_EMBEDDED_DEPLOYMENT')}:{os.getenv('AZURE_OPENAI_EMBEDDED_MODEL')}",
+        disk_cache=EmbeddingDiskCache(
+            path=os.getenv("EMBEDDING_CACHE_PATH") or os.path.join(default_cache_dir(), "embedding_cache.sqlite"),
+            max_bytes=int(float(os.getenv("EMBEDDING_CACHE_MAX_MB", 256)) * 1024 * 1024),
+        ),
+        memory_items=int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", 4096)),
+    )
+    return _embedding_cache
+
+
+def _enabled(name: str, default: str = "true") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+class ChromaMemoryStore:
+    """
+    One persistent Chroma client with its embedding function and opened collections.
+
+    Args:
+        path (str): Directory of the persistent Chroma database.
+        collection_name (str): Default memory collection.
+        embedding_function: Chroma embedding function; the cached Azure OpenAI deployment by default.
+        write_behind (bool): Store upserts from a background thread; MEMORY_WRITE_BEHIND by default.
+        queue_size (int): Pending upserts before upsert() blocks; MEMORY_WRITE_QUEUE_SIZE by default.
+        batch_size (int): Most records stored per collection.upsert call; MEMORY_WRITE_BATCH_SIZE by default.
+        user_scope (str): "collection" (one collection per user) or "filter" (user_id filter); MEMORY_USER_SCOPE by default,
+            and without it "filter" while the shared collection still holds records, "collection" otherwise.
+    """
+
+    def __init__(self,
+                 path: str,
+                 collection_name: str = DEFAULT_COLLECTION,
+                 embedding_function: Optional[Any] = None,
+                 write_behind: Optional[bool] = None,
+                 queue_size: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 user_scope: Optional[str] = None):
+        self.path = path
+        self.collection_name = collection_name
+        self.embedding_function = embedding_function or cached_embedding_function()
+        self.client = chromadb.PersistentClient(path=path)
+        self._collections: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.write_behind = _enabled("MEMORY_WRITE_BEHIND") if write_behind is None else write_behind
+        self.batch_size = batch_size or int(os.getenv("MEMORY_WRITE_BATCH_SIZE", 32))
+        self._queue: "queue.Queue[Optional[Tuple[str, str, str, Dict[str, Any]]]]" = queue.Queue(
+            maxsize=queue_size or int(os.getenv("MEMORY_WRITE_QUEUE_SIZE", 256))
+        )
+        self._writer: Optional[threading.Thread] = None
+        self.written = 0
+        self.failed = 0
+        self.user_scope = (user_scope or os.getenv("MEMORY_USER_SCOPE") or self._default_scope()).strip().lower()
+        if self.user_scope not in USER_SCOPES:
+            raise ValueError(f"MEMORY_USER_SCOPE must be one of {', '.join(USER_SCOPES)}, not '{self.user_scope}'.")
+
+    def _default_scope(self) -> str:
+        try:
+            shared = self.client.get_collection(name=self.collection_name).count()
+        except Exception:  # no shared collection (raised as ValueError or NotFoundError depending on the chromadb version)
+            shared = 0
+        if not shared:
+            return "collection"
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Memory: {shared} memories in the shared collection '{self.collection_name}' "
+              f"are not migrated to per-user collections yet; searching them with a user filter. Run python -m config.memory_compaction to migrate.")
+        return "filter"
+
+    def collection(self, name: Optional[str] = None):
+        """Return a collection, opening (or creating) it on first use."""
+        name = name or self.collection_name
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = self.client.get_or_create_collection(
+                    name=name,
+                    embedding_function=self.embedding_function,
+                )
+            return self._collections[name]
+
+    def user_collection_name(self, user_id: str) -> str:
+        """
+        Name of the collection that holds a user's memories.
+
+        Chroma collection names allow 3-63 characters of [a-zA-Z0-9._-], so the user ID is shortened
+        and a hash of the full ID keeps different users apart.
+        """
+        if self.user_scope == "filter":
+            return self.collection_name
+        slug = re.sub(r"[^a-zA-Z0-9_-]+", "-", str(user_id)).strip("-_")[:24]
+        suffix = hashlib.sha256(str(user_id).encode("utf-8")).hexdigest()[:8]
+        return f"{self.collection_name}__{slug}-{suffix}" if slug else f"{self.collection_name}__{suffix}"
+
+    def is_memory_collection(self, name: str) -> bool:
+        return name == self.collection_name or name.startswith(f"{self.collection_name}__")
+
+    def query(self, user_id: str, query_text: str, n_results: int, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Nearest memories of one user; no other user's records are searched."""
+        collection = self.collection(self.user_collection_name(user_id))
+        count = collection.count()
+        if not count:
+            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        return collection.query(
+            query_texts=[query_text],
+            n_results=min(n_results, count),
+            where={"user_id": user_id} if self.user_scope == "filter" else None,
+            include=include or ["documents", "distances", "metadatas"],
+        )
+
+    def upsert(self, record_id: str, document: str, metadata: Dict[str, Any], collection_name: Optional[str] = None) -> None:
+        """
+        Store (or replace) one memory record.
+
+        With write-behind on, the record is queued and stored later by the writer thread; when the
+        queue is full this call waits for room, which bounds the memory held by pending writes.
+        """
+        name = collection_name or self.collection_name
+        if not self.write_behind:
+            self.collection(name).upsert(ids=[record_id], documents=[document], metadatas=[metadata])
+            self.written += 1
+            return
+        self._start_writer()
+        self._queue.put((name, record_id, document, metadata))
+
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="chroma-memory-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        stop = False
+        while not stop:
+            batch: List[Tuple[str, str, str, Dict[str, Any]]] = []
+            item = self._queue.get()
+            taken = 1
+            # Drain whatever else is already queued, up to one batch
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                    taken += 1
+                except queue.Empty:
+                    break
+            stop = item is None
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[Tuple[str, str, str, Dict[str, Any]]]) -> None:
+        by_collection: Dict[str, Dict[str, Tuple[str, Dict[str, Any]]]] = {}
+        for name, record_id, document, metadata in batch:
+            # A record queued twice keeps its latest version; Chroma rejects duplicate IDs in one call
+            by_collection.setdefault(name, {})[record_id] = (document, metadata)
+        for name, records in by_collection.items():
+            try:
+                self.collection(name).upsert(
+                    ids=list(records),
+                    documents=[document for document, _ in records.values()],
+                    metadatas=[metadata for _, metadata in records.values()],
+                )
+                self.written += len(records)
+            except Exception as e:
+                self.failed += len(records)
+                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Failed to store {len(records)} memory record(s) in '{name}': {e}")
+
+    def flush(self) -> None:
+        """Block until every queued memory write has been stored."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+        with self._lock:
+            self._collections.clear()
+        # Releases the cached client system (SQLite handles) in chromadb >= 0.4
+        clear_system_cache = getattr(self.client, "clear_system_cache", None)
+        if clear_system_cache is not None:
+            clear_system_cache()
+
+
+_store: Optional[ChromaMemoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_memory_store() -> ChromaMemoryStore:
+    """Return the process-wide memory store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = os.getenv("CHROMA_MEMORY_PATH") or DEFAULT_MEMORY_PATH
+                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Opening Chroma memory store: {path}")
+                _store = ChromaMemoryStore(
+                    path=path,
+                    collection_name=os.getenv("CHROMA_MEMORY_COLLECTION") or DEFAULT_COLLECTION,
+                )
+    return _store
+
+
+def close_memory_store() -> None:
+    """Flush and close the process-wide memory store, if it was opened."""
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
+
+
+atexit.register(close_memory_store)
+
+
+def print_embedding_cache_stats() -> None:
+    """Print embedding cache statistics if the memory store embedded anything in this process."""
+    if _embedding_cache is not None and _embedding_cache.memory_hits + _embedding_cache.disk_hits + _embedding_cache.misses:
+        _embedding_cache.print_stats()
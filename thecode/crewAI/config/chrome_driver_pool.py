@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+chrome_driver_pool.py: A managed pool of warm headless Chrome drivers for Selenium scraping.
+Drivers are reused across tool calls and agents, reset between pages, recycled after a configurable
+number of pages or after a crash, and shut down when the crew finishes (or at interpreter exit).
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import atexit
+import os
+import queue
+import threading
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from selenium import webdriver
+
+
+def _default_options():
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    return options
+
+
+class ChromeDriverPool:
+    """
+    Bounded pool of Chrome WebDriver instances.
+
+    Args:
+        size (int): Maximum number of browsers alive at the same time.
+        max_pages_per_driver (int): A driver is quit and replaced after serving this many pages.
+        options_factory (callable): Returns fresh ChromeOptions for every launched browser.
+        page_load_timeout (int): Page load timeout in seconds applied to every driver.
+    """
+
+    def __init__(self,
+                 size: int = 2,
+                 max_pages_per_driver: int = 20,
+                 options_factory: Optional[Callable[[], Any]] = None,
+                 page_load_timeout: int = 30):
+        self.size = max(1, size)
+        self.max_pages_per_driver = max(1, max_pages_per_driver)
+        self.page_load_timeout = page_load_timeout
+        self._options_factory = options_factory or _default_options
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.launched = 0
+        self.recycled = 0
+
+    def _launch(self):
+        driver = webdriver.Chrome(options=self._options_factory())
+        driver.set_page_load_timeout(self.page_load_timeout)
+        with self._lock:
+            self._pages[id(driver)] = (driver, 0)
+            self.launched += 1
+        return driver
+
+    def _discard(self, driver) -> None:
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            self.recycled += 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _reset(driver) -> None:
+        # Close any extra windows opened by the page and leave the main one on a blank page
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        """
+        Check a driver out of the pool for the duration of the `with` block.
+
+        Blocks until a slot is free (or `timeout` seconds elapse). After the block the driver is reset
+        and returned to the pool; if resetting fails (crashed browser) or it reached
+        max_pages_per_driver, it is quit and a new one is launched on the next checkout.
+        """
+        if self._closed:
+            raise RuntimeError("Chrome driver pool has been shut down.")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("Timed out waiting for a free Chrome driver.")
+        driver = None
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._launch()
+            yield driver
+        finally:
+            if driver is not None:
+                self._release(driver)
+            self._slots.release()
+
+    def _release(self, driver) -> None:
+        with self._lock:
+            _, pages = self._pages.get(id(driver), (driver, 0))
+            pages += 1
+            self._pages[id(driver)] = (driver, pages)
+        if self._closed or pages >= self.max_pages_per_driver:
+            self._discard(driver)
+            return
+        try:
+            self._reset(driver)
+        except Exception:
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    def shutdown(self) -> None:
+        """Quit every idle browser. Drivers still checked out are quit when they are released."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "alive": len(self._pages),
+            "idle": self._idle.qsize(),
+            "launched": self.launched,
+            "recycled": self.recycled,
+        }
+
+
+_pool: Optional[ChromeDriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool(options_factory: Optional[Callable[[], Any]] = None) -> ChromeDriverPool:
+    """
+    Return the process-wide driver pool, creating it on first use.
+
+    Pool size and recycling are read from SELENIUM_POOL_SIZE and SELENIUM_MAX_PAGES_PER_DRIVER.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = ChromeDriverPool(
+                size=int(os.getenv("SELENIUM_POOL_SIZE", 2)),
+                max_pages_per_driver=int(os.getenv("SELENIUM_MAX_PAGES_PER_DRIVER", 20)),
+                options_factory=options_factory,
+                page_load_timeout=int(os.getenv("SELENIUM_PAGE_LOAD_TIMEOUT", 30)),
+            )
+        return _pool
+
+
+def shutdown_driver_pool() -> None:
+    """Shut down the process-wide driver pool, if one was started."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+        stats = pool.stats()
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Chrome driver pool closed: {stats['launched']} launched, {stats['recycled']} quit")
+
+
+atexit.register(shutdown_driver_pool)
@@ -37,6 +37,22 @@ from .custom_pdf_tool import CustomPDFReadTool
 from .AOAIChroma_tool import AzureOpenAIChromaTool 
 from .serpapi_Google_tools import OrganicSearchTool, KnowledgeGraphTool
 from .google_KGS_tool import GoogleKnowledgeGraphSearchTool, GoogleKnowledgeGraphSearchJSONTool
+from .tool_registry import LazyToolRegistry
+from .chrome_driver_pool import get_driver_pool, shutdown_driver_pool
+from .http_client import close_http_client
+from .pooled_selenium_tool import PooledSeleniumScrapingTool
+from .response_cache import print_cache_stats
+from .rate_limiter import print_quota_stats
+from .resilience import print_resilience_stats
+from .metrics import observe_step, observe_task, start_metrics_server, start_task_timer, write_metrics
+from .token_budget import print_token_report, task_finished, track_tokens
+from .news_fanout_tool import NewsFanOutSearchTool, fanout_providers
+from .llm_cache import make_llm, print_llm_cache_stats
+from .pdf_text_cache import print_pdf_cache_stats
+from .chroma_memory import close_memory_store, print_embedding_cache_stats
+from .crew_checkpoint import CrewCheckpoint, load_checkpoint_inputs
+from .news_monitor import NewsMonitor, articles_task_output
+from .topic_batch import load_topics, run_topic_batch, print_batch_summary, format_seconds
 from dotenv import load_dotenv
 from tavily import TavilyClient
 from crewai import LLM
@@ -47,6 +63,14 @@ from crewai import LLM
 def callback_function(output):
     # Do something after the task is completed
     print(f"\033[94m[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Task '{output.name}' completed\033[0m")
+    observe_task(output)
+    task_finished(output)
+
+# crew-level task_callback of the PROD scripts
+task_callback_function = callback_function
+
+def print_time_taken(seconds):
+    print(f"Time taken: {format_seconds(seconds)}")
 
 def step_callback_function(step):
     # List all attributes of step:
@@ -64,6 +88,7 @@ def step_callback_function(step):
         print(f"    attr: {attr}")"""    
 
     if step:
+        observe_step(step)
         if step.thought:
             step.thought = step.thought.replace('\n', ' ')
             thought_text = step.thought[:300] + "..." if len(step.thought) > 300 else step.thought
@@ -75,7 +100,7 @@ def step_callback_function(step):
         
 
 
-def initialize_tools():
+def build_chrome_options():
    # selenium
    options = webdriver.ChromeOptions()
    options.add_experimental_option('excludeSwitches', ['enable-logging'])
@@ -88,9 +113,16 @@ def initialize_tools():
    options.add_argument("--disable-background-networking") # Disables background networking, which can reduce unnecessary network activity.
    options.add_argument("--disable-translate") # Disables the translation feature, which can speed up page loading.
    # https://peter.sh/experiments/chromium-command-line-switches/
-   
-   driver = webdriver.Chrome(options=options)
-   
+   return options
+
+
+def initialize_tools():
+   """
+   Register every tool factory in a LazyToolRegistry.
+
+   Nothing is constructed here: a tool (and its embedchain/RAG setup) is built the first time
+   a Task asks for it via tools['name']. Call tools.print_build_report() to see build timings.
+   """
    config=dict(
         llm=dict(
             provider="azure_openai", # or google, openai, anthropic, llama2, ...
@@ -112,52 +144,54 @@ def initialize_tools():
             ),
         ),
    )
-   return {
-        'bing': BingWebSearchTool(),
-        'bingnews': BingNewsSearchTool(),
-        'scrape': ScrapeWebsiteTool(), # https://docs.crewai.com/tools/scrapewebsitetool
-        'rag': RagTool(config=config),
-        'website_search': WebsiteSearchTool(config=config),        
-        'file_writer': FileWriterTool(),
-        'file_read': FileReadTool(),
-        'directory': DirectoryReadTool(),
-        'directory_search': DirectorySearchTool(config=config),
-        'text_search': TXTSearchTool(config=config), # https://docs.crewai.com/tools/txtsearchtool
-        'media_stack': MediastackNewsTool(),
-        'newsapi_top': NewsAPITopTool(),
-        'newsapi_everything': NewsAPIEverythingTool(),
-        'newsdata': LatestNewsTool(),
-        'exa': EXASearchTool(),
-        #'selenium': SeleniumScrapingTool(driver=driver),
-        'selenium': SeleniumScrapingTool(), # https://docs.crewai.com/tools/seleniumscrapingtool
-        'serperdev': SerperDevTool(), # https://docs.crewai.com/tools/serperdevtool
-        'tavily_general':TavilySearchGeneralTool(),
-        'tavily_news': TavilySearchNewsTool(),
-        'tavily_context': TavilyContextTool(),
-        'tavily_qna': TavilyQnATool(),
-        'pdf_read': CustomPDFReadTool(),
-        'pdf_search': PDFSearchTool(config=config), # https://docs.crewai.com/tools/pdfsearchtool
+   tools = LazyToolRegistry({
+        'bing': lambda: BingWebSearchTool(),
+        'bingnews': lambda: BingNewsSearchTool(),
+        'scrape': lambda: ScrapeWebsiteTool(), # https://docs.crewai.com/tools/scrapewebsitetool
+        'rag': lambda: RagTool(config=config),
+        'website_search': lambda: WebsiteSearchTool(config=config),
+        'file_writer': lambda: FileWriterTool(),
+        'file_read': lambda: FileReadTool(),
+        'directory': lambda: DirectoryReadTool(),
+        'directory_search': lambda: DirectorySearchTool(config=config),
+        'text_search': lambda: TXTSearchTool(config=config), # https://docs.crewai.com/tools/txtsearchtool
+        'media_stack': lambda: MediastackNewsTool(),
+        'newsapi_top': lambda: NewsAPITopTool(),
+        'newsapi_everything': lambda: NewsAPIEverythingTool(),
+        'newsdata': lambda: LatestNewsTool(),
+        'exa': lambda: EXASearchTool(),
+        'selenium': lambda: PooledSeleniumScrapingTool(driver_pool=get_driver_pool(build_chrome_options)), # https://docs.crewai.com/tools/seleniumscrapingtool
+        'serperdev': lambda: SerperDevTool(), # https://docs.crewai.com/tools/serperdevtool
+        'tavily_general': lambda: TavilySearchGeneralTool(),
+        'tavily_news': lambda: TavilySearchNewsTool(),
+        'tavily_context': lambda: TavilyContextTool(),
+        'tavily_qna': lambda: TavilyQnATool(),
+        'pdf_read': lambda: CustomPDFReadTool(),
+        'pdf_search': lambda: PDFSearchTool(config=config), # https://docs.crewai.com/tools/pdfsearchtool
         #'browser': BrowserbaseLoadTool(),
-        'code_docs_search': CodeDocsSearchTool(config=config),
-        'code_interpreter': CodeInterpreterTool(),
-        'csv_search': CSVSearchTool(config=config),
-        'dalle': DallETool(),
-        'docx_search': DOCXSearchTool(config=config),
-        'github_search': GithubSearchTool(
+        'code_docs_search': lambda: CodeDocsSearchTool(config=config),
+        'code_interpreter': lambda: CodeInterpreterTool(),
+        'csv_search': lambda: CSVSearchTool(config=config),
+        'dalle': lambda: DallETool(),
+        'docx_search': lambda: DOCXSearchTool(config=config),
+        'github_search': lambda: GithubSearchTool(
             config=config,
             gh_token=os.getenv('GH_TOKEN'),
             content_types=['code','issue']
         ), # https://docs.crewai.com/tools/githubsearchtool
-        'json_search': JSONSearchTool(config=config), # https://docs.crewai.com/tools/jsonsearchtool
-        'mdx_search': MDXSearchTool(config=config), # https://docs.crewai.com/tools/mdxsearchtool
-        'ytch_search': YoutubeChannelSearchTool(config=config),
-        'ytv_search': YoutubeVideoSearchTool(config=config),
-        'nlp_search': AzureOpenAIChromaTool(),
-        'serpapi_google': OrganicSearchTool(),
-        'serpapi_google_kg': KnowledgeGraphTool(), # google knowledge graph
-        'google_kg': GoogleKnowledgeGraphSearchTool(),  
-        'google_kg_json': GoogleKnowledgeGraphSearchJSONTool(),
-    }
+        'json_search': lambda: JSONSearchTool(config=config), # https://docs.crewai.com/tools/jsonsearchtool
+        'mdx_search': lambda: MDXSearchTool(config=config), # https://docs.crewai.com/tools/mdxsearchtool
+        'ytch_search': lambda: YoutubeChannelSearchTool(config=config),
+        'ytv_search': lambda: YoutubeVideoSearchTool(config=config),
+        'nlp_search': lambda: AzureOpenAIChromaTool(),
+        'serpapi_google': lambda: OrganicSearchTool(),
+        'serpapi_google_kg': lambda: KnowledgeGraphTool(), # google knowledge graph
+        'google_kg': lambda: GoogleKnowledgeGraphSearchTool(),
+        'google_kg_json': lambda: GoogleKnowledgeGraphSearchJSONTool(),
+    })
+   # the fan-out tool wraps the news provider tools, so it is built from the same registry
+   tools.register('news_fanout', lambda: NewsFanOutSearchTool(providers={name: tools[name] for name in fanout_providers()}))
+   return tools
    
 def create_llm_config(temperature, top_p, frequency_penalty, presence_penalty):
     return {
@@ -213,9 +247,10 @@ else:
 author = "<your_name>, CrewAI"
 
 
-llm_balanced = LLM(**create_llm_config(0.2, 0.7, 0.1, 0.1))
-llm_deterministic = LLM(**create_llm_config(0.0, 0.1, 0.0, 0.0))
-llm_creative = LLM(**create_llm_config(0.9, 0.9, 0.5, 0.5))
-llm_exploratory = LLM(**create_llm_config(0.7, 0.8, 0.3, 0.3))
-llm_focused = LLM(**create_llm_config(0.3, 0.5, 0.2, 0.2))
-llm_conversational = LLM(**create_llm_config(0.6, 0.7, 0.4, 0.4))
+# presets listed in LLM_CACHE_PRESETS (default: deterministic) answer repeated prompts from the LLM cache
+llm_balanced = make_llm("balanced", create_llm_config(0.2, 0.7, 0.1, 0.1))
+llm_deterministic = make_llm("deterministic", create_llm_config(0.0, 0.1, 0.0, 0.0))
+llm_creative = make_llm("creative", create_llm_config(0.9, 0.9, 0.5, 0.5))
+llm_exploratory = make_llm("exploratory", create_llm_config(0.7, 0.8, 0.3, 0.3))
+llm_focused = make_llm("focused", create_llm_config(0.3, 0.5, 0.2, 0.2))
+llm_conversational = make_llm("conversational", create_llm_config(0.6, 0.7, 0.4, 0.4))
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+crew_checkpoint.py: Checkpoint and resume for the PROD crew scripts.
+After every finished task the crew's task_callback records its output in checkpoint.json in the run's
+output folder. Started with --resume <output_folder>, a script reloads the recorded outputs, checks that
+they are still valid (same task definition and inputs, output file present, upstream tasks unchanged),
+hands them to the remaining tasks as context and runs only the tasks that are missing or invalidated.
+Editing a task's output file and resuming re-runs just the tasks that depend on it.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import hashlib
+import json
+import os
+import threading
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from crewai.tasks.output_format import OutputFormat
+from crewai.tasks.task_output import TaskOutput
+
+
+CHECKPOINT_FILE = "checkpoint.json"
+# Inputs that differ on every run and do not change what a task should produce
+VOLATILE_INPUTS = ("date", "output_dir")
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_checkpoint_inputs(output_folder: str) -> Dict[str, Any]:
+    """Inputs recorded by an earlier run in output_folder, e.g. to reuse its topic on --resume."""
+    path = os.path.join(output_folder, CHECKPOINT_FILE)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"No {CHECKPOINT_FILE} in '{output_folder}'; only folders of checkpointed runs can be resumed.")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("inputs", {})
+
+
+class CrewCheckpoint:
+    """
+    Manifest of finished task outputs for one run folder.
+
+    Args:
+        output_folder (str): The run's output folder; the manifest is stored there.
+        inputs (dict): The crew.kickoff() inputs of this run.
+        script_name (str): Name of the crew script, recorded for reference.
+    """
+
+    def __init__(self, output_folder: str, inputs: Dict[str, Any], script_name: str = ""):
+        self.path = os.path.join(output_folder, CHECKPOINT_FILE)
+        self.inputs = inputs
+        self._lock = threading.Lock()
+        self._tasks_by_name: Dict[str, Any] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self.manifest: Dict[str, Any] = {"script": script_name, "inputs": {}, "tasks": {}}
+        if os.path.isfile(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        self.manifest["inputs"] = {key: value for key, value in inputs.items() if key != "output_dir"}
+
+    def fingerprint(self, task) -> str:
+        """
+        Hash of what determines a task's output: its definition and the stable crew inputs.
+
+        Only valid before kickoff(), which interpolates the inputs into the task in place and, in
+        hierarchical mode, hands the task to the manager agent; restore() computes it for every task then.
+        """
+        stable_inputs = {key: value for key, value in self.inputs.items() if key not in VOLATILE_INPUTS}
+        return _sha256(json.dumps({
+            "description": task.description,
+            "expected_output": task.expected_output,
+            "agent": task.agent.role if task.agent else "",
+            "inputs": stable_inputs,
+        }, sort_keys=True, default=str))
+
+    def restore(self, tasks: List[Any]) -> List[Any]:
+        """
+        Reload valid recorded outputs into their tasks and return the tasks that still have to run.
+
+        A task is restored when its fingerprint matches the manifest, its output can be read (from
+        its output file, or from the manifest when the file was never written) and every task in its
+        context was restored unchanged. Restored outputs become task.output, which CrewAI reads when
+        a pending task lists the restored one in its context.
+        """
+        self._tasks_by_name = {task.name: task for task in tasks}
+        self._fingerprints = {task.name: self.fingerprint(task) for task in tasks}
+        recorded = self.manifest.get("tasks", {})
+        restored, changed = set(), set()
+        pending = []
+        for task in tasks:
+            entry = recorded.get(task.name)
+            reason = self._invalid_reason(task, entry, restored, changed)
+            if reason:
+                if entry is not None:
+                    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Checkpoint: re-running '{task.name}' ({reason})")
+                if entry is not None:
+                    if entry.get("output_file"):
+                        task.output_file = entry["output_file"]  # overwrite the old output, do not add a new file
+                    # Forget the stale output, so a run that stops again cannot restore it later
+                    del recorded[task.name]
+                pending.append(task)
+                continue
+            raw = entry["raw"]
+            if entry.get("output_file") and os.path.isfile(entry["output_file"]):
+                with open(entry["output_file"], "r", encoding="utf-8") as f:
+                    raw = f.read()
+                if _sha256(raw) != entry["sha256"]:
+                    # Edited by hand: keep the edit, but everything built on the old output is stale
+                    changed.add(task.name)
+                    entry.update(raw=raw, sha256=_sha256(raw))
+            task.output = TaskOutput(
+                description=task.description,
+                name=task.name,
+                expected_output=task.expected_output,
+                raw=raw,
+                agent=entry.get("agent", ""),
+                output_format=OutputFormat.RAW,
+            )
+            restored.add(task.name)
+        with self._lock:
+            self._write()
+        if restored:
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Checkpoint: {len(restored)} of {len(tasks)} tasks restored "
+                  f"from {self.path}, {len(pending)} to run")
+        return pending
+
+    def _invalid_reason(self, task, entry: Optional[Dict[str, Any]], restored: set, changed: set) -> Optional[str]:
+        if entry is None:
+            return "not finished"
+        if entry.get("fingerprint") != self._fingerprints[task.name]:
+            return "task definition or inputs changed"
+        if not entry.get("raw") and not (entry.get("output_file") and os.path.isfile(entry["output_file"])):
+            return "output missing"
+        for context_task in task.context or []:
+            if context_task.name not in self._tasks_by_name:
+                continue  # not part of this crew (e.g. the per-provider searches when the fan-out is used)
+            if context_task.name not in restored:
+                return f"'{context_task.name}' is re-run"
+            if context_task.name in changed:
+                return f"'{context_task.name}' output was edited"
+        return None
+
+    def record(self, output: TaskOutput) -> None:
+        """Store a finished task's output and write the manifest."""
+        task = self._tasks_by_name.get(output.name)
+        entry = {
+            "fingerprint": self._fingerprints.get(output.name, ""),
+            "output_file": task.output_file if task is not None else None,
+            "raw": output.raw,
+            "sha256": _sha256(output.raw or ""),
+            "agent": output.agent,
+            "completed_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with self._lock:
+            self.manifest.setdefault("tasks", {})[output.name] = entry
+            self._write()
+
+    def _write(self) -> None:
+        # Caller holds the lock. Write and rename, so a crash never leaves a half-written manifest.
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    def task_callback(self, callback: Optional[Callable[[TaskOutput], Any]] = None) -> Callable[[TaskOutput], Any]:
+        """A crew task_callback that records each output before calling `callback`."""
+        def checkpoint_callback(output: TaskOutput):
+            self.record(output)
+            if callback is not None:
+                return callback(output)
+        return checkpoint_callback
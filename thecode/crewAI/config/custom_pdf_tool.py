@@ -1,19 +1,32 @@
 from crewai_tools import BaseTool
-import fitz  # PyMuPDF
+from pydantic import BaseModel, Field
+from typing import Optional, Type
+
+from .pdf_text_cache import read_pdf_text_cached
+
+
+class CustomPDFReadToolSchema(BaseModel):
+    file_path: str = Field(..., description="Path to the PDF file.")
+    pages: Optional[str] = Field(
+        None,
+        description="Pages to read, 1-based and inclusive, e.g. '5' or '10-25'. Default is the whole document."
+    )
+    max_chars: Optional[int] = Field(
+        None,
+        description="Stop reading after this many characters. Default is 50000.",
+        ge=1
+    )
+
 
 class CustomPDFReadTool(BaseTool):
     name: str = "PDF Read Tool"
-    description: str = "A tool extracting text from PDF files."
+    description: str = "A tool extracting text from PDF files. Supports reading a page range and a character limit."
+    args_schema: Type[BaseModel] = CustomPDFReadToolSchema
 
-    def _run(self, file_path: str) -> str:
+    def _run(self, file_path: str, pages: Optional[str] = None, max_chars: Optional[int] = None) -> str:
         try:
-            # Open the PDF file
-            document = fitz.open(file_path)
-            text = ""
-            # Extract text from each page
-            for page_num in range(len(document)):
-                page = document.load_page(page_num)
-                text += page.get_text()
-            return text
+            # Pages already extracted come from the PDF text cache; long uncached ranges of large
+            # files are extracted in a process pool (see pdf_extraction.use_parallel)
+            return read_pdf_text_cached(file_path, pages, max_chars)
         except Exception as e:
-            return f"An error occurred: {str(e)}"
\ No newline at end of file
+            return f"An error occurred: {str(e)}"
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+embedding_cache.py: Two-tier embedding cache wrapped around a Chroma embedding function.
+Texts embedded before (repeated prompts, re-stored memories) are served from an in-memory LRU, or
+from a SQLite disk tier that survives restarts, keyed on a hash of the embedding model and the text.
+All texts that miss the cache in one call are sent to the embedding deployment in a single batch.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+
+class EmbeddingDiskCache:
+    """
+    SQLite store of float32 embedding vectors with size-bounded LRU eviction.
+
+    Args:
+        path (str): Location of the SQLite database file.
+        max_bytes (int): Upper bound of the stored vector size.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed)")
+        self._db.commit()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+        now = time.time()
+        with self._lock:
+            for offset in range(0, len(keys), 500):  # stay below SQLite's bound-parameter limit
+                chunk = list(keys[offset:offset + 500])
+                marks = ",".join("?" * len(chunk))
+                for key, blob in self._db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", chunk):
+                    found[key] = array("f", blob).tolist()
+            if found:
+                self._db.executemany("UPDATE embeddings SET accessed = ? WHERE key = ?", [(now, key) for key in found])
+                self._db.commit()
+        return found
+
+    def set_many(self, vectors: Dict[str, Sequence[float]]) -> None:
+        now = time.time()
+        rows = []
+        for key, vector in vectors.items():
+            blob = array("f", vector).tobytes()
+            rows.append((key, blob, len(blob), now))
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, accessed) VALUES (?, ?, ?, ?)", rows
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        # Caller holds the lock
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess, freed, victims = total - self.max_bytes, 0, []
+        for key, size in self._db.execute("SELECT key, size FROM embeddings ORDER BY accessed ASC"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Chroma embedding function that only embeds texts it has not seen before.
+
+    Args:
+        embedding_function: The wrapped (remote) embedding function.
+        namespace (str): Model identity mixed into the cache key, so vectors of different models never mix.
+        disk_cache (EmbeddingDiskCache): Optional persistent tier.
+        memory_items (int): Size of the in-memory LRU tier.
+    """
+
+    def __init__(self,
+                 embedding_function: Any,
+                 namespace: str,
+                 disk_cache: Optional[EmbeddingDiskCache] = None,
+                 memory_items: int = 4096):
+        self.embedding_function = embedding_function
+        self.namespace = namespace
+        self.disk_cache = disk_cache
+        self.memory_items = memory_items
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        keys = [self.key(text) for text in input]
+        vectors: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[key] = self._memory[key]
+            self.memory_hits += len(vectors)
+
+        pending = [key for key in dict.fromkeys(keys) if key not in vectors]
+        if pending and self.disk_cache is not None:
+            found = self.disk_cache.get_many(pending)
+            self.disk_hits += len(found)
+            vectors.update(found)
+            self._remember(found)
+
+        # Embed every remaining unique text in one request
+        missing = {}
+        for key, text in zip(keys, input):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            self.misses += len(missing)
+            self.requests += 1
+            embedded = self.embedding_function(list(missing.values()))
+            new_vectors = {key: [float(v) for v in vector] for key, vector in zip(missing, embedded)}
+            vectors.update(new_vectors)
+            self._remember(new_vectors)
+            if self.disk_cache is not None:
+                self.disk_cache.set_many(new_vectors)
+        return [vectors[key] for key in keys]
+
+    def _remember(self, vectors: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for key, vector in vectors.items():
+                self._memory[key] = vector
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def print_stats(self) -> None:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hit_rate = (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Embedding cache: memory hits: {self.memory_hits}, "
+              f"disk hits: {self.disk_hits}, misses: {self.misses} in {self.requests} request(s), hit rate: {hit_rate:.0%}")
+        if self.disk_cache is not None:
+            entries, size = self.disk_cache.count()
+            print(f"    disk tier: {entries} vectors, {size / 1024 / 1024:.1f} MB ({self.disk_cache.path})")
@@ -15,12 +15,13 @@ __name__ = 'Google Knowledge Graph Search Tool'
 import requests
 import os
 import json
-import urllib
 
 from crewai_tools import Tool, BaseTool
 from pydantic import BaseModel, Field
 from typing import Any, Optional, Type, Annotated
 
+from .response_cache import cached_aget, cached_get
+
 
 class GoogleKnowledgeGraphSearchToolSchema(BaseModel):
     query: Annotated[
@@ -63,6 +64,65 @@ class GoogleKnowledgeGraphSearchToolSchema(BaseModel):
     ] = False
 
 
+KG_SERVICE_URL = 'https://kgsearch.googleapis.com/v1/entities:search'
+
+
+def _build_kg_params(query: str, **kwargs) -> dict:
+    """Build the Knowledge Graph request parameters, including the API key."""
+    limit = kwargs.get("limit", 10)
+    indent = kwargs.get("indent", True)
+    languages = kwargs.get("languages", 'en')
+    types = kwargs.get("types", None)
+    prefix = kwargs.get("prefix", False)
+
+    # Retrieve API key from environment variables or file
+    api_key = os.getenv("GOOGLE_KG_API_KEY") or open('.api_key').read().strip()
+
+    # Set up request parameters
+    params = {
+        'query': query,
+        'limit': limit,
+        'indent': indent,
+        'key': api_key,
+        'languages': languages,
+        'prefix': prefix
+    }
+    if types:
+        params['types'] = types
+    return params
+
+
+def _format_kg_response(http_response) -> str:
+    """Parse the Knowledge Graph response and extract relevant information."""
+    http_response.raise_for_status()
+    response = http_response.json()
+    result_list = []
+    for element in response.get('itemListElement', []):
+        result = element.get('result', {})
+        detailedDescription = result.get('detailedDescription',{})
+        result_list.append(
+            "\n".join(
+                [
+                    f"Name: {result.get('name', 'N/A')}",
+                    f"Result Score: {element.get('resultScore', 'N/A')}",
+                    f"Description: {result.get('description', 'N/A')}",
+                    f"URL: {result.get('url', 'N/A')}",
+                    f"Detailed Description URL: {detailedDescription.get('url', 'N/A')}",
+                    "---"
+                ]
+            )
+        )
+    return "\n".join(result_list)
+
+
+def _kg_error(e: Exception) -> str:
+    if isinstance(e, requests.HTTPError):
+        return json.dumps({"error": f"HTTP Error: {e.response.status_code} - {e.response.reason}"})
+    if isinstance(e, requests.RequestException):
+        return json.dumps({"error": f"URL Error: {e}"})
+    return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+
+
 class GoogleKnowledgeGraphSearchTool(BaseTool):
     name: Annotated[str, Field(default="Google Knowledge Graph Search Tool", description="The name of the tool")]
     description: Annotated[str, Field(default="A tool for performing searches using the Google Knowledge Graph API", description="The description of the tool")]
@@ -87,59 +147,25 @@ class GoogleKnowledgeGraphSearchTool(BaseTool):
         Returns:
             str: A list of search results.
         """
-        limit = kwargs.get("limit", 10)
-        indent = kwargs.get("indent", True)
-        languages = kwargs.get("languages", 'en')
-        types = kwargs.get("types", None)
-        prefix = kwargs.get("prefix", False)
-
-        print("Step 1: Retrieve API key from environment variables or file")
-        # Retrieve API key from environment variables or file
-        api_key = os.getenv("GOOGLE_KG_API_KEY") or open('.api_key').read().strip()
-
-        print("Step 2: Set up request parameters")
-        # Set up request parameters
-        params = {
-            'query': query,
-            'limit': limit,
-            'indent': indent,
-            'key': api_key,
-            'languages': languages,
-            'prefix': prefix
-        }
-        if types:
-            params['types'] = types
-
-        print("Step 3: Set up the service URL")
-        # Set up the service URL
-        service_url = 'https://kgsearch.googleapis.com/v1/entities:search'
-        url = service_url + '?' + urllib.parse.urlencode(params)
-
-        print("Step 4: Make the request to the Google Knowledge Graph API")
-        # Make the request to the Google Knowledge Graph API
-        response = json.loads(urllib.request.urlopen(url).read())
-        #print(response)
-        print("Step 5: Parse the response and extract relevant information")
-        # Parse the response and extract relevant information
-        result_list = []
-        for element in response.get('itemListElement', []):
-            result = element.get('result', {})
-            detailedDescription = result.get('detailedDescription',{})
-            result_list.append(
-                "\n".join(
-                    [
-                        f"Name: {result.get('name', 'N/A')}",
-                        f"Result Score: {element.get('resultScore', 'N/A')}",
-                        f"Description: {result.get('description', 'N/A')}",
-                        f"URL: {result.get('url', 'N/A')}",
-                        f"Detailed Description URL: {detailedDescription.get('url', 'N/A')}",
-                        "---"
-                    ]
-                )
-            )
-        content = "\n".join(result_list)
-        
-        return content
+        print("Step 1: Retrieve API key and set up request parameters")
+        params = _build_kg_params(query, **kwargs)
+
+        print("Step 2: Make the request to the Google Knowledge Graph API")
+        http_response = cached_get("google_kg", KG_SERVICE_URL, params=params)
+
+        print("Step 3: Parse the response and extract relevant information")
+        return _format_kg_response(http_response)
+
+    async def _arun(self, query: str, **kwargs) -> str:
+        """Async version of _run, using the shared async HTTP client. Accepts the same arguments."""
+        print("Step 1: Retrieve API key and set up request parameters")
+        params = _build_kg_params(query, **kwargs)
+
+        print("Step 2: Make the request to the Google Knowledge Graph API")
+        http_response = await cached_aget("google_kg", KG_SERVICE_URL, params=params)
+
+        print("Step 3: Parse the response and extract relevant information")
+        return _format_kg_response(http_response)
 
 class GoogleKnowledgeGraphSearchJSONTool(BaseTool):
     name: Annotated[str, Field(default="Google Knowledge Graph Search Tool", description="The name of the tool")]
@@ -165,67 +191,16 @@ class GoogleKnowledgeGraphSearchJSONTool(BaseTool):
         Returns:
             str: A JSON string containing the search results from the Google Knowledge Graph API.
         """
-        limit = kwargs.get("limit", 10)
-        indent = kwargs.get("indent", True)
-        languages = kwargs.get("languages", 'en')
-        types = kwargs.get("types", None)
-        prefix = kwargs.get("prefix", False)
-
-        #print(f"Query: {query}")
-        #print(f"Limit: {limit}")
-        #print(f"Indent: {indent}")
-        #print(f"Languages: {languages}")
-        #print(f"Types: {types}")
-        #print(f"Prefix: {prefix}")
         try:
-            # Retrieve API key from environment variables or file
-            api_key = os.getenv("GOOGLE_KG_API_KEY") or open('.api_key').read().strip()
-
-            # Set up request parameters
-            params = {
-                'query': query,
-                'limit': limit,
-                'indent': indent,
-                'key': api_key,
-                'languages': languages,
-                'prefix': prefix
-            }
-            if types:
-                params['types'] = types
-
-            # Set up the service URL
-            service_url = 'https://kgsearch.googleapis.com/v1/entities:search'
-            url = service_url + '?' + urllib.parse.urlencode(params)
-
-            # Make the request to the Google Knowledge Graph API
-            response = json.loads(urllib.request.urlopen(url).read())
-            
-            
-            #print("Parse the response and extract relevant information")
-            # Parse the response and extract relevant information
-            result_list = []
-            for element in response.get('itemListElement', []):
-                result = element.get('result', {})
-                detailedDescription = result.get('detailedDescription',{})
-                result_list.append(
-                    "\n".join(
-                        [
-                            f"Name: {result.get('name', 'N/A')}",
-                            f"Result Score: {element.get('resultScore', 'N/A')}",
-                            f"Description: {result.get('description', 'N/A')}",
-                            f"URL: {result.get('url', 'N/A')}",
-                            f"Detailed Description URL: {detailedDescription.get('url', 'N/A')}",
-                            "---"
-                        ]
-                    )
-                )
-            content = "\n".join(result_list)
-            #return response
-            return content
-
-        except urllib.error.URLError as e:
-            return json.dumps({"error": f"URL Error: {e.reason}"})
-        except urllib.error.HTTPError as e:
-            return json.dumps({"error": f"HTTP Error: {e.code} - {e.reason}"})
+            params = _build_kg_params(query, **kwargs)
+            return _format_kg_response(cached_get("google_kg", KG_SERVICE_URL, params=params))
+        except Exception as e:
+            return _kg_error(e)
+
+    async def _arun(self, query: str, **kwargs) -> str:
+        """Async version of _run, using the shared async HTTP client. Accepts the same arguments."""
+        try:
+            params = _build_kg_params(query, **kwargs)
+            return _format_kg_response(await cached_aget("google_kg", KG_SERVICE_URL, params=params))
         except Exception as e:
-            return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+            return _kg_error(e)
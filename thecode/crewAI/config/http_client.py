@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+"""
+http_client.py: Shared, pooled HTTP transport for the custom CrewAI search tools.
+One process-wide client keeps connections alive between calls (no repeated TLS handshakes to the
+same API hosts), limits connections per host, applies default timeouts and accepts gzip.
+HTTP/2 is used when enabled and `httpx[http2]` is installed; otherwise requests/urllib3 is used.
+The async side (used by the tools' `_arun`) shares one httpx.AsyncClient per event loop.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import asyncio
+import os
+import threading
+import weakref
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Optional, Tuple, Union
+
+try:
+    import httpx
+except ImportError:  # optional dependency, needed for HTTP/2 and for the async client
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    _HAS_H2 = True
+except ImportError:
+    _HAS_H2 = False
+
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _split_timeout(timeout: Timeout) -> Tuple[float, float]:
+    return timeout if isinstance(timeout, tuple) else (timeout, timeout)
+
+
+def _clean_params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # requests drops None values, httpx sends them as empty strings; drop them for both backends
+    if params is None:
+        return None
+    return {k: v for k, v in params.items() if v is not None}
+
+
+class _HTTPXResponse:
+    """Minimal requests.Response look-alike so tools do not depend on the active backend."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.content = response.content
+        self.text = response.text
+
+    def json(self, **kwargs):
+        return self._response.json(**kwargs)
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.HTTPError(f"{self.status_code} Error: {self.reason} for url: {self.url}", response=self)
+
+
+class HTTPClient:
+    """
+    Keep-alive HTTP client shared by every tool in this package.
+
+    Args:
+        timeout: Default (connect, read) timeout in seconds.
+        pool_connections (int): Number of per-host connection pools kept alive.
+        pool_maxsize (int): Maximum connections per host; extra requests wait for a free connection.
+        http2 (bool): Use HTTP/2 through httpx when it is installed.
+    """
+
+    def __init__(self,
+                 timeout: Timeout = (5.0, 30.0),
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 4,
+                 http2: bool = False):
+        self.timeout = timeout
+        self.http2 = bool(http2 and httpx is not None and _HAS_H2)
+        headers = {"Accept-Encoding": "gzip, deflate"}
+        if self.http2:
+            connect, read = _split_timeout(timeout)
+            self._client = httpx.Client(
+                http2=True,
+                headers=headers,
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(
+                    max_connections=pool_connections * pool_maxsize,
+                    max_keepalive_connections=pool_connections * pool_maxsize,
+                ),
+            )
+        else:
+            self._client = requests.Session()
+            self._client.headers.update(headers)
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+            self._client.mount("https://", adapter)
+            self._client.mount("http://", adapter)
+
+    def get(self,
+            url: str,
+            params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[Timeout] = None):
+        """Send a GET request and return a requests.Response (or a compatible object)."""
+        params = _clean_params(params)
+        if not self.http2:
+            return self._client.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+        try:
+            if timeout is not None:
+                connect, read = _split_timeout(timeout)
+                response = self._client.get(url, params=params, headers=headers, timeout=httpx.Timeout(read, connect=connect))
+            else:
+                response = self._client.get(url, params=params, headers=headers)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+        return _HTTPXResponse(response)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class AsyncHTTPClient:
+    """
+    Async counterpart of HTTPClient built on httpx.AsyncClient.
+
+    Responses are wrapped so they behave like requests.Response, and transport errors are raised as
+    requests exceptions, which keeps the sync and async code paths of the tools identical.
+    """
+
+    def __init__(self,
+                 timeout: Timeout = (5.0, 30.0),
+                 max_connections: int = 40,
+                 http2: bool = False):
+        if httpx is None:
+            raise ImportError("The async search tools require httpx: pip install httpx")
+        connect, read = _split_timeout(timeout)
+        self.timeout = timeout
+        self.http2 = bool(http2 and _HAS_H2)
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            headers={"Accept-Encoding": "gzip, deflate"},
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def get(self,
+                  url: str,
+                  params: Optional[Dict[str, Any]] = None,
+                  headers: Optional[Dict[str, str]] = None,
+                  timeout: Optional[Timeout] = None):
+        """Send a GET request and return a requests.Response compatible object."""
+        kwargs = {}
+        if timeout is not None:
+            connect, read = _split_timeout(timeout)
+            kwargs["timeout"] = httpx.Timeout(read, connect=connect)
+        try:
+            response = await self._client.get(url, params=_clean_params(params), headers=headers, **kwargs)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+        return _HTTPXResponse(response)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_client: Optional[HTTPClient] = None
+_client_lock = threading.Lock()
+# httpx.AsyncClient connections belong to the loop that opened them, so keep one client per event loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncHTTPClient]" = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> HTTPClient:
+    """
+    Return the process-wide HTTP client, creating it on first use.
+
+    Settings are read from HTTP_TIMEOUT_CONNECT, HTTP_TIMEOUT_READ, HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE and HTTP_HTTP2.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HTTPClient(
+                    timeout=(float(os.getenv("HTTP_TIMEOUT_CONNECT", 5)), float(os.getenv("HTTP_TIMEOUT_READ", 30))),
+                    pool_connections=int(os.getenv("HTTP_POOL_CONNECTIONS", 10)),
+                    pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", 4)),
+                    http2=_env_flag("HTTP_HTTP2"),
+                )
+    return _client
+
+
+def get_async_http_client() -> AsyncHTTPClient:
+    """Return the async HTTP client shared by all tools running on the current event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncHTTPClient(
+            timeout=(float(os.getenv("HTTP_TIMEOUT_CONNECT", 5)), float(os.getenv("HTTP_TIMEOUT_READ", 30))),
+            max_connections=int(os.getenv("HTTP_POOL_CONNECTIONS", 10)) * int(os.getenv("HTTP_POOL_MAXSIZE", 4)),
+            http2=_env_flag("HTTP_HTTP2"),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_sync(coroutine):
+    """
+    Run a coroutine from sync code (e.g. a tool's _run) and return its result.
+
+    All such calls share one background event loop, so the async HTTP client and its keep-alive
+    connections are reused between calls instead of being rebuilt by every asyncio.run().
+    """
+    global _background_loop
+    with _client_lock:
+        if _background_loop is None or _background_loop.is_closed():
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="http-client-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coroutine, _background_loop).result()
+
+
+def close_http_client() -> None:
+    """
+    Close the process-wide HTTP client, the async clients of the event loops still running and the
+    run_sync loop. A client of a loop that has finished holds no connections any more and is just dropped.
+    """
+    global _client, _background_loop
+    with _client_lock:
+        client, _client = _client, None
+        background_loop, _background_loop = _background_loop, None
+    if client is not None:
+        client.close()
+    try:
+        current_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        current_loop = None
+    for loop, async_client in list(_async_clients.items()):
+        _async_clients.pop(loop, None)
+        if loop.is_running() and not loop.is_closed() and loop is not current_loop:
+            try:
+                asyncio.run_coroutine_threadsafe(async_client.aclose(), loop).result(timeout=10)
+            except Exception:
+                pass
+    if background_loop is not None and not background_loop.is_closed():
+        background_loop.call_soon_threadsafe(background_loop.stop)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+llm_cache.py: Opt-in on-disk completion cache for the CrewAI LLM presets.
+A CachedLLM answers a repeated prompt (same model, sampling parameters and messages) from a SQLite
+cache instead of calling the model again, so re-running a topic after a crash does not pay for the
+upstream tasks twice. Caching is enabled per preset via LLM_CACHE_PRESETS (default: deterministic only,
+because answers sampled at a higher temperature are expected to vary between runs). Cache hits are
+not counted in the token ledger (token_budget.py), since they cost no tokens.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import hashlib
+import json
+import os
+import threading
+
+from typing import Any, Dict, Optional
+
+from crewai import LLM
+
+from .response_cache import ResponseCache, default_cache_dir
+from .token_budget import BudgetedLLM
+
+
+# Endpoint and sampling settings that change the answer and are therefore part of the cache key.
+# base_url and api_version tell apart deployments (Azure, local servers) that share a model name.
+KEY_ATTRIBUTES = (
+    "model", "base_url", "api_version", "temperature", "top_p", "frequency_penalty", "presence_penalty",
+    "max_tokens", "max_completion_tokens", "stop", "seed", "n", "response_format",
+)
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> ResponseCache:
+    """
+    Return the process-wide LLM completion cache, creating it on first use.
+
+    Settings: LLM_CACHE_PATH, LLM_CACHE_MAX_MB and LLM_CACHE_TTL (seconds, default 7 days).
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    path=os.getenv("LLM_CACHE_PATH") or os.path.join(default_cache_dir(), "llm_cache.sqlite"),
+                    ttls={},
+                    default_ttl=int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600)),
+                    max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", 128)) * 1024 * 1024),
+                    label="LLM cache",
+                )
+    return _cache
+
+
+def cached_presets() -> set:
+    return {name.strip().lower() for name in os.getenv("LLM_CACHE_PRESETS", "deterministic").split(",") if name.strip()}
+
+
+class CachedLLM(BudgetedLLM):
+    """
+    BudgetedLLM that serves repeated completions from the LLM cache.
+
+    Calls with tools or available_functions are never cached, because their result depends on
+    function calls made during the call rather than on the prompt alone.
+    """
+
+    def __init__(self, preset: str = "llm", **kwargs):
+        super().__init__(preset=preset, **kwargs)
+        self.cache_preset = preset
+
+    def cache_key(self, messages: Any) -> str:
+        settings = {name: getattr(self, name, None) for name in KEY_ATTRIBUTES}
+        payload = json.dumps([settings, messages], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def complete(self, messages, *args, **kwargs):
+        if kwargs.get("tools") or kwargs.get("available_functions") or any(args):
+            return super().complete(messages, *args, **kwargs)
+        cache = get_llm_cache()
+        key = self.cache_key(messages)
+        hit, answer = cache.get(self.cache_preset, key)
+        if hit:
+            return answer, True
+        answer, _ = super().complete(messages, *args, **kwargs)
+        if isinstance(answer, str) and answer.strip():
+            cache.set(self.cache_preset, key, None, answer)
+        return answer, False
+
+
+def make_llm(preset: str, config: Dict[str, Any]) -> LLM:
+    """
+    Build a preset LLM: a CachedLLM when the preset is listed in LLM_CACHE_PRESETS, a BudgetedLLM otherwise.
+    Tokens are counted and priced as AZURE_CHAT_DEPLOYMENT_MODEL (e.g. gpt-4o).
+    """
+    price_model = os.getenv("AZURE_CHAT_DEPLOYMENT_MODEL") or None
+    if preset.lower() in cached_presets():
+        return CachedLLM(preset=preset, price_model=price_model, **config)
+    return BudgetedLLM(preset=preset, price_model=price_model, **config)
+
+
+def print_llm_cache_stats() -> None:
+    """Print LLM cache hit/miss statistics if the cache was used in this process."""
+    if _cache is not None:
+        _cache.print_stats()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+"""
+memory_compaction.py: Offline compaction of the nlp_memory Chroma collections used by AzureOpenAIChromaTool.
+Records stored under the old per-process hash() IDs are re-keyed to the stable memory_id(), near-duplicate
+memories of a user (cosine similarity of the stored embeddings) are merged into the newest one, and memories
+older than the age limit or beyond the per-user cap are evicted. The survivors are written into fresh
+per-user collections with their existing embeddings (nothing is re-embedded), which rebuilds the vector
+indexes and moves memories of the old shared collection to their users.
+Run it from thecode/crewAI while no crew is running:
+    python -m config.memory_compaction --dry-run
+    python -m config.memory_compaction --max-age-days 90 --max-per-user 300
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import argparse
+import os
+import time
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from dotenv import load_dotenv
+
+from .chroma_memory import DEFAULT_COLLECTION, DEFAULT_MEMORY_PATH, ChromaMemoryStore, memory_id
+
+
+DAY = 24 * 60 * 60
+
+
+def log(message: str) -> None:
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+
+def load_records(collection, batch_size: int = 1000) -> List[Dict[str, Any]]:
+    """Read every record with its document, metadata and stored embedding, page by page."""
+    records, offset = [], 0
+    while True:
+        page = collection.get(include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset)
+        ids = page["ids"]
+        if not ids:
+            return records
+        for i, record_id in enumerate(ids):
+            records.append({
+                "id": record_id,
+                "document": page["documents"][i],
+                "metadata": dict(page["metadatas"][i] or {}),
+                "embedding": page["embeddings"][i],
+            })
+        offset += len(ids)
+
+
+def compact_user(records: List[Dict[str, Any]],
+                 now: float,
+                 similarity: float,
+                 max_age_days: float,
+                 max_per_user: int) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Compact the memories of one user.
+
+    Returns the records to keep (newest first, with stable IDs) and the number of records that were
+    merged as exact duplicates, merged as near duplicates, evicted by age and evicted by the cap.
+    """
+    stats = {"exact": 0, "near": 0, "aged": 0, "capped": 0}
+    for record in records:
+        # Records written before the "created" field existed start ageing now
+        record["metadata"].setdefault("created", now)
+    records = sorted(records, key=lambda record: record["metadata"]["created"], reverse=True)
+
+    if max_age_days > 0:
+        cutoff = now - max_age_days * DAY
+        fresh = [record for record in records if record["metadata"]["created"] >= cutoff]
+        stats["aged"] = len(records) - len(fresh)
+        records = fresh
+
+    # Same prompt: the newest answer wins
+    by_id: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        metadata = record["metadata"]
+        stable_id = memory_id(metadata.get("user_id", ""), metadata["prompt"]) if metadata.get("prompt") else record["id"]
+        if stable_id in by_id:
+            by_id[stable_id]["metadata"]["merged"] = by_id[stable_id]["metadata"].get("merged", 0) + 1 + metadata.get("merged", 0)
+            stats["exact"] += 1
+            continue
+        record["id"] = stable_id
+        by_id[stable_id] = record
+
+    # Different wording, same meaning: fold into the newest similar memory
+    kept: List[Dict[str, Any]] = []
+    vectors: List[np.ndarray] = []
+    owners: List[Dict[str, Any]] = []
+    for record in by_id.values():
+        vector = None
+        if record["embedding"] is not None and similarity < 1:
+            vector = np.asarray(record["embedding"], dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            vector = vector / norm if norm else None
+        if vector is not None and vectors:
+            scores = np.stack(vectors) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= similarity:
+                target = owners[best]["metadata"]
+                target["merged"] = target.get("merged", 0) + 1 + record["metadata"].get("merged", 0)
+                stats["near"] += 1
+                continue
+        kept.append(record)
+        if vector is not None:
+            vectors.append(vector)
+            owners.append(record)
+
+    if max_per_user > 0 and len(kept) > max_per_user:
+        stats["capped"] = len(kept) - max_per_user
+        kept = kept[:max_per_user]
+    return kept, stats
+
+
+STAGING_SUFFIX = "_compacting"
+
+
+def _collection_exists(client, name: str) -> bool:
+    try:
+        client.get_collection(name=name)
+        return True
+    except Exception:
+        return False
+
+
+def _collection_names(client) -> List[str]:
+    # list_collections() returns names in chromadb >= 0.6 and Collection objects before
+    return [getattr(collection, "name", collection) for collection in client.list_collections()]
+
+
+def recover_interrupted(client, name: str) -> None:
+    """Clean up after a compaction that was stopped: finish the swap, or drop an incomplete staging copy."""
+    staging = f"{name}{STAGING_SUFFIX}"
+    if not _collection_exists(client, staging):
+        return
+    if _collection_exists(client, name):
+        client.delete_collection(name=staging)
+    else:
+        log(f"Finishing an interrupted compaction of '{name}'.")
+        client.get_collection(name=staging).modify(name=name)
+
+
+def memory_collections(store: ChromaMemoryStore) -> List[str]:
+    """The shared memory collection and every per-user collection, after recovering interrupted runs."""
+    for name in _collection_names(store.client):
+        if name.endswith(STAGING_SUFFIX) and store.is_memory_collection(name[:-len(STAGING_SUFFIX)]):
+            recover_interrupted(store.client, name[:-len(STAGING_SUFFIX)])
+    return sorted(name for name in _collection_names(store.client)
+                  if store.is_memory_collection(name) and not name.endswith(STAGING_SUFFIX))
+
+
+def rebuild_collection(store: ChromaMemoryStore, name: str, records: List[Dict[str, Any]], batch_size: int = 500) -> None:
+    """
+    Replace (or create) the collection with one holding only the given records.
+
+    The records go into a staging collection first and the original is dropped only after the
+    staging copy is complete, so a stopped run never loses the memories.
+    """
+    client = store.client
+    old_metadata = client.get_collection(name=name).metadata if _collection_exists(client, name) else None
+    new = client.create_collection(name=f"{name}{STAGING_SUFFIX}", embedding_function=store.embedding_function, metadata=old_metadata)
+    for offset in range(0, len(records), batch_size):
+        batch = records[offset:offset + batch_size]
+        new.add(
+            ids=[record["id"] for record in batch],
+            embeddings=[record["embedding"] for record in batch],
+            documents=[record["document"] for record in batch],
+            metadatas=[record["metadata"] for record in batch],
+        )
+    if _collection_exists(client, name):
+        client.delete_collection(name=name)
+    new.modify(name=name)
+
+
+def compact(store: ChromaMemoryStore,
+            similarity: float,
+            max_age_days: float,
+            max_per_user: int,
+            dry_run: bool = False) -> None:
+    """
+    Compact every memory collection of the store.
+
+    Each user's memories are gathered from all collections (the shared one included, so memories
+    written before per-user collections existed are moved) and written to the collection that
+    store.user_collection_name() assigns to the user. Collections left without users are dropped.
+    """
+    start_time = time.time()
+    sources = memory_collections(store)
+    by_user: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    loaded = 0
+    for name in sources:
+        records = load_records(store.client.get_collection(name=name, embedding_function=store.embedding_function))
+        loaded += len(records)
+        for record in records:
+            by_user[str(record["metadata"].get("user_id", ""))].append(record)
+    log(f"Loaded {loaded} memories from {len(sources)} collection(s) ({store.path})")
+
+    now = time.time()
+    targets: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    totals: Dict[str, int] = defaultdict(int)
+    for user_id, user_records in sorted(by_user.items()):
+        kept, stats = compact_user(user_records, now, similarity, max_age_days, max_per_user)
+        targets[store.user_collection_name(user_id)].extend(kept)
+        for key, value in stats.items():
+            totals[key] += value
+        print(f"    {user_id or '(no user)':<30} {len(user_records):>6} -> {len(kept):<6} "
+              f"exact: {stats['exact']:<5} near: {stats['near']:<5} aged: {stats['aged']:<5} capped: {stats['capped']}")
+
+    survivors = sum(len(records) for records in targets.values())
+    log(f"{loaded} -> {survivors} memories (exact duplicates: {totals['exact']}, near duplicates: {totals['near']}, "
+        f"aged out: {totals['aged']}, over the per-user cap: {totals['capped']})")
+    dropped = [name for name in sources if name not in targets]
+    if dry_run:
+        log(f"Dry run, nothing was changed. {len(targets)} collection(s) would be rebuilt and {len(dropped)} dropped.")
+        return
+    # Write every target before dropping anything, so a stopped run can simply be repeated
+    for name, records in targets.items():
+        rebuild_collection(store, name, records)
+    for name in dropped:
+        store.client.delete_collection(name=name)
+    log(f"Rebuilt {len(targets)} collection(s) and dropped {len(dropped)} in {time.time() - start_time:.1f}s")
+
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Compact the Chroma memory collections of the Azure OpenAI Chroma tool.")
+    parser.add_argument("--path", type=str, default=os.getenv("CHROMA_MEMORY_PATH") or DEFAULT_MEMORY_PATH, help="Chroma database directory")
+    parser.add_argument("--collection", type=str, default=os.getenv("CHROMA_MEMORY_COLLECTION") or DEFAULT_COLLECTION, help="Memory collection name (per-user collections are named <collection>__<user>)")
+    parser.add_argument("--similarity", type=float, default=float(os.getenv("MEMORY_COMPACT_SIMILARITY", 0.95)), help="Cosine similarity at which two memories of a user are merged (1 disables)")
+    parser.add_argument("--max-age-days", type=float, default=float(os.getenv("MEMORY_MAX_AGE_DAYS", 180)), help="Evict memories older than this (0 keeps all)")
+    parser.add_argument("--max-per-user", type=int, default=int(os.getenv("MEMORY_MAX_PER_USER", 500)), help="Keep at most this many newest memories per user (0 keeps all)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without rewriting the collection")
+    args = parser.parse_args()
+
+    # Compaction is what migrates the shared collection, so it targets per-user collections unless filter is configured
+    store = ChromaMemoryStore(path=args.path, collection_name=args.collection, user_scope=os.getenv("MEMORY_USER_SCOPE") or "collection")
+    try:
+        compact(store, args.similarity, args.max_age_days, args.max_per_user, args.dry_run)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+memory_context.py: Selects which retrieved memories go into the prompt of AzureOpenAIChromaTool.
+Memories farther from the prompt than a distance threshold are dropped, the rest are ordered by
+maximal marginal relevance (relevant to the prompt, but not a repeat of what was already picked),
+near-copies of a picked memory are skipped, and the selection stops at a hard token budget. The
+prompt sent to the model therefore stays bounded whatever max_memory_records is.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import math
+import os
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+from .output_formatter import estimate_tokens, truncate
+
+
+_MIN_PARTIAL_TOKENS = 50  # a memory cut shorter than this is left out rather than sent as a fragment
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(float(x) * float(y) for x, y in zip(a, b))
+    norm = math.sqrt(sum(float(x) * float(x) for x in a)) * math.sqrt(sum(float(y) * float(y) for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _first(result: dict, key: str) -> List[Any]:
+    # Chroma returns one list per query text; the tool always sends one
+    values = result.get(key)
+    if values is None or len(values) == 0 or values[0] is None:
+        return []
+    return list(values[0])
+
+
+def select_memories(result: dict,
+                    token_budget: Optional[int] = None,
+                    max_distance: Optional[float] = None,
+                    redundancy: Optional[float] = None,
+                    mmr_lambda: Optional[float] = None) -> Tuple[List[str], dict]:
+    """
+    Choose memory documents from a Chroma query result.
+
+    Args:
+        result (dict): collection.query() result with documents and distances (and embeddings for
+            the redundancy checks).
+        token_budget (int): Most tokens the chosen documents may use; MEMORY_CONTEXT_TOKEN_BUDGET by default.
+        max_distance (float): Drop memories farther than this; MEMORY_MAX_DISTANCE by default, 0 disables.
+        redundancy (float): Skip a memory whose cosine similarity to a chosen one reaches this;
+            MEMORY_REDUNDANCY_SIMILARITY by default.
+        mmr_lambda (float): Weight of relevance against novelty; MEMORY_MMR_LAMBDA by default.
+
+    Returns:
+        The chosen documents in selection order, and counts of what was dropped and why.
+    """
+    token_budget = int(token_budget or os.getenv("MEMORY_CONTEXT_TOKEN_BUDGET", 1500))
+    max_distance = float(os.getenv("MEMORY_MAX_DISTANCE", 0.5) if max_distance is None else max_distance)
+    redundancy = float(os.getenv("MEMORY_REDUNDANCY_SIMILARITY", 0.92) if redundancy is None else redundancy)
+    mmr_lambda = float(os.getenv("MEMORY_MMR_LAMBDA", 0.7) if mmr_lambda is None else mmr_lambda)
+
+    documents = _first(result, "documents")
+    distances = _first(result, "distances") or [0.0] * len(documents)
+    embeddings = _first(result, "embeddings") or [None] * len(documents)
+    stats = {"retrieved": len(documents), "distant": 0, "redundant": 0, "over_budget": 0, "tokens": 0}
+
+    candidates = []
+    for document, distance, embedding in zip(documents, distances, embeddings):
+        if not document:
+            continue
+        if max_distance > 0 and distance > max_distance:
+            stats["distant"] += 1
+            continue
+        # 1 - d/2 maps both cosine distance and squared L2 of normalized vectors to [0, 1]
+        candidates.append({"document": document, "relevance": 1 - float(distance) / 2, "embedding": embedding})
+
+    chosen: List[dict] = []
+    while candidates:
+        best, best_score = 0, None
+        for index, candidate in enumerate(candidates):
+            similarity = max((_cosine(candidate["embedding"], picked["embedding"]) for picked in chosen
+                              if candidate["embedding"] is not None and picked["embedding"] is not None), default=0.0)
+            candidate["similarity"] = similarity
+            score = mmr_lambda * candidate["relevance"] - (1 - mmr_lambda) * similarity
+            if best_score is None or score > best_score:
+                best, best_score = index, score
+        best = candidates.pop(best)
+        if best["similarity"] >= redundancy:
+            stats["redundant"] += 1
+            continue
+        chosen.append(best)
+
+    selected: List[str] = []
+    remaining = token_budget
+    for candidate in chosen:
+        tokens = estimate_tokens(candidate["document"])
+        if tokens <= remaining:
+            selected.append(candidate["document"])
+            remaining -= tokens
+            continue
+        stats["over_budget"] = len(chosen) - len(selected)
+        if remaining >= _MIN_PARTIAL_TOKENS:
+            selected.append(truncate(candidate["document"], remaining * 4))
+        break
+    stats["tokens"] = sum(estimate_tokens(document) for document in selected)
+    return selected, stats
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+"""
+metrics.py: Latency, error and payload metrics of the crew runs in the Prometheus text format.
+Every tool built by the LazyToolRegistry is instrumented around its _run/_arun (duration, errors,
+output size), tasks are timed through the crews' task_callback and agent steps counted through the
+step_callback, and provider requests are timed by the resilience layer. At the end of a run the
+PROD scripts write everything, together with the response cache hits and misses and the retry and
+circuit breaker counters, to a textfile (METRICS_TEXTFILE, or metrics.prom in the output folder)
+that the node_exporter textfile collector can pick up. METRICS_PORT serves the same text on
+http://localhost:<port>/metrics while the script runs.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import contextvars
+import functools
+import os
+import threading
+import time
+
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# A metric family produced at export time: (name, type, help, [(labels, value), ...])
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Sequence[Any] = (), amount: float = 1) -> None:
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+
+class Histogram:
+    """Cumulative histogram with labels, rendered as _bucket, _sum and _count series."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], List[float]] = {}  # bucket counts, then sum and count
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Sequence[Any], value: float) -> None:
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            series = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(series)) for key, series in self._values.items())
+        lines = []
+        for key, series in values:
+            bounds = [_number(bound) for bound in self.buckets] + ["+Inf"]
+            counts = series[:len(self.buckets)] + [series[-1]]
+            for bound, count in zip(bounds, counts):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_number(count)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {_number(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics of this process plus collectors that report other modules' counters at export time."""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], List[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[MetricFamily]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """The Prometheus text exposition of every metric with at least one sample."""
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        out = []
+        for metric in metrics:
+            lines = metric.lines()
+            if lines:
+                out += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.type}", *lines]
+        for collector in collectors:
+            for name, kind, help, samples in collector():
+                if samples:
+                    out += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                    out += [f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}" for labels, value in samples]
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TOOL_DURATION = REGISTRY.add(Histogram("crewai_tool_duration_seconds", "Duration of tool calls.", ("tool", "status")))
+TOOL_ERRORS = REGISTRY.add(Counter("crewai_tool_errors_total", "Tool calls that raised an exception.", ("tool", "error")))
+TOOL_OUTPUT_BYTES = REGISTRY.add(Histogram("crewai_tool_output_bytes", "Size of tool results handed to the agents.", ("tool",), SIZE_BUCKETS))
+TASK_DURATION = REGISTRY.add(Histogram("crewai_task_duration_seconds", "Duration of crew tasks.", ("task", "agent")))
+TASK_OUTPUT_BYTES = REGISTRY.add(Histogram("crewai_task_output_bytes", "Size of task outputs.", ("task",), SIZE_BUCKETS))
+AGENT_STEPS = REGISTRY.add(Counter("crewai_agent_steps_total", "Agent reasoning steps, by the tool the step used.", ("tool",)))
+PROVIDER_DURATION = REGISTRY.add(Histogram("crewai_provider_request_duration_seconds", "Duration of search provider requests that missed the response cache.", ("provider",)))
+
+
+# Tools whose call is being timed in this context; a _run that delegates to its own _arun is timed once
+_timed_tools: contextvars.ContextVar = contextvars.ContextVar("timed_tools", default=frozenset())
+
+
+def _timed(name: str, run: Callable) -> Callable:
+    @functools.wraps(run)
+    def timed_run(*args, **kwargs):
+        if name in _timed_tools.get():
+            return run(*args, **kwargs)
+        token = _timed_tools.set(_timed_tools.get() | {name})
+        start = time.perf_counter()
+        try:
+            result = run(*args, **kwargs)
+        except Exception as e:
+            _observe_tool(name, start, error=e)
+            raise
+        finally:
+            _timed_tools.reset(token)
+        _observe_tool(name, start, result=result)
+        return result
+    timed_run._instrumented = True
+    return timed_run
+
+
+def _atimed(name: str, arun: Callable) -> Callable:
+    @functools.wraps(arun)
+    async def timed_arun(*args, **kwargs):
+        if name in _timed_tools.get():
+            return await arun(*args, **kwargs)
+        token = _timed_tools.set(_timed_tools.get() | {name})
+        start = time.perf_counter()
+        try:
+            result = await arun(*args, **kwargs)
+        except Exception as e:
+            _observe_tool(name, start, error=e)
+            raise
+        finally:
+            _timed_tools.reset(token)
+        _observe_tool(name, start, result=result)
+        return result
+    timed_arun._instrumented = True
+    return timed_arun
+
+
+def instrument_tool(name: str, tool: Any) -> Any:
+    """Record duration, errors and output size of the tool's _run and _arun calls under the label `name`."""
+    for method, wrap in (("_run", _timed), ("_arun", _atimed)):
+        original = getattr(tool, method, None)
+        if original is None or getattr(original, "_instrumented", False):
+            continue
+        # Tools are pydantic models; set the wrapper on the instance without validation
+        object.__setattr__(tool, method, wrap(name, original))
+    return tool
+
+
+def _observe_tool(name: str, start: float, result: Any = None, error: Optional[BaseException] = None) -> None:
+    TOOL_DURATION.observe((name, "error" if error is not None else "ok"), time.perf_counter() - start)
+    if error is not None:
+        TOOL_ERRORS.inc((name, type(error).__name__))
+    else:
+        TOOL_OUTPUT_BYTES.observe((name,), len(str(result).encode("utf-8")))
+
+
+_task_clock = threading.local()
+
+
+def start_task_timer() -> None:
+    """Start timing the first task of a crew run; call it in the thread that calls crew.kickoff()."""
+    _task_clock.last = time.perf_counter()
+
+
+def observe_task(output: Any) -> None:
+    """Record a finished task (a TaskOutput passed to task_callback); it is timed from the previous task's end."""
+    now = time.perf_counter()
+    started = getattr(_task_clock, "last", None)
+    _task_clock.last = now
+    if started is not None:
+        TASK_DURATION.observe((output.name or output.description[:60], output.agent or ""), now - started)
+    TASK_OUTPUT_BYTES.observe((output.name or output.description[:60],), len((output.raw or "").encode("utf-8")))
+
+
+def observe_step(step: Any) -> None:
+    AGENT_STEPS.inc((getattr(step, "tool", None) or "none",))
+
+
+def observe_provider(provider: str, seconds: float) -> None:
+    PROVIDER_DURATION.observe((provider,), seconds)
+
+
+def write_metrics(output_folder: str) -> Optional[str]:
+    """Write the metrics to METRICS_TEXTFILE, or metrics.prom in output_folder; return the path."""
+    path = os.getenv("METRICS_TEXTFILE") or os.path.join(output_folder, "metrics.prom")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # The textfile collector may read at any time; never let it see a half-written file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(temp_path, path)
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Metrics written to {path}")
+    return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return  # no access log on the console
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: Optional[int] = None) -> None:
+    """Serve /metrics on localhost:METRICS_PORT in a background thread; nothing happens when the port is 0 or unset."""
+    global _server
+    port = int(port if port is not None else os.getenv("METRICS_PORT") or 0)
+    if not port or _server is not None:
+        return
+    try:
+        _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+    except OSError as e:
+        # e.g. the port is taken by another run; the metrics are still written at the end of the run
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Metrics server not started on port {port}: {e}")
+        return
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Metrics served on http://127.0.0.1:{port}/metrics")
@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+"""
+news_articles.py: Unified news article record and cross-provider deduplication for the CrewAI news tools.
+Every news provider (Bing News, NewsAPI, Newsdata, Mediastack, Tavily, EXA) answers in its own shape.
+The normalizers below turn each answer into compact Article records. Each URL is canonicalized
+(tracking parameters, AMP pages and mobile hosts removed) for the exact-duplicate key only; records
+keep the link the provider returned, since the canonical form may not resolve. Near-duplicate stories are dropped by
+comparing the SimHash of their title and snippet, so the same story is sent to an agent only once.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import hashlib
+import os
+import re
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+
+# Query parameters that only track the click and never change the page content
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "ocid", "cmpid",
+    "ref", "ref_src", "ref_url", "smid", "smtyp", "taid", "guccounter", "guce_referrer",
+    "guce_referrer_sig", "_ga", "_gl", "ito", "ns_mchannel", "ns_source", "ns_campaign", "ns_linkname",
+    "soc_src", "soc_trk", "outputtype", "amp",
+}
+TRACKING_PREFIXES = ("utm_", "at_", "pk_", "mtm_", "hsa_")
+MOBILE_HOST_PREFIXES = ("m.", "mobile.", "amp.", "www.")
+
+# Hosts that wrap another site's AMP page: https://www.google.com/amp/s/example.com/story
+_AMP_CACHE = re.compile(r"^/(?:amp/s/|c/s/|v/s/)(?P<target>.+)$")
+_AMP_PATH = re.compile(r"(?:/amp/?|\.amp(?:\.html)?)$", re.IGNORECASE)
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+
+def canonicalize_url(url: Optional[str]) -> str:
+    """
+    Return a canonical form of a news URL, used as the exact-duplicate key.
+
+    Lower-cases the scheme and host, unwraps Google/AMP-cache links, drops mobile/AMP host prefixes,
+    AMP path suffixes, tracking query parameters, fragments, default ports and trailing slashes,
+    and sorts the remaining query parameters.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    path = parts.path or "/"
+
+    amp_cache = _AMP_CACHE.match(path)
+    if amp_cache and (host.endswith("ampproject.org") or host in ("www.google.com", "google.com")):
+        return canonicalize_url("https://" + unquote(amp_cache.group("target")))
+
+    for prefix in MOBILE_HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = _AMP_PATH.sub("", path).rstrip("/") or "/"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=False)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    """
+    64-bit SimHash of a text over word unigrams and bigrams.
+
+    blake2b is used instead of hash() so that fingerprints are stable between processes.
+    """
+    words = _WORDS.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return 0
+    weights = [0] * bits
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=bits // 8).digest(), "big")
+        for i in range(bits):
+            weights[i] += 1 if h >> i & 1 else -1
+    return sum(1 << i for i, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def parse_published(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a provider's publication date into an aware UTC datetime, or None when it cannot be read.
+
+    Handles ISO 8601 (Bing, NewsAPI, Mediastack, Tavily, EXA), Newsdata's '2024-05-01 12:34:56' and
+    RFC 2822 dates; dates without a time zone are taken as UTC.
+    """
+    if not value:
+        return None
+    text = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(text)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+class Article:
+    """Compact, provider-independent news article record."""
+
+    __slots__ = ("title", "url", "canonical_url", "source", "published", "snippet", "providers", "fingerprint")
+
+    def __init__(self,
+                 title: Optional[str],
+                 url: Optional[str],
+                 source: Optional[str] = None,
+                 published: Optional[str] = None,
+                 snippet: Optional[str] = None,
+                 provider: Optional[str] = None):
+        self.title = (title or "").strip()
+        self.url = (url or "").strip()
+        self.canonical_url = canonicalize_url(self.url)
+        self.source = (source or "").strip()
+        self.published = (published or "").strip()
+        self.snippet = " ".join((snippet or "").split())
+        self.providers = [provider] if provider else []
+        self.fingerprint = simhash(f"{self.title} {self.snippet}")
+
+    def merge(self, other: "Article") -> None:
+        """Fold a duplicate into this record, keeping the richest fields and every provider name."""
+        if len(other.snippet) > len(self.snippet):
+            self.snippet = other.snippet
+        self.title = self.title or other.title
+        self.source = self.source or other.source
+        self.published = self.published or other.published
+        self.providers.extend(p for p in other.providers if p not in self.providers)
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {
+            "title": self.title,
+            "url": self.url,
+            "source": self.source,
+            "published": self.published,
+            "snippet": self.snippet,
+            "providers": self.providers,
+        }
+        return {key: value for key, value in record.items() if value}
+
+    def __repr__(self) -> str:
+        return f"Article({self.title!r}, {self.url!r}, providers={self.providers})"
+
+
+def deduplicate(articles: Iterable[Article], max_distance: Optional[int] = None) -> Tuple[List[Article], int]:
+    """
+    Drop exact (same canonical URL) and near (SimHash distance <= max_distance) duplicates.
+
+    The first record of a story is kept and the duplicates are merged into it. Near-duplicate
+    candidates are found by splitting the 64-bit fingerprint into max_distance + 1 bands: two
+    fingerprints within the distance must share at least one band exactly, so not every pair is compared.
+
+    Returns:
+        tuple: (unique articles in input order, number of duplicates removed)
+    """
+    if max_distance is None:
+        max_distance = int(os.getenv("NEWS_DEDUP_MAX_DISTANCE", 3))
+    bands = max(max_distance, 0) + 1
+    band_bits = 64 // bands
+    band_mask = (1 << band_bits) - 1
+
+    unique: List[Article] = []
+    by_url: Dict[str, Article] = {}
+    by_band: Dict[Tuple[int, int], List[Article]] = {}
+    removed = 0
+    for article in articles:
+        kept = by_url.get(article.canonical_url) if article.canonical_url else None
+        if kept is None and article.fingerprint and max_distance >= 0:
+            for band in range(bands):
+                key = (band, article.fingerprint >> (band * band_bits) & band_mask)
+                kept = next((candidate for candidate in by_band.get(key, ())
+                             if hamming_distance(candidate.fingerprint, article.fingerprint) <= max_distance), None)
+                if kept is not None:
+                    break
+        if kept is not None:
+            kept.merge(article)
+            removed += 1
+            continue
+        unique.append(article)
+        if article.canonical_url:
+            by_url[article.canonical_url] = article
+        if article.fingerprint:
+            for band in range(bands):
+                by_band.setdefault((band, article.fingerprint >> (band * band_bits) & band_mask), []).append(article)
+    return unique, removed
+
+
+#region Provider normalizers
+
+def _field(item: Any, name: str, default: Any = None) -> Any:
+    # provider SDKs return either dicts or result objects
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
+
+
+def from_bing_news(answer: Dict[str, Any], provider: str = "bingnews") -> List[Article]:
+    return [
+        Article(
+            title=item.get("name"),
+            url=item.get("url"),
+            source=", ".join(p.get("name", "") for p in item.get("provider", []) if p.get("name")),
+            published=item.get("datePublished"),
+            snippet=item.get("description"),
+            provider=provider,
+        )
+        for item in answer.get("value", [])
+    ]
+
+
+def from_newsapi(answer: Dict[str, Any], provider: str = "newsapi") -> List[Article]:
+    return [
+        Article(
+            title=item.get("title"),
+            url=item.get("url"),
+            source=(item.get("source") or {}).get("name"),
+            published=item.get("publishedAt"),
+            snippet=item.get("description") or item.get("content"),
+            provider=provider,
+        )
+        for item in answer.get("articles", [])
+    ]
+
+
+def from_newsdata(answer: Dict[str, Any], provider: str = "newsdata") -> List[Article]:
+    return [
+        Article(
+            title=item.get("title"),
+            url=item.get("link"),
+            source=item.get("source_name") or item.get("source_id"),
+            published=item.get("pubDate"),
+            snippet=item.get("description"),
+            provider=provider,
+        )
+        for item in answer.get("results") or []
+    ]
+
+
+def from_mediastack(answer: Dict[str, Any], provider: str = "mediastack") -> List[Article]:
+    return [
+        Article(
+            title=item.get("title"),
+            url=item.get("url"),
+            source=item.get("source"),
+            published=item.get("published_at"),
+            snippet=item.get("description"),
+            provider=provider,
+        )
+        for item in answer.get("data") or []
+    ]
+
+
+def from_tavily(answer: Dict[str, Any], provider: str = "tavily") -> List[Article]:
+    return [
+        Article(
+            title=item.get("title"),
+            url=item.get("url"),
+            source=urlsplit(item.get("url") or "").hostname,
+            published=item.get("published_date"),
+            snippet=item.get("content"),
+            provider=provider,
+        )
+        for item in answer.get("results", [])
+    ]
+
+
+def from_exa(answer: Any, provider: str = "exa") -> List[Article]:
+    results = _field(answer, "results", answer)
+    return [
+        Article(
+            title=_field(item, "title"),
+            url=_field(item, "url"),
+            source=_field(item, "author") or urlsplit(_field(item, "url") or "").hostname,
+            published=_field(item, "published_date") or _field(item, "publishedDate"),
+            snippet=_field(item, "text") or _field(item, "summary"),
+            provider=provider,
+        )
+        for item in results
+    ]
+
+
+# Fan-out provider name -> normalizer of that provider's raw answer
+NORMALIZERS: Dict[str, Callable[..., List[Article]]] = {
+    "bingnews": from_bing_news,
+    "media_stack": from_mediastack,
+    "newsapi_everything": from_newsapi,
+    "newsapi_top": from_newsapi,
+    "newsdata": from_newsdata,
+    "tavily_news": from_tavily,
+    "exa": from_exa,
+}
+
+
+def normalize(provider: str, answer: Any) -> Optional[List[Article]]:
+    """
+    Turn one provider answer into Article records.
+
+    Returns None when the provider has no normalizer or the answer is not in the expected shape
+    (e.g. an error dict or formatted text), so the caller can keep the raw answer instead.
+    """
+    normalizer = NORMALIZERS.get(provider)
+    if normalizer is None or isinstance(answer, str) or _field(answer, "error") is not None:
+        return None
+    try:
+        return [article for article in normalizer(answer, provider=provider) if article.url or article.title]
+    except (AttributeError, TypeError):
+        return None
+
+#endregion
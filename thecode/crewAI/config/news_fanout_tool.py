@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""
+news_fanout_tool.py: Concurrent multi-provider news search for the CrewAI News Analyzer.
+Sends every query to the news providers (Bing News, NewsAPI, Newsdata, EXA, Tavily News; Mediastack only when
+listed in NEWS_FANOUT_PROVIDERS, its free quota is 100 requests a month) at the same time, gives each provider
+its own deadline, and returns one merged, deduplicated article list.
+One agent call replaces six sequential search tasks, each with its own LLM agent loop.
+This tool is for the CrewAI framework.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import asyncio
+import os
+import time
+
+from crewai_tools import BaseTool
+from pydantic import BaseModel, Field
+from typing import Any, Annotated, Callable, Dict, List, Optional, Type
+
+from .http_client import run_sync
+from .news_articles import deduplicate, normalize, parse_published
+from .output_formatter import format_records, truncate
+from .response_cache import fresh_responses
+
+
+async def _newsdata_pages(tool: Any, query: str, n: int, since=None, max_pages: int = 1) -> Any:
+    """
+    Newsdata answers newest first, one page per call. With `since` (a datetime), follow the nextPage
+    cursor while a whole page is newer than it, up to max_pages pages, and merge the results.
+    """
+    answer = await tool._arun_json(query, size=n)
+    if not isinstance(answer, dict) or not isinstance(answer.get("results"), list):
+        return answer
+    results = list(answer["results"])
+    for _ in range(max_pages - 1):
+        published = [parse_published(item.get("pubDate")) for item in answer.get("results") or []]
+        if since is None or not answer.get("nextPage") or not published or any(p is None or p <= since for p in published):
+            break
+        answer = await tool._arun_json(query, size=n, page=answer["nextPage"])
+        if not isinstance(answer, dict):
+            break
+        results.extend(answer.get("results") or [])
+    return dict(answer, results=results)
+
+
+# How each provider tool is called for one query (raw answers, normalized to articles later); `n` is the requested
+# number of results and `params` are extra provider request parameters, e.g. the date filters of the news monitor
+PROVIDER_CALLS: Dict[str, Callable[..., Any]] = {
+    "bingnews": lambda tool, query, n, **params: tool._arun_json(query, count=n, **params),
+    "media_stack": lambda tool, query, n, **params: tool._arun_json(query, limit=n, **params),
+    "newsapi_everything": lambda tool, query, n, **params: tool._arun_json(query, pageSize=n, **params),
+    "newsdata": lambda tool, query, n, **params: _newsdata_pages(tool, query, n, **params),
+    "exa": lambda tool, query, n, **params: asyncio.to_thread(tool._run, search_query=query),  # crewai_tools EXA has no async path
+    "tavily_news": lambda tool, query, n, **params: tool._arun_json(query, max_results=n, **params),
+}
+
+# Providers queried unless NEWS_FANOUT_PROVIDERS says otherwise; mediastack is opt-in
+DEFAULT_PROVIDERS = "bingnews,newsapi_everything,newsdata,exa,tavily_news"
+
+
+def fanout_providers() -> List[str]:
+    """Names of the providers the fan-out queries, from NEWS_FANOUT_PROVIDERS (comma separated)."""
+    names = [name.strip() for name in (os.getenv("NEWS_FANOUT_PROVIDERS") or DEFAULT_PROVIDERS).split(",")]
+    return [name for name in names if name in PROVIDER_CALLS]
+
+
+class NewsFanOutSearchToolSchema(BaseModel):
+    queries: Annotated[
+        List[str],
+        Field(description="The search queries to send to every news provider, e.g. the basic and intermediate queries from the topic analysis.")
+    ]
+    result_count: Annotated[
+        Optional[int],
+        Field(description="The number of results to request per provider and query. Default is 10.", ge=1)
+    ] = 10
+
+
+class NewsFanOutSearchTool(BaseTool):
+    name: str = "News Fan-out Search Tool"
+    description: str = (
+        "Searches the news providers (Bing News, NewsAPI, Newsdata, EXA, Tavily News) concurrently "
+        "with a list of queries and returns one merged list of unique articles. Call it once with all queries."
+    )
+    args_schema: Type[BaseModel] = NewsFanOutSearchToolSchema
+    providers: Dict[str, Any] = Field(default_factory=dict, description="Provider name to tool instance")
+    deadline: float = Field(default_factory=lambda: float(os.getenv("NEWS_FANOUT_DEADLINE", 30)), description="Per-provider deadline in seconds")
+    max_queries: int = Field(default_factory=lambda: int(os.getenv("NEWS_FANOUT_MAX_QUERIES", 3)), description="Maximum number of queries sent to each provider")
+    concurrency: int = Field(default_factory=lambda: int(os.getenv("NEWS_FANOUT_CONCURRENCY", 12)), description="Maximum number of requests in flight")
+    token_budget: int = Field(default_factory=lambda: int(os.getenv("NEWS_FANOUT_TOKEN_BUDGET", 6000)), description="Estimated token limit of the tool output")
+
+    def _run(self, queries: List[str], result_count: int = 10) -> str:
+        return run_sync(self._arun(queries, result_count))
+
+    async def _arun(self, queries: List[str], result_count: int = 10) -> str:
+        merged = await self.fan_out(queries, result_count)
+        return self.format(merged)
+
+    def format(self, merged: Dict[str, Any]) -> str:
+        """Render a fan_out() result as a provider status summary followed by the articles, within token_budget."""
+        statuses = []
+        raw_answers = []
+        for name, entry in merged["providers"].items():
+            if entry["status"] == "timeout":
+                detail = entry.get("error", "")
+            else:
+                detail = "; ".join(
+                    ([f"{entry.get('articles', 0)} articles"] if entry["status"] != "error" else [])
+                    + [truncate(f"{query}: {message}", 200) for query, message in entry.get("errors", {}).items()]
+                )
+            statuses.append(f"{name}: {entry['status']} ({detail}, {entry['elapsed']}s)")
+            for query, answer in entry.get("results", {}).items():
+                raw_answers.append(f"Raw answer from {name} for '{query}': {truncate(answer, 1500)}")
+        header = "\n".join([
+            f"Queries: {'; '.join(merged['queries'])}",
+            "Providers: " + "; ".join(statuses),
+            f"Unique articles: {len(merged['articles'])} ({merged['duplicates_removed']} duplicates removed)",
+            *raw_answers,
+        ])
+        records = [dict(article, providers=", ".join(article.get("providers", []))) for article in merged["articles"]]
+        return format_records(records, ("title", "url", "source", "published", "snippet", "providers"),
+                              token_budget=self.token_budget, header=header,
+                              empty_message="No articles found.")
+
+    async def fan_out(self,
+                      queries: List[str],
+                      result_count: int = 10,
+                      provider_params: Optional[Dict[str, Dict[str, Any]]] = None,
+                      fresh: bool = False) -> Dict[str, Any]:
+        """
+        Query every provider concurrently, normalize the answers to articles and drop duplicates.
+
+        provider_params maps a provider name to extra request parameters for it (see PROVIDER_CALLS).
+        With fresh, the providers are asked even when the response cache holds an answer.
+
+        Returns:
+            dict: {"queries": [...],
+                   "providers": {name: {"status", "elapsed", "articles", "results", "errors" | "error"}},
+                   "articles": [...], "duplicates_removed": int}
+                  where status is "ok", "partial" (some queries failed or missed the deadline), "error" (every
+                  query failed) or "timeout" (no query answered within the deadline).
+                  "errors" maps each failed query to its error message; only "timeout" entries have "error".
+                  Answers of providers without a normalizer are kept raw under "results".
+        """
+        if isinstance(queries, str):
+            queries = [line.strip("-* \t") for line in queries.splitlines()]
+        queries = [q for q in dict.fromkeys(q.strip() for q in queries) if q][: self.max_queries]
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def call(name: str, tool: Any, query: str):
+            async with semaphore:
+                call_provider = PROVIDER_CALLS.get(name)
+                if call_provider is not None:
+                    return await call_provider(tool, query, result_count, **(provider_params or {}).get(name, {}))
+                if hasattr(tool, "_arun"):
+                    return await tool._arun(query)
+                return await asyncio.to_thread(tool._run, query)
+
+        async def provider_task(name: str, tool: Any):
+            start = time.perf_counter()
+            # The deadline applies to the provider as a whole; queries answered by then are kept
+            calls = [asyncio.ensure_future(call(name, tool, query)) for query in queries]
+            done, pending = await asyncio.wait(calls, timeout=self.deadline) if calls else (set(), set())
+            for late in pending:
+                late.cancel()
+            if calls and not done:
+                return name, {"status": "timeout", "elapsed": round(time.perf_counter() - start, 2),
+                              "error": f"No answer within {self.deadline:g}s"}, []
+            answers = [
+                future.exception() or future.result() if future in done
+                else asyncio.TimeoutError(f"No answer within {self.deadline:g}s")
+                for future in calls
+            ]
+            articles, raw, errors = [], {}, {}
+            for query, answer in zip(queries, answers):
+                if isinstance(answer, Exception):
+                    errors[query] = f"{type(answer).__name__}: {answer}"
+                    continue
+                normalized = normalize(name, answer)
+                if normalized is None:
+                    raw[query] = answer
+                else:
+                    articles.extend(normalized)
+            succeeded = len(queries) - len(errors)
+            status = "ok" if not errors else ("partial" if succeeded else "error")
+            entry = {"status": status, "elapsed": round(time.perf_counter() - start, 2), "articles": len(articles)}
+            if raw:
+                entry["results"] = raw
+            if errors:
+                entry["errors"] = errors
+            return name, entry, articles
+
+        if fresh:
+            with fresh_responses():
+                answers = await asyncio.gather(*(provider_task(name, tool) for name, tool in self.providers.items()))
+        else:
+            answers = await asyncio.gather(*(provider_task(name, tool) for name, tool in self.providers.items()))
+        unique, removed = deduplicate(article for _, _, articles in answers for article in articles)
+        return {
+            "queries": queries,
+            "providers": {name: entry for name, entry, _ in answers},
+            "articles": [article.to_dict() for article in unique],
+            "duplicates_removed": removed,
+        }
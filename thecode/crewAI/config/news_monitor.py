@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+"""
+news_monitor.py: Continuous, incremental news monitoring for the News Analyzer (--monitor).
+Every cycle the topic is sent through the news fan-out with per-provider date filters built from stored
+watermarks (Bing News since/sortBy/freshness, NewsAPI from, Mediastack date range, Tavily days, Newsdata
+nextPage paging down to the watermark), so providers return only articles newer than the last cycle.
+Articles that are new and not seen before are collected as pending; the expensive analysis and report
+run (in the monitor's process, one output folder per analysis) starts only when enough of them have arrived. Watermarks, seen URLs and pending articles live in SQLite.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from crewai.tasks.output_format import OutputFormat
+from crewai.tasks.task_output import TaskOutput
+
+from .http_client import run_sync
+from .news_articles import canonicalize_url, parse_published
+from .output_formatter import format_records
+from .response_cache import default_cache_dir
+
+
+DAY = 24 * 60 * 60
+ARTICLE_FIELDS = ("title", "url", "source", "published", "snippet", "providers")
+
+
+def _bing_freshness(age: timedelta) -> str:
+    # Bing News only accepts since for trending topics; sorting by date with the tightest freshness does the rest
+    if age <= timedelta(days=1):
+        return "Day"
+    return "Week" if age <= timedelta(days=7) else "Month"
+
+
+# Provider request parameters that ask only for articles published after `since` (aware UTC datetimes)
+SINCE_PARAMS: Dict[str, Callable[[datetime, datetime], Dict[str, Any]]] = {
+    "bingnews": lambda since, now: {"since": int(since.timestamp()), "sortBy": "Date", "freshness": _bing_freshness(now - since)},
+    "newsapi_everything": lambda since, now: {"from": since.strftime("%Y-%m-%dT%H:%M:%S"), "sortBy": "publishedAt"},
+    "media_stack": lambda since, now: {"date": f"{since:%Y-%m-%d},{now:%Y-%m-%d}"},
+    "newsdata": lambda since, now: {"since": since, "max_pages": int(os.getenv("NEWS_MONITOR_MAX_PAGES", 3))},
+    "tavily_news": lambda since, now: {"days": max(1, math.ceil((now - since).total_seconds() / DAY))},
+}
+
+
+def log(message: str) -> None:
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+
+def topic_key(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+def article_key(article: Dict[str, Any]) -> str:
+    """Seen/pending key of an article record: its canonical URL, or its title when it has no URL."""
+    return canonicalize_url(article.get("url")) or article.get("title") or ""
+
+
+class WatermarkStore:
+    """
+    SQLite store of per-topic, per-provider watermarks, seen article URLs and pending articles.
+
+    Args:
+        path (str): Location of the SQLite database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            " topic TEXT NOT NULL, provider TEXT NOT NULL, published TEXT NOT NULL, checked REAL NOT NULL,"
+            " PRIMARY KEY (topic, provider));"
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " topic TEXT NOT NULL, url TEXT NOT NULL, first_seen REAL NOT NULL, PRIMARY KEY (topic, url));"
+            "CREATE TABLE IF NOT EXISTS pending ("
+            " topic TEXT NOT NULL, url TEXT NOT NULL, article TEXT NOT NULL, added REAL NOT NULL, PRIMARY KEY (topic, url));"
+        )
+        self._db.commit()
+
+    def watermarks(self, topic: str) -> Dict[str, datetime]:
+        with self._lock:
+            rows = self._db.execute("SELECT provider, published FROM watermarks WHERE topic = ?", (topic,)).fetchall()
+        return {provider: datetime.fromisoformat(published) for provider, published in rows}
+
+    def advance(self, topic: str, provider: str, published: datetime) -> None:
+        """Move a provider's watermark forward to `published`; it never moves back."""
+        with self._lock:
+            row = self._db.execute("SELECT published FROM watermarks WHERE topic = ? AND provider = ?", (topic, provider)).fetchone()
+            if row is None or datetime.fromisoformat(row[0]) < published:
+                self._db.execute("INSERT OR REPLACE INTO watermarks (topic, provider, published, checked) VALUES (?, ?, ?, ?)",
+                                 (topic, provider, published.isoformat(), time.time()))
+                self._db.commit()
+
+    def add_unseen(self, topic: str, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mark the articles as seen and queue the ones not seen before as pending; return those."""
+        now = time.time()
+        new = []
+        with self._lock:
+            for article in articles:
+                url = article_key(article)
+                if not url:
+                    continue
+                inserted = self._db.execute("INSERT OR IGNORE INTO seen (topic, url, first_seen) VALUES (?, ?, ?)", (topic, url, now))
+                if inserted.rowcount:
+                    self._db.execute("INSERT OR IGNORE INTO pending (topic, url, article, added) VALUES (?, ?, ?, ?)",
+                                     (topic, url, json.dumps(article, ensure_ascii=False), now))
+                    new.append(article)
+            self._db.commit()
+        return new
+
+    def pending(self, topic: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute("SELECT article FROM pending WHERE topic = ? ORDER BY added", (topic,)).fetchall()
+        return [json.loads(article) for article, in rows]
+
+    def clear_pending(self, topic: str, urls: List[str]) -> None:
+        with self._lock:
+            self._db.executemany("DELETE FROM pending WHERE topic = ? AND url = ?", [(topic, url) for url in urls])
+            self._db.commit()
+
+    def prune_seen(self, max_age_days: float) -> None:
+        """Forget seen URLs older than max_age_days; the watermarks keep those articles out anyway."""
+        with self._lock:
+            self._db.execute("DELETE FROM seen WHERE first_seen < ?", (time.time() - max_age_days * DAY,))
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class NewsMonitor:
+    """
+    Polls the news providers for one topic and hands batches of new articles to an analysis callback.
+
+    Args:
+        topic (str): The monitored topic; it is also the search query.
+        fanout_tool: The NewsFanOutSearchTool used to query the providers.
+        store (WatermarkStore): Watermark store; NEWS_MONITOR_PATH (or the cache folder) by default.
+        result_count (int): Results requested per provider.
+        min_new_articles (int): Pending articles needed to start an analysis; NEWS_MONITOR_MIN_NEW by default.
+        lookback_hours (float): How far back the first cycle looks; NEWS_MONITOR_LOOKBACK_HOURS by default.
+    """
+
+    def __init__(self,
+                 topic: str,
+                 fanout_tool: Any,
+                 store: Optional[WatermarkStore] = None,
+                 result_count: int = 10,
+                 min_new_articles: Optional[int] = None,
+                 lookback_hours: Optional[float] = None):
+        self.topic = topic
+        self.key = topic_key(topic)
+        self.fanout_tool = fanout_tool
+        self.store = store or WatermarkStore(os.getenv("NEWS_MONITOR_PATH") or os.path.join(default_cache_dir(), "news_monitor.sqlite"))
+        self.result_count = result_count
+        self.min_new_articles = min_new_articles or int(os.getenv("NEWS_MONITOR_MIN_NEW", 10))
+        self.lookback = timedelta(hours=lookback_hours or float(os.getenv("NEWS_MONITOR_LOOKBACK_HOURS", 24)))
+        self.overlap = timedelta(minutes=float(os.getenv("NEWS_MONITOR_OVERLAP_MINUTES", 60)))
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Run one incremental search; return the new articles (they are also queued as pending)."""
+        now = datetime.now(timezone.utc)
+        watermarks = self.store.watermarks(self.key)
+        # Ask from a little before each watermark: providers index some articles late, the seen URLs drop the repeats
+        since = {name: watermarks[name] - self.overlap if name in watermarks else now - self.lookback
+                 for name in self.fanout_tool.providers}
+        params = {name: SINCE_PARAMS[name](since[name], now) for name in since if name in SINCE_PARAMS}
+        # A cached answer from the previous cycle would hide new articles, so the polls skip the response cache
+        merged = run_sync(self.fanout_tool.fan_out([self.topic], self.result_count, provider_params=params, fresh=True))
+
+        fresh: List[Dict[str, Any]] = []
+        newest: Dict[str, datetime] = {}
+        for article in merged["articles"]:
+            providers = article.get("providers") or []
+            published = parse_published(article.get("published"))
+            if published is not None:
+                if published <= now:  # a wrong future date must not move the watermark past articles still to come
+                    for provider in providers:
+                        newest[provider] = max(newest.get(provider, published), published)
+                # Providers without a date filter (EXA) and loose filters (whole days) are cut here
+                if all(published <= since.get(provider, now - self.lookback) for provider in providers):
+                    continue
+            fresh.append(article)
+
+        new = self.store.add_unseen(self.key, fresh)
+        for provider, published in newest.items():
+            if merged["providers"].get(provider, {}).get("status") in ("ok", "partial"):
+                self.store.advance(self.key, provider, published)
+        statuses = "; ".join(f"{name}: {entry['status']} ({entry.get('articles', 0)})" for name, entry in merged["providers"].items())
+        log(f"News monitor '{self.topic}': {len(merged['articles'])} articles returned, {len(new)} new. {statuses}")
+        return new
+
+    def write_articles_file(self, articles: List[Dict[str, Any]]) -> str:
+        """Save pending articles for an analysis run (see articles_task_output) and return the file path."""
+        folder = os.path.join(default_cache_dir(), "news_monitor")
+        os.makedirs(folder, exist_ok=True)
+        slug = re.sub(r"[^a-z0-9]+", "-", self.key).strip("-")[:40] or "topic"
+        path = os.path.join(folder, f"{slug}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"topic": self.topic, "created": datetime.now().strftime('%Y-%m-%d %H:%M:%S'), "articles": articles},
+                      f, ensure_ascii=False, indent=2)
+        return path
+
+    def cycle(self, analyze: Callable[[str], bool]) -> None:
+        """Poll once and call analyze(articles_file) when enough new articles are pending."""
+        self.poll()
+        pending = self.store.pending(self.key)
+        if len(pending) < self.min_new_articles:
+            log(f"News monitor '{self.topic}': {len(pending)} of {self.min_new_articles} new articles needed for an analysis.")
+            return
+        path = self.write_articles_file(pending)
+        log(f"News monitor '{self.topic}': analyzing {len(pending)} new articles ({path})")
+        if analyze(path):
+            self.store.clear_pending(self.key, [article_key(article) for article in pending])
+            os.remove(path)
+        else:
+            log(f"News monitor '{self.topic}': the analysis failed, the articles stay pending for the next cycle.")
+
+    def run_forever(self, interval: float, analyze: Callable[[str], bool]) -> None:
+        """Run a cycle every `interval` seconds until interrupted (Ctrl+C)."""
+        log(f"Monitoring '{self.topic}' every {interval / 60:.0f} min; an analysis starts at {self.min_new_articles} new articles. Press Ctrl+C to stop.")
+        try:
+            while True:
+                started = time.time()
+                try:
+                    self.cycle(analyze)
+                except Exception as e:
+                    log(f"News monitor cycle failed: {type(e).__name__}: {e}")
+                self.store.prune_seen(float(os.getenv("NEWS_MONITOR_SEEN_DAYS", 30)))
+                time.sleep(max(0.0, interval - (time.time() - started)))
+        except KeyboardInterrupt:
+            log(f"Monitoring of '{self.topic}' stopped.")
+
+
+def articles_task_output(task: Any, path: str) -> TaskOutput:
+    """
+    Turn a monitor articles file into the output of a news search task, so an analysis run starts from it.
+
+    The text is also written to the task's output_file, as if the task had run.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    records = [dict(article, providers=", ".join(article.get("providers", []))) for article in data["articles"]]
+    header = f"New articles on '{data['topic']}' collected by the news monitor (up to {data['created']}): {len(records)}"
+    raw = format_records(records, ARTICLE_FIELDS, token_budget=int(os.getenv("NEWS_FANOUT_TOKEN_BUDGET", 6000)),
+                         header=header, empty_message="No articles found.")
+    if task.output_file:
+        with open(task.output_file, "w", encoding="utf-8") as f:
+            f.write(raw)
+    return TaskOutput(
+        description=task.description,
+        name=task.name,
+        expected_output=task.expected_output,
+        raw=raw,
+        agent=task.agent.role if task.agent else "",
+        output_format=OutputFormat.RAW,
+    )
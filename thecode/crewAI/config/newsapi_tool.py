@@ -1,9 +1,12 @@
 from crewai_tools import BaseTool
-import requests
 import os
 from pydantic import BaseModel, Field
 from typing import Any, Optional, Type
 
+from .news_articles import from_newsapi
+from .output_formatter import format_tool_output, pop_format_options
+from .response_cache import cached_aget, cached_get
+
 
 class NewsAPITopToolSchema(BaseModel):
     country: Optional[str] = Field(
@@ -83,6 +86,15 @@ class NewsAPIEverythingToolSchema(BaseModel):
     )
 
 
+def _format_articles(answer, **options) -> str:
+    """Render the articles of a News API answer compactly; error messages are returned unchanged."""
+    if not isinstance(answer, dict):
+        return answer
+    records = [article.to_dict() for article in from_newsapi(answer)]
+    return format_tool_output(records, ("title", "url", "source", "published", "snippet"),
+                              empty_message="No articles found.", **options)
+
+
 class NewsAPITopTool(BaseTool):
     name: str = "News API Tool"
     description: str = "Fetches top and breaking news headlines from various countries in different categories using the News API."
@@ -103,8 +115,25 @@ class NewsAPITopTool(BaseTool):
             category (str): The category of news (e.g., 'technology', 'science').
 
         Returns:
-            str: A summary of the top headlines.
+            str: The top headlines, formatted within the tool output token budget.
         """
+        base_url, params = self._build_request(category, country, language, pageSize)
+        response = cached_get("newsapi", base_url, params=params)
+        return _format_articles(self._parse_response(response))
+
+    async def _arun(
+        self, 
+        category: str = "general",
+        country: str = "us",
+        language: str = "en",
+        pageSize: int = 40, 
+    ) -> str:
+        """Async version of _run, using the shared async HTTP client."""
+        base_url, params = self._build_request(category, country, language, pageSize)
+        response = await cached_aget("newsapi", base_url, params=params)
+        return _format_articles(self._parse_response(response))
+
+    def _build_request(self, category: str, country: str, language: str, pageSize: int):
         api_key = os.getenv("NEWSAPI_KEY")  # Retrieve the News API key from environment variables
         base_url = "https://newsapi.org/v2/top-headlines" 
         if not api_key:
@@ -115,8 +144,10 @@ class NewsAPITopTool(BaseTool):
             'language': language,
             'pageSize': pageSize,
             'apiKey': api_key,
-        }        
-        response = requests.get(base_url, params=params)        
+        }
+        return base_url, params
+
+    def _parse_response(self, response):
         if response.status_code == 200:
             return response.json()
             #articles = response.json().get('articles', [])
@@ -140,8 +171,26 @@ class NewsAPIEverythingTool(BaseTool):
             **kwargs: Additional filters such as from_date, to_date, language, sort_by, pageSize, and page.
 
         Returns:
-            str: A summary of the articles found.
+            str: The articles found, formatted within the tool output token budget.
         """
+        options = pop_format_options(kwargs)
+        base_url, params = self._build_request(query, **kwargs)
+        response = cached_get("newsapi", base_url, params=params)
+        return _format_articles(self._parse_response(response), **options)
+
+    async def _arun(self, query: str, **kwargs) -> str:
+        """Async version of _run, using the shared async HTTP client. Accepts the same arguments."""
+        options = pop_format_options(kwargs)
+        return _format_articles(await self._arun_json(query, **kwargs), **options)
+
+    async def _arun_json(self, query: str, **kwargs):
+        """Like _arun, but return the raw News API answer (used by the news fan-out to normalize articles)."""
+        pop_format_options(kwargs)
+        base_url, params = self._build_request(query, **kwargs)
+        response = await cached_aget("newsapi", base_url, params=params)
+        return self._parse_response(response)
+
+    def _build_request(self, query: str, **kwargs):
         api_key = os.getenv("NEWSAPI_KEY")  # Retrieve the News API key from environment variables
         base_url = "https://newsapi.org/v2/everything"
         if not api_key:
@@ -152,8 +201,9 @@ class NewsAPIEverythingTool(BaseTool):
             'apiKey': api_key,
         }
         params.update(kwargs)
-        
-        response = requests.get(base_url, params=params)
+        return base_url, params
+
+    def _parse_response(self, response):
         if response.status_code == 200:
             return response.json()
             # articles = response.json().get('articles', [])
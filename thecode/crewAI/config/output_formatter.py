@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+output_formatter.py: Compact, token-budgeted formatting of search tool results for CrewAI agents.
+Every tool observation is appended to the agent's prompt and re-sent on each later step of the agent
+loop, so search tools render their results through this module. It keeps only selected fields,
+truncates long snippets and stops adding records once the per-call token budget is reached.
+Output modes: "text" (labelled lines), "table" (markdown table) and "jsonl" (one JSON object per line).
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import json
+import os
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+
+OUTPUT_MODES = ("text", "table", "jsonl")
+FORMAT_OPTIONS = ("output_mode", "token_budget", "fields", "snippet_chars")
+_OMITTED_NOTE_TOKENS = 20  # kept free for the "results omitted" note
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text); no tokenizer needed."""
+    return (len(text) + 3) // 4
+
+
+def truncate(text: Any, max_chars: Optional[int]) -> str:
+    """Shorten text to max_chars, cutting at a word boundary and marking the cut with an ellipsis."""
+    text = " ".join(str(text).split())
+    if not max_chars or len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0] or text[:max_chars]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def pop_format_options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Remove the formatting options from a tool's **kwargs so they are not sent to the API."""
+    return {name: kwargs.pop(name) for name in FORMAT_OPTIONS if name in kwargs}
+
+
+def _select_fields(default_fields: Sequence[str], fields: Union[None, str, Sequence[str]]) -> List[str]:
+    if not fields:
+        return list(default_fields)
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(",")]
+    return [field for field in fields if field] or list(default_fields)
+
+
+def _label(field: str) -> str:
+    return "URL" if field == "url" else field.replace("_", " ").title()
+
+
+def _render(record: Dict[str, Any], fields: Sequence[str], mode: str) -> str:
+    if mode == "jsonl":
+        return json.dumps({field: record[field] for field in fields if record.get(field)},
+                          ensure_ascii=False, separators=(",", ":"), default=str)
+    if mode == "table":
+        return "| " + " | ".join(str(record.get(field, "")).replace("|", "/") for field in fields) + " |"
+    return "\n".join(f"{_label(field)}: {record[field]}" for field in fields if record.get(field))
+
+
+def format_records(records: Iterable[Dict[str, Any]],
+                   fields: Sequence[str],
+                   output_mode: Optional[str] = None,
+                   token_budget: Optional[int] = None,
+                   snippet_chars: Optional[int] = None,
+                   header: Optional[str] = None,
+                   empty_message: str = "No results found for the given query.",
+                   long_fields: Sequence[str] = ("snippet", "content", "description")) -> str:
+    """
+    Render result records as a compact string that fits in a token budget.
+
+    Args:
+        records: Result records (dicts); missing and empty fields are skipped.
+        fields: Field names to keep, in output order. A comma-separated string is accepted too.
+        output_mode (str): "text", "table" or "jsonl". Default from TOOL_OUTPUT_MODE, else "text".
+        token_budget (int): Estimated token limit of the whole output. Default from TOOL_OUTPUT_TOKEN_BUDGET.
+        snippet_chars (int): Maximum length of the long_fields. Default from TOOL_OUTPUT_SNIPPET_CHARS.
+        header (str): Optional first line, e.g. a direct answer returned by the provider.
+        empty_message (str): Returned, after the header, when there are no records.
+        long_fields: Fields that are truncated to snippet_chars.
+
+    Returns:
+        str: The formatted records, with a note on how many were left out to stay within the budget.
+    """
+    output_mode = (output_mode or os.getenv("TOOL_OUTPUT_MODE", "text")).lower()
+    if output_mode not in OUTPUT_MODES:
+        output_mode = "text"
+    token_budget = int(token_budget or os.getenv("TOOL_OUTPUT_TOKEN_BUDGET", 2000))
+    snippet_chars = int(snippet_chars or os.getenv("TOOL_OUTPUT_SNIPPET_CHARS", 300))
+    fields = _select_fields(fields, fields)
+
+    records = list(records)
+    if not records:
+        return f"{header}\n{empty_message}" if header else empty_message
+
+    lines = [header] if header else []
+    if output_mode == "table":
+        lines += ["| " + " | ".join(fields) + " |", "|" + "---|" * len(fields)]
+    separator = "\n\n" if output_mode == "text" else "\n"
+    used = sum(estimate_tokens(line) for line in lines)
+
+    shown = 0
+    for record in records:
+        record = {field: truncate(value, snippet_chars) if field in long_fields else value
+                  for field, value in record.items() if field in fields}
+        rendered = _render(record, fields, output_mode)
+        cost = estimate_tokens(rendered) + 1
+        if shown and used + cost > token_budget - _OMITTED_NOTE_TOKENS:
+            break
+        lines.append(rendered)
+        used += cost
+        shown += 1
+
+    omitted = len(records) - shown
+    if omitted:
+        lines.append(f"[{omitted} more result(s) omitted to stay within the {token_budget}-token output budget]")
+    return separator.join(lines) if output_mode == "text" else "\n".join(lines)
+
+
+def format_tool_output(records: Iterable[Dict[str, Any]], default_fields: Sequence[str], **options) -> str:
+    """format_records() for tools: `options` are the values taken by pop_format_options() plus header/empty_message."""
+    fields = _select_fields(default_fields, options.pop("fields", None))
+    return format_records(records, fields, **options)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+"""
+pdf_extraction.py: PDF text extraction core used by CustomPDFReadTool.
+Reads page ranges one page at a time and stops once a character limit is reached. Large ranges are
+split across a spawn process pool: each worker opens its own fitz (PyMuPDF) document and the text is put
+back together in page order. Spawn workers re-import the script that started them as '__mp_main__', so
+scripts using this module keep their entry code under a main-process guard (see the PROD crew scripts).
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import atexit
+import multiprocessing
+import os
+import threading
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from typing import Iterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+
+def parse_page_range(pages: Optional[str], page_count: int) -> Tuple[int, int]:
+    """Turn a 1-based inclusive range like '10-25', '7' or '30-' into 0-based (start, stop) page indexes."""
+    if not pages or not str(pages).strip():
+        return 0, page_count
+    first, _, last = str(pages).replace(" ", "").partition("-")
+    start = int(first) - 1 if first else 0
+    stop = (int(last) if last else page_count) if "-" in str(pages) else start + 1
+    start, stop = max(start, 0), min(stop, page_count)
+    if start >= stop:
+        raise ValueError(f"Page range '{pages}' is outside the document (1-{page_count}).")
+    return start, stop
+
+
+def iter_page_text(document, start: int, stop: int) -> Iterator[Tuple[int, str]]:
+    """Yield (page_index, text) one page at a time, so callers can stop early without extracting the rest."""
+    for page_num in range(start, stop):
+        yield page_num, document.load_page(page_num).get_text()
+
+
+def extract_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Process pool worker: open the document in this process and return the texts of pages start..stop-1."""
+    with fitz.open(file_path) as document:
+        return [text for _, text in iter_page_text(document, start, stop)]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def parallel_workers() -> int:
+    return int(os.getenv("PDF_PARALLEL_WORKERS") or max(1, (os.cpu_count() or 2) - 1))
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Return the shared extraction process pool (PDF_PARALLEL_WORKERS processes), created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn on every platform: fork would copy the parent's threads and locks into the workers
+            _pool = ProcessPoolExecutor(max_workers=parallel_workers(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _stop_pool(pool: ProcessPoolExecutor) -> None:
+    # shutdown() alone waits for running chunks; terminate the workers first so a stuck one cannot block it
+    terminate_workers = getattr(pool, "terminate_workers", None)  # Python 3.14+
+    if terminate_workers is not None:
+        terminate_workers()
+    else:
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+    pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Stop a pool with a stuck worker; the next extraction starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    _stop_pool(pool)
+
+
+def shutdown_pdf_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        _stop_pool(pool)
+
+
+atexit.register(shutdown_pdf_pool)
+
+
+def iter_page_text_parallel(file_path: str, start: int, stop: int) -> Iterator[Tuple[int, str]]:
+    """
+    Like iter_page_text, but extract chunks of pages in the process pool.
+
+    Only about two chunks per worker are in flight at a time, so stopping early (character limit
+    reached) does not leave the pool extracting the rest of a long document. Chunks are yielded
+    in page order. A chunk that takes longer than PDF_PARALLEL_TIMEOUT seconds stops the pool.
+    """
+    workers = parallel_workers()
+    chunk = max(4, -(-(stop - start) // (workers * 4)))  # about 4 chunks per worker balances uneven pages
+    pending = deque((first, min(first + chunk, stop)) for first in range(start, stop, chunk))
+    in_flight = deque()
+    pool = get_pdf_pool()
+    timeout = float(os.getenv("PDF_PARALLEL_TIMEOUT", 120))
+
+    def submit_next():
+        first, last = pending.popleft()
+        in_flight.append((first, pool.submit(extract_pages, file_path, first, last)))
+
+    try:
+        while pending and len(in_flight) < workers * 2:
+            submit_next()
+        while in_flight:
+            first, future = in_flight.popleft()
+            try:
+                texts = future.result(timeout=timeout)
+            except TimeoutError:
+                _discard_pool(pool)
+                raise TimeoutError(f"Pages from {first + 1} of {file_path} were not extracted within {timeout:g}s") from None
+            if pending:
+                submit_next()
+            for offset, text in enumerate(texts):
+                yield first + offset, text
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+
+
+def use_parallel(file_path: str, start: int, stop: int) -> bool:
+    """Parallel extraction pays off only for long page ranges of reasonably large files."""
+    if parallel_workers() < 2:
+        return False
+    min_pages = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 64))
+    min_bytes = float(os.getenv("PDF_PARALLEL_MIN_MB", 2)) * 1024 * 1024
+    return stop - start >= min_pages and os.path.getsize(file_path) >= min_bytes
+
+
+def collect_text(page_texts: Iterator[Tuple[int, str]], page_count: int, stop: int, max_chars: int) -> str:
+    """
+    Join page texts until max_chars is reached.
+
+    Page texts are collected in a list and joined once (linear time). When the budget cuts the
+    range short, a note at the end tells the agent which pages to request next.
+    """
+    parts, used = [], 0
+    try:
+        for page_num, page_text in page_texts:
+            if used + len(page_text) > max_chars:
+                parts.append(page_text[: max_chars - used])
+                parts.append(
+                    f"\n[Stopped on page {page_num + 1} of {page_count}: the {max_chars}-character limit was reached. "
+                    f"Read pages='{page_num + 1}-{stop}' to continue.]"
+                )
+                break
+            parts.append(page_text)
+            used += len(page_text)
+    finally:
+        page_texts.close()
+    return "".join(parts)
+
+
+def max_chars_or_default(max_chars: Optional[int]) -> int:
+    return int(max_chars or os.getenv("PDF_READ_MAX_CHARS", 50000))
+
+
+def read_pdf_text(file_path: str,
+                  pages: Optional[str] = None,
+                  max_chars: Optional[int] = None,
+                  parallel: Optional[bool] = None) -> str:
+    """
+    Extract the text of a page range, stopping once max_chars is reached.
+
+    parallel=None lets use_parallel() decide based on the page count and file size.
+    """
+    with fitz.open(file_path) as document:
+        page_count = len(document)
+        start, stop = parse_page_range(pages, page_count)
+        if parallel is None:
+            parallel = use_parallel(file_path, start, stop)
+        page_texts = iter_page_text_parallel(file_path, start, stop) if parallel else iter_page_text(document, start, stop)
+        return collect_text(page_texts, page_count, stop, max_chars_or_default(max_chars))
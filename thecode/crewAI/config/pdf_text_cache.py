@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+"""
+pdf_text_cache.py: Persistent cache of extracted PDF page text, keyed on the file's content hash.
+Agents often read the same reference PDFs several times in a run and again in later runs. Each page's
+text is stored zlib-compressed in SQLite under the SHA-256 of the file, so repeated reads come from the
+cache and only pages not seen before are parsed. A path/size/mtime record skips re-hashing an unchanged
+file. Documents are evicted least-recently-used when the cache grows past its size cap.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from .pdf_extraction import (
+    collect_text,
+    iter_page_text,
+    iter_page_text_parallel,
+    max_chars_or_default,
+    parse_page_range,
+    read_pdf_text,
+    use_parallel,
+)
+from .response_cache import default_cache_dir
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PDFTextCache:
+    """
+    SQLite store of per-page PDF text.
+
+    Args:
+        path (str): Location of the SQLite database file.
+        max_bytes (int): Upper bound of the stored (compressed) text size.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, sha256 TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " sha256 TEXT PRIMARY KEY, page_count INTEGER NOT NULL, size INTEGER NOT NULL DEFAULT 0, accessed REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " sha256 TEXT NOT NULL, page INTEGER NOT NULL, text BLOB NOT NULL, PRIMARY KEY (sha256, page));"
+            "CREATE INDEX IF NOT EXISTS documents_accessed ON documents (accessed);"
+        )
+        self._db.commit()
+
+    def content_hash(self, file_path: str) -> str:
+        """SHA-256 of the file; unchanged files (same path, size and mtime) are not hashed again."""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime, sha256 FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return row[2]
+        sha256 = file_sha256(path)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO files (path, size, mtime, sha256) VALUES (?, ?, ?, ?)",
+                             (path, stat.st_size, stat.st_mtime, sha256))
+            self._db.commit()
+        return sha256
+
+    def page_count(self, sha256: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute("SELECT page_count FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE documents SET accessed = ? WHERE sha256 = ?", (time.time(), sha256))
+                self._db.commit()
+        return row[0] if row else None
+
+    def get_pages(self, sha256: str, start: int, stop: int) -> Dict[int, str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT page, text FROM pages WHERE sha256 = ? AND page >= ? AND page < ?", (sha256, start, stop)
+            ).fetchall()
+        return {page: zlib.decompress(blob).decode("utf-8") for page, blob in rows}
+
+    def put_pages(self, sha256: str, page_count: int, pages: Dict[int, str]) -> None:
+        blobs = [(sha256, page, zlib.compress(text.encode("utf-8"))) for page, text in pages.items()]
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO documents (sha256, page_count, size, accessed) VALUES (?, ?, 0, ?)"
+                " ON CONFLICT(sha256) DO UPDATE SET accessed = excluded.accessed",
+                (sha256, page_count, now),
+            )
+            # Pages already stored (e.g. written by a concurrent extraction) are skipped and must not count twice
+            added = 0
+            for row in blobs:
+                if self._db.execute("INSERT OR IGNORE INTO pages (sha256, page, text) VALUES (?, ?, ?)", row).rowcount:
+                    added += len(row[2])
+            self._db.execute("UPDATE documents SET size = size + ? WHERE sha256 = ?", (added, sha256))
+            self._evict(keep=sha256)
+            self._db.commit()
+
+    def _evict(self, keep: str) -> None:
+        # Caller holds the lock. The document being written is never evicted.
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for sha256, size in self._db.execute(
+            "SELECT sha256, size FROM documents WHERE sha256 != ? ORDER BY accessed ASC", (keep,)
+        ).fetchall():
+            self._db.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+            self._db.execute("DELETE FROM documents WHERE sha256 = ?", (sha256,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def iter_page_text(self, file_path: str, sha256: str, start: int, stop: int, page_count: int) -> Iterator[Tuple[int, str]]:
+        """
+        Yield (page_index, text) for start..stop-1, serving cached pages and extracting the others.
+
+        Newly extracted pages are stored when the iteration ends, also when the caller stops early.
+        """
+        cached = self.get_pages(sha256, start, stop)
+        missing = [page for page in range(start, stop) if page not in cached]
+        if not missing:
+            self.hits += 1
+            for page in range(start, stop):
+                yield page, cached[page]
+            return
+        self.misses += 1
+        extracted: Dict[int, str] = {}
+        first, last = missing[0], missing[-1] + 1
+        try:
+            for page in range(start, first):
+                yield page, cached[page]
+            if use_parallel(file_path, first, last):
+                source = iter_page_text_parallel(file_path, first, last)
+                document = None
+            else:
+                document = fitz.open(file_path)
+                source = self._iter_missing(document, cached, first, last)
+            try:
+                for page, text in source:
+                    if page not in cached:
+                        extracted[page] = text
+                    yield page, cached.get(page, text)
+            finally:
+                source.close()
+                if document is not None:
+                    document.close()
+            for page in range(last, stop):
+                yield page, cached[page]
+        finally:
+            if extracted:
+                self.put_pages(sha256, page_count, extracted)
+
+    @staticmethod
+    def _iter_missing(document, cached: Dict[int, str], start: int, stop: int) -> Iterator[Tuple[int, str]]:
+        # serial path: parse only the pages that are not cached yet
+        for page in range(start, stop):
+            if page in cached:
+                yield page, cached[page]
+            else:
+                yield next(iter_page_text(document, page, page + 1))
+
+    def print_stats(self) -> None:
+        with self._lock:
+            documents, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents").fetchone()
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] PDF text cache: {documents} documents, {size / 1024 / 1024:.1f} MB ({self.path})")
+        print(f"    reads: {total:<5} fully cached: {self.hits:<5} hit rate: {hit_rate:.0%}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_cache: Optional[PDFTextCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_text_cache() -> Optional[PDFTextCache]:
+    """
+    Return the process-wide PDF text cache, or None when PDF_TEXT_CACHE_ENABLED is false.
+
+    Settings: PDF_TEXT_CACHE_PATH and PDF_TEXT_CACHE_MAX_MB.
+    """
+    global _cache
+    if os.getenv("PDF_TEXT_CACHE_ENABLED", "true").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PDFTextCache(
+                    path=os.getenv("PDF_TEXT_CACHE_PATH") or os.path.join(default_cache_dir(), "pdf_text_cache.sqlite"),
+                    max_bytes=int(float(os.getenv("PDF_TEXT_CACHE_MAX_MB", 512)) * 1024 * 1024),
+                )
+    return _cache
+
+
+def read_pdf_text_cached(file_path: str, pages: Optional[str] = None, max_chars: Optional[int] = None) -> str:
+    """read_pdf_text() served from the PDF text cache where possible."""
+    cache = get_pdf_text_cache()
+    if cache is None:
+        return read_pdf_text(file_path, pages, max_chars)
+    sha256 = cache.content_hash(file_path)
+    page_count = cache.page_count(sha256)
+    if page_count is None:
+        with fitz.open(file_path) as document:
+            page_count = len(document)
+    start, stop = parse_page_range(pages, page_count)
+    page_texts = cache.iter_page_text(file_path, sha256, start, stop, page_count)
+    return collect_text(page_texts, page_count, stop, max_chars_or_default(max_chars))
+
+
+def print_pdf_cache_stats() -> None:
+    """Print PDF text cache statistics if the cache was used in this process."""
+    if _cache is not None:
+        _cache.print_stats()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+pooled_selenium_tool.py: Selenium scraping tool backed by the shared Chrome driver pool.
+Behaves like crewai_tools' SeleniumScrapingTool, but borrows a warm, tuned headless browser from
+ChromeDriverPool instead of launching (and closing) a new one for every URL. Pages get at least wait_time
+seconds to render their JS content, or less when the requested css_element shows up earlier.
+This tool is for the CrewAI framework.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import time
+
+from typing import Any, Optional
+
+from crewai_tools import SeleniumScrapingTool
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
+
+from .chrome_driver_pool import get_driver_pool
+
+
+class PooledSeleniumScrapingTool(SeleniumScrapingTool):
+    driver_pool: Optional[Any] = None
+
+    def __init__(self, **kwargs: Any):
+        # SeleniumScrapingTool starts its own Chrome unless it is given a driver; the drivers come from the pool
+        kwargs.setdefault("driver", None)
+        super().__init__(**kwargs)
+
+    def _run(self, **kwargs: Any) -> Any:
+        website_url = kwargs.get("website_url", self.website_url)
+        css_element = kwargs.get("css_element", self.css_element)
+        pool = self.driver_pool or get_driver_pool()
+
+        with pool.driver() as driver:
+            self._load(driver, website_url, css_element)
+            if self.cookie:
+                driver.add_cookie(self.cookie)
+                self._load(driver, website_url, css_element)
+
+            content = []
+            if css_element is None or css_element.strip() == "":
+                content.append(driver.find_element(By.TAG_NAME, "body").text)
+            else:
+                for element in driver.find_elements(By.CSS_SELECTOR, css_element):
+                    content.append(element.text)
+        return "\n".join(content)
+
+    def _load(self, driver, url: str, css_element: Optional[str] = None) -> None:
+        started = time.monotonic()
+        wait_time = self.wait_time or 3
+        driver.get(url)
+        try:
+            WebDriverWait(driver, wait_time).until(lambda d: d.execute_script("return document.readyState") == "complete")
+        except TimeoutException:
+            pass  # a slow page is scraped as far as it got, as SeleniumScrapingTool's plain sleep would
+        remaining = wait_time - (time.monotonic() - started)
+        if css_element and css_element.strip():
+            # Done as soon as the target is rendered; after wait_time take whatever is there
+            try:
+                WebDriverWait(driver, max(remaining, 0.1)).until(
+                    expected_conditions.presence_of_element_located((By.CSS_SELECTOR, css_element))
+                )
+            except TimeoutException:
+                pass
+        elif remaining > 0:
+            # The load event fires before pages rendered by JS have their content; keep wait_time as the settle time
+            time.sleep(remaining)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+"""
+rate_limiter.py: Per-provider rate limits and quotas for the search tools.
+Every request that misses the response cache passes the provider's limiter first: a token bucket spaces
+requests to the provider's rate (requests per minute with a burst), and daily/monthly quota counters kept
+in SQLite survive between runs. A provider whose quota is used up, or that answered 429 Too Many Requests,
+fails at once with QuotaExhaustedError (no request is sent) until its quota period ends or its Retry-After
+passes, so agents and the news fan-out move on to other providers instead of retrying.
+Providers that share an API key share one account (e.g. bing_web and bing_news, all tavily_* tools).
+Limits: RATE_LIMIT_<ACCOUNT> (requests per minute, 0 = unlimited), RATE_LIMIT_<ACCOUNT>_BURST,
+QUOTA_<ACCOUNT>_DAILY and QUOTA_<ACCOUNT>_MONTHLY (0 = unlimited); defaults are the free tiers below.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+
+# Providers (response cache names) that share an account and therefore its limits
+ACCOUNTS = {
+    "bing_web": "bing",
+    "bing_news": "bing",
+    "tavily_news": "tavily",
+    "tavily_general": "tavily",
+    "tavily_context": "tavily",
+    "tavily_qna": "tavily",
+    "serpapi": "serpapi",
+    "serpapi_kg": "serpapi",
+}
+
+# Free tier limits per account: requests per minute, burst, requests per day, requests per month (0 = unlimited)
+DEFAULT_LIMITS = {
+    "bing": {"per_minute": 180, "burst": 3, "daily": 0, "monthly": 1000},
+    "mediastack": {"per_minute": 0, "burst": 1, "daily": 0, "monthly": 100},
+    "newsapi": {"per_minute": 0, "burst": 1, "daily": 100, "monthly": 0},
+    "newsdata": {"per_minute": 2, "burst": 30, "daily": 200, "monthly": 0},
+    "tavily": {"per_minute": 100, "burst": 10, "daily": 0, "monthly": 1000},
+    "serpapi": {"per_minute": 0, "burst": 1, "daily": 0, "monthly": 100},
+    "google_kg": {"per_minute": 0, "burst": 1, "daily": 100000, "monthly": 0},
+}
+NO_LIMITS = {"per_minute": 0, "burst": 1, "daily": 0, "monthly": 0}
+
+
+class QuotaExhaustedError(RuntimeError):
+    """A provider must not be called now: its quota is used up or it asked to back off."""
+
+    def __init__(self, provider: str, reason: str, until: Optional[datetime] = None):
+        self.provider = provider
+        self.reason = reason
+        self.until = until
+        when = f" until {until.strftime('%Y-%m-%d %H:%M')} UTC" if until else ""
+        super().__init__(f"{provider} is unavailable{when}: {reason}. Do not retry it; use another provider.")
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _periods(now: datetime) -> Dict[str, str]:
+    return {"daily": now.strftime("%Y-%m-%d"), "monthly": now.strftime("%Y-%m")}
+
+
+def _period_end(period: str, now: datetime) -> datetime:
+    start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "daily":
+        return start_of_day + timedelta(days=1)
+    start_of_month = start_of_day.replace(day=1)
+    return (start_of_month + timedelta(days=32)).replace(day=1)
+
+
+def _retry_after(headers: Any, default: float) -> float:
+    try:
+        return max(1.0, float((headers or {}).get("Retry-After")))
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """Thread-safe token bucket; reservations beyond the available tokens queue up as waiting time."""
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def cancel(self) -> None:
+        """Give back a reserved token that will not be used."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class ProviderLimiter:
+    """
+    Token buckets (per process) and quota counters and blocks (persistent, per account).
+
+    Args:
+        path (str): Location of the SQLite database with the quota counters.
+        limits (dict): Account name to per_minute, burst, daily and monthly limits.
+        max_wait (float): Longest wait for a rate limit slot before the request fails.
+        backoff (float): Seconds a provider is blocked after a 429 without Retry-After.
+    """
+
+    def __init__(self,
+                 path: str,
+                 limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 max_wait: float = 60.0,
+                 backoff: float = 60.0):
+        self.path = path
+        self.limits = limits if limits is not None else DEFAULT_LIMITS
+        self.max_wait = max_wait
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._requests = defaultdict(int)
+        self._waited = defaultdict(float)
+        self._rejected = defaultdict(int)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Autocommit mode with explicit BEGIN IMMEDIATE, so concurrent processes count every request once
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            " account TEXT NOT NULL, period TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (account, period))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS blocks (account TEXT PRIMARY KEY, until REAL NOT NULL, reason TEXT NOT NULL)"
+        )
+
+    @staticmethod
+    def account(provider: str) -> str:
+        return ACCOUNTS.get(provider, provider)
+
+    def limit(self, account: str) -> Dict[str, float]:
+        return self.limits.get(account, NO_LIMITS)
+
+    def _bucket(self, account: str) -> Optional[TokenBucket]:
+        limit = self.limit(account)
+        if not limit["per_minute"]:
+            return None
+        with self._lock:
+            if account not in self._buckets:
+                self._buckets[account] = TokenBucket(limit["per_minute"], limit["burst"])
+            return self._buckets[account]
+
+    def _count(self, provider: str, commit: bool) -> None:
+        """Raise QuotaExhaustedError when the account is blocked or over quota; count the request when `commit`."""
+        account = self.account(provider)
+        limit = self.limit(account)
+        now = _utc_now()
+        periods = _periods(now)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT until, reason FROM blocks WHERE account = ?", (account,)).fetchone()
+                if row is not None and row[0] > now.timestamp():
+                    raise QuotaExhaustedError(provider, row[1], datetime.fromtimestamp(row[0], timezone.utc))
+                for period, key in periods.items():
+                    used = self._db.execute("SELECT count FROM usage WHERE account = ? AND period = ?", (account, key)).fetchone()
+                    if limit[period] and (used[0] if used else 0) >= limit[period]:
+                        raise QuotaExhaustedError(provider, f"{period} quota of {int(limit[period])} requests used up", _period_end(period, now))
+                if commit:
+                    for key in periods.values():
+                        self._db.execute(
+                            "INSERT INTO usage (account, period, count) VALUES (?, ?, 1)"
+                            " ON CONFLICT (account, period) DO UPDATE SET count = count + 1", (account, key))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                if commit:
+                    self._rejected[account] += 1
+                raise
+            if commit:
+                self._requests[account] += 1
+
+    def _reserve(self, provider: str) -> float:
+        # Fail fast on an exhausted quota before waiting for a rate limit slot
+        try:
+            self._count(provider, commit=False)
+        except QuotaExhaustedError:
+            self._rejected[self.account(provider)] += 1
+            raise
+        bucket = self._bucket(self.account(provider))
+        wait = bucket.reserve() if bucket is not None else 0.0
+        if wait > self.max_wait:
+            bucket.cancel()
+            self._rejected[self.account(provider)] += 1
+            raise QuotaExhaustedError(provider, f"rate limit of {self.limit(self.account(provider))['per_minute']:g} requests per minute, "
+                                                f"next free slot in {wait:.1f}s")
+        self._waited[self.account(provider)] += wait
+        return wait
+
+    def acquire(self, provider: str) -> None:
+        """Wait for the provider's rate limit and count the request against its quotas."""
+        wait = self._reserve(provider)
+        try:
+            if wait:
+                time.sleep(wait)
+            self._count(provider, commit=True)
+        except BaseException:
+            # Quota used up by another process meanwhile, SQLite busy or interrupted: the request is not sent
+            self._release(provider)
+            raise
+
+    def _release(self, provider: str) -> None:
+        """Give back a rate limit slot taken by _reserve for a request that is not sent."""
+        bucket = self._bucket(self.account(provider))
+        if bucket is not None:
+            bucket.cancel()
+
+    async def aacquire(self, provider: str) -> None:
+        """
+        Async version of acquire; waiting does not block the event loop. The SQLite quota checks (which may
+        wait up to 30s for another process's lock) run in a worker thread, and a request cancelled before it
+        is counted (e.g. by the fan-out deadline) gives its rate limit slot back.
+        """
+        reservation = asyncio.ensure_future(asyncio.to_thread(self._reserve, provider))
+        try:
+            wait = await asyncio.shield(reservation)
+        except asyncio.CancelledError:
+            # The reservation finishes in its thread regardless; release the slot once it has one
+            reservation.add_done_callback(lambda done: done.cancelled() or done.exception() or self._release(provider))
+            raise
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._release(provider)
+            raise
+        counting = asyncio.ensure_future(asyncio.to_thread(self._count, provider, True))
+        try:
+            await asyncio.shield(counting)
+        except asyncio.CancelledError:
+            # The quota check runs to the end in its thread; the request is sent only if it was counted
+            counting.add_done_callback(lambda done: done.cancelled() or done.exception() is None or self._release(provider))
+            raise
+        except BaseException:
+            self._release(provider)
+            raise
+
+    def block(self, provider: str, until: datetime, reason: str) -> None:
+        """Refuse requests to the provider's account until `until` (persisted for later runs)."""
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO blocks (account, until, reason) VALUES (?, ?, ?)",
+                             (self.account(provider), until.timestamp(), reason))
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Rate limiter: {self.account(provider)} blocked until "
+              f"{until.strftime('%Y-%m-%d %H:%M')} UTC ({reason})")
+
+    def mark_exhausted(self, provider: str, reason: str) -> QuotaExhaustedError:
+        """Block the provider until its quota period ends, after it reported the quota as used up; return the error to raise."""
+        now = _utc_now()
+        limit = self.limit(self.account(provider))
+        until = _period_end("monthly" if limit["monthly"] and not limit["daily"] else "daily", now)
+        self.block(provider, until, reason)
+        return QuotaExhaustedError(provider, reason, until)
+
+    def report_response(self, provider: str, response: Any) -> None:
+        """Block the provider for its Retry-After (or `backoff`) seconds after a 429 Too Many Requests."""
+        if getattr(response, "status_code", None) == 429:
+            seconds = _retry_after(getattr(response, "headers", None), self.backoff)
+            self.block(provider, _utc_now() + timedelta(seconds=seconds), "429 Too Many Requests")
+
+    def print_stats(self) -> None:
+        periods = _periods(_utc_now())
+        with self._lock:
+            rows = self._db.execute("SELECT account, period, count FROM usage WHERE period IN (?, ?)",
+                                    (periods["daily"], periods["monthly"])).fetchall()
+        used = {(account, period): count for account, period, count in rows}
+        accounts = sorted(set(self._requests) | set(self._rejected))
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Provider quotas ({self.path})")
+        for account in accounts:
+            limit = self.limit(account)
+            quotas = ", ".join(
+                f"{period}: {used.get((account, periods[period]), 0)}/{int(limit[period])}"
+                for period in ("daily", "monthly") if limit[period]
+            ) or "no quota"
+            print(f"    {account:<12} requests: {self._requests[account]:<5} rejected: {self._rejected[account]:<5} "
+                  f"waited: {self._waited[account]:.1f}s  {quotas}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_limiter: Optional[ProviderLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def _limits_from_env() -> Dict[str, Dict[str, float]]:
+    limits = {account: dict(limit) for account, limit in DEFAULT_LIMITS.items()}
+    for name, value in os.environ.items():
+        if not value.strip():
+            continue
+        if name.startswith("RATE_LIMIT_") and name.endswith("_BURST"):
+            account, field = name[len("RATE_LIMIT_"):-len("_BURST")].lower(), "burst"
+        elif name.startswith("RATE_LIMIT_") and name not in ("RATE_LIMIT_ENABLED", "RATE_LIMIT_PATH", "RATE_LIMIT_MAX_WAIT", "RATE_LIMIT_BACKOFF"):
+            account, field = name[len("RATE_LIMIT_"):].lower(), "per_minute"
+        elif name.startswith("QUOTA_") and name.endswith(("_DAILY", "_MONTHLY")):
+            account, _, field = name[len("QUOTA_"):].lower().rpartition("_")
+        else:
+            continue
+        limits.setdefault(account, dict(NO_LIMITS))[field] = float(value)
+    return limits
+
+
+def get_rate_limiter() -> Optional[ProviderLimiter]:
+    """
+    Return the process-wide provider limiter, or None when RATE_LIMIT_ENABLED is false.
+
+    Settings: RATE_LIMIT_PATH, RATE_LIMIT_MAX_WAIT, RATE_LIMIT_BACKOFF and the per-account limits above.
+    """
+    global _limiter
+    if os.getenv("RATE_LIMIT_ENABLED", "true").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                from .response_cache import default_cache_dir
+                _limiter = ProviderLimiter(
+                    path=os.getenv("RATE_LIMIT_PATH") or os.path.join(default_cache_dir(), "provider_quota.sqlite"),
+                    limits=_limits_from_env(),
+                    max_wait=float(os.getenv("RATE_LIMIT_MAX_WAIT", 60)),
+                    backoff=float(os.getenv("RATE_LIMIT_BACKOFF", 60)),
+                )
+    return _limiter
+
+
+def quota_exhausted(provider: str, reason: str) -> QuotaExhaustedError:
+    """Record that a provider reported its quota as used up (e.g. Tavily's UsageLimitExceededError) and return the error to raise."""
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return QuotaExhaustedError(provider, reason)
+    return limiter.mark_exhausted(provider, reason)
+
+
+def print_quota_stats() -> None:
+    """Print provider request and quota counters if the limiter was used in this process."""
+    if _limiter is not None:
+        _limiter.print_stats()
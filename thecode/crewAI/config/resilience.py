@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+"""
+resilience.py: Retries, hedged requests and circuit breakers for the search provider calls.
+Every request that misses the response cache runs through the provider's policy:
+- transient failures (timeouts, connection errors, 500/502/503/504) are retried with exponential
+  backoff and full jitter, which is safe because the tools only send idempotent GETs and searches;
+- optionally (RESILIENCE_HEDGE), when a request is still running after the provider's p95 latency,
+  a second identical request is sent and whichever answers first wins;
+- after RESILIENCE_BREAKER_FAILURES failed calls in a row the provider's circuit opens, and calls
+  fail at once with ProviderUnavailableError for RESILIENCE_BREAKER_COOLDOWN seconds; then a single
+  trial call decides whether it closes again.
+One slow or dead API therefore no longer sets the pace of the whole crew.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # optional dependency of the async clients (http_client.py, AsyncTavilyClient)
+    httpx = None
+
+from .metrics import REGISTRY, observe_provider
+
+
+RETRY_STATUSES = (500, 502, 503, 504)
+_MIN_LATENCY_SAMPLES = 20
+
+
+class ProviderUnavailableError(RuntimeError):
+    """The provider's circuit is open after repeated failures; calls are refused until the cool-down ends."""
+
+    def __init__(self, provider: str, retry_in: float):
+        self.provider = provider
+        self.retry_in = retry_in
+        super().__init__(f"{provider} is failing and is skipped for the next {retry_in:.0f}s. Do not retry it; use another provider.")
+
+
+def _failed_response(result: Any) -> bool:
+    return getattr(result, "status_code", None) in RETRY_STATUSES
+
+
+def _retryable(error: BaseException) -> bool:
+    if isinstance(error, (requests.Timeout, requests.ConnectionError, asyncio.TimeoutError)):
+        return True
+    # SDK clients (e.g. Tavily) raise HTTPError from raise_for_status()
+    if isinstance(error, requests.HTTPError):
+        return getattr(error.response, "status_code", None) in RETRY_STATUSES
+    # Async SDK clients (AsyncTavilyClient) use httpx directly; map its errors as AsyncHTTPClient.get does
+    if httpx is not None:
+        if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRY_STATUSES
+    return False
+
+
+def _log(message: str) -> None:
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker of one provider.
+
+    Closed: calls pass. Open: calls are refused until `cooldown` seconds have passed. Half-open: one
+    trial call passes; its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, provider: str, failure_threshold: int = 5, cooldown: float = 120.0):
+        self.provider = provider
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.opens = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+            if remaining > 0 or self.probing:
+                self.rejected += 1
+                raise ProviderUnavailableError(self.provider, max(remaining, 0.0))
+            self.probing = True
+
+    def after_call(self, ok: Optional[bool]) -> None:
+        """Record a call outcome: True (success), False (provider failure) or None (no verdict, e.g. a bad API key)."""
+        with self._lock:
+            was_probing, self.probing = self.probing, False
+            if ok is None:
+                return
+            if ok:
+                if self.opened_at is not None:
+                    _log(f"Circuit breaker: {self.provider} recovered, circuit closed")
+                self.failures, self.opened_at = 0, None
+                return
+            self.failures += 1
+            if was_probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self.opens += 1
+                _log(f"Circuit breaker: {self.provider} failed {self.failures} times in a row, skipped for {self.cooldown:.0f}s")
+
+
+class ProviderPolicy:
+    """
+    Retry, hedging and circuit breaker settings shared by every provider, with per-provider state.
+
+    Args:
+        retries (int): Extra attempts after a transient failure.
+        backoff (float): Base delay in seconds; attempt n waits a random time up to backoff * 2**n.
+        max_backoff (float): Upper bound of a single retry delay.
+        hedge (bool): Send a second request when the first runs longer than the provider's p95 latency.
+        hedge_min_delay (float): Never hedge earlier than this many seconds.
+        failure_threshold (int): Failed calls in a row that open a provider's circuit.
+        cooldown (float): Seconds an open circuit refuses calls.
+    """
+
+    def __init__(self,
+                 retries: int = 2,
+                 backoff: float = 0.5,
+                 max_backoff: float = 8.0,
+                 hedge: bool = False,
+                 hedge_min_delay: float = 1.0,
+                 failure_threshold: int = 5,
+                 cooldown: float = 120.0):
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=200))
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker(provider, self.failure_threshold, self.cooldown)
+            return self._breakers[provider]
+
+    def p95(self, provider: str) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies[provider])
+        if len(samples) < _MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def _hedge_delay(self, provider: str) -> Optional[float]:
+        if not self.hedge:
+            return None
+        p95 = self.p95(provider)
+        return None if p95 is None else max(p95, self.hedge_min_delay)
+
+    def _record(self, provider: str, elapsed: float) -> None:
+        observe_provider(provider, elapsed)
+        with self._lock:
+            self._latencies[provider].append(elapsed)
+
+    def _count(self, provider: str, counter: str) -> None:
+        with self._lock:
+            self._counters[provider][counter] += 1
+
+    def _retry_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=int(os.getenv("RESILIENCE_HEDGE_WORKERS", 8)), thread_name_prefix="hedge")
+            return self._executor
+
+    # --- sync ---
+
+    def _hedged(self, provider: str, fetch: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        delay = self._hedge_delay(provider)
+        if delay is None:
+            result = fetch()
+        else:
+            first = self._pool().submit(fetch)
+            done, _ = wait([first], timeout=delay)
+            if done:
+                result = first.result()
+            else:
+                self._count(provider, "hedged")
+                second = self._pool().submit(fetch)
+                result = self._first_good([first, second], provider)
+        self._record(provider, time.perf_counter() - start)
+        return result
+
+    def _first_good(self, futures, provider: str) -> Any:
+        # The slower request cannot be cancelled once sent; its answer is dropped
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and not _failed_response(future.result()):
+                    if future is futures[1]:
+                        self._count(provider, "hedge_wins")
+                    return future.result()
+        return futures[0].result()
+
+    def call(self, provider: str, fetch: Callable[[], Any]) -> Any:
+        """Run `fetch()` (one provider request) with retries, hedging and the provider's circuit breaker."""
+        breaker = self.breaker(provider)
+        breaker.before_call()
+        ok = None
+        try:
+            for attempt in range(self.retries + 1):
+                self._count(provider, "calls" if attempt == 0 else "retries")
+                try:
+                    result = self._hedged(provider, fetch)
+                except Exception as e:
+                    if not _retryable(e):
+                        raise
+                    if attempt == self.retries:
+                        ok = False
+                        raise
+                else:
+                    if not _failed_response(result) or attempt == self.retries:
+                        ok = not _failed_response(result)
+                        return result
+                time.sleep(self._retry_delay(attempt))
+        finally:
+            breaker.after_call(ok)
+
+    # --- async ---
+
+    async def _ahedged(self, provider: str, afetch: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        delay = self._hedge_delay(provider)
+        if delay is None:
+            result = await afetch()
+            self._record(provider, time.perf_counter() - start)
+            return result
+        first = asyncio.ensure_future(afetch())
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self._count(provider, "hedged")
+                tasks.append(asyncio.ensure_future(afetch()))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and not _failed_response(task.result()):
+                        if len(tasks) > 1 and task is tasks[1]:
+                            self._count(provider, "hedge_wins")
+                        self._record(provider, time.perf_counter() - start)
+                        return task.result()
+            return first.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def acall(self, provider: str, afetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Async version of call; `afetch()` returns an awaitable and hedged requests run on the same loop."""
+        breaker = self.breaker(provider)
+        breaker.before_call()
+        ok = None
+        try:
+            for attempt in range(self.retries + 1):
+                self._count(provider, "calls" if attempt == 0 else "retries")
+                try:
+                    result = await self._ahedged(provider, afetch)
+                except Exception as e:
+                    if not _retryable(e):
+                        raise
+                    if attempt == self.retries:
+                        ok = False
+                        raise
+                else:
+                    if not _failed_response(result) or attempt == self.retries:
+                        ok = not _failed_response(result)
+                        return result
+                await asyncio.sleep(self._retry_delay(attempt))
+        finally:
+            breaker.after_call(ok)
+
+    def metric_families(self):
+        """Retry, hedging and circuit breaker counters for the metrics export."""
+        with self._lock:
+            counters = {provider: dict(values) for provider, values in self._counters.items()}
+            breakers = dict(self._breakers)
+        families = [
+            (f"crewai_provider_{counter}_total", "counter", help, [({"provider": provider}, values.get(counter, 0)) for provider, values in sorted(counters.items())])
+            for counter, help in (("calls", "Provider calls that missed the response cache."),
+                                  ("retries", "Retried provider requests."),
+                                  ("hedged", "Hedged (duplicate) provider requests."),
+                                  ("hedge_wins", "Hedged requests that answered first."))
+        ]
+        families.append(("crewai_provider_circuit_opened_total", "counter", "Times a provider's circuit opened.",
+                         [({"provider": name}, breaker.opens) for name, breaker in sorted(breakers.items())]))
+        families.append(("crewai_provider_circuit_rejected_total", "counter", "Calls refused by an open circuit.",
+                         [({"provider": name}, breaker.rejected) for name, breaker in sorted(breakers.items())]))
+        return families
+
+    def print_stats(self) -> None:
+        with self._lock:
+            providers = sorted(self._counters)
+        if not providers:
+            return
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Provider resilience (retries: {self.retries}, hedging: {'on' if self.hedge else 'off'})")
+        for provider in providers:
+            counters = self._counters[provider]
+            breaker = self.breaker(provider)
+            p95 = self.p95(provider)
+            print(f"    {provider:<16} calls: {counters['calls']:<5} retries: {counters['retries']:<4} "
+                  f"hedged: {counters['hedged']:<4} hedge wins: {counters['hedge_wins']:<4} "
+                  f"circuit opened: {breaker.opens:<3} skipped: {breaker.rejected:<4} "
+                  f"p95: {f'{p95:.2f}s' if p95 is not None else '-'}")
+
+
+_policy: Optional[ProviderPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_provider_policy() -> ProviderPolicy:
+    """
+    Return the process-wide provider policy.
+
+    Settings: RESILIENCE_RETRIES, RESILIENCE_BACKOFF, RESILIENCE_MAX_BACKOFF, RESILIENCE_HEDGE,
+    RESILIENCE_HEDGE_MIN_DELAY, RESILIENCE_HEDGE_WORKERS, RESILIENCE_BREAKER_FAILURES and
+    RESILIENCE_BREAKER_COOLDOWN.
+    """
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                _policy = ProviderPolicy(
+                    retries=int(os.getenv("RESILIENCE_RETRIES", 2)),
+                    backoff=float(os.getenv("RESILIENCE_BACKOFF", 0.5)),
+                    max_backoff=float(os.getenv("RESILIENCE_MAX_BACKOFF", 8)),
+                    hedge=_env_flag("RESILIENCE_HEDGE"),
+                    hedge_min_delay=float(os.getenv("RESILIENCE_HEDGE_MIN_DELAY", 1)),
+                    failure_threshold=int(os.getenv("RESILIENCE_BREAKER_FAILURES", 5)),
+                    cooldown=float(os.getenv("RESILIENCE_BREAKER_COOLDOWN", 120)),
+                )
+                REGISTRY.register_collector(_policy.metric_families)
+    return _policy
+
+
+def print_resilience_stats() -> None:
+    """Print retry, hedging and circuit breaker counters if any provider was called in this process."""
+    if _policy is not None:
+        _policy.print_stats()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+"""
+response_cache.py: Persistent, disk-backed cache of search provider responses.
+Responses are stored in SQLite keyed on the provider, endpoint and normalized request parameters
+(API keys and other secrets are never part of the key). Every provider has its own TTL - minutes for
+news endpoints, days for Knowledge Graph entities - and the cache is kept under a size cap by evicting
+the least recently used entries. Unlike CrewAI's in-process `cache=True`, entries survive the process,
+so re-running a topic does not pay the same API latency and quota again. Requests that miss the cache
+pass the provider's rate limiter and quota counters (rate_limiter.py) before they are sent, and are
+retried, hedged and circuit-broken per provider (resilience.py).
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .http_client import get_async_http_client, get_http_client
+from .metrics import REGISTRY
+from .rate_limiter import get_rate_limiter
+from .resilience import get_provider_policy
+
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# Time-to-live per provider, in seconds. Override with RESPONSE_CACHE_TTL_<PROVIDER>, e.g. RESPONSE_CACHE_TTL_BING_NEWS=600
+DEFAULT_TTLS = {
+    "bing_web": 6 * HOUR,
+    "bing_news": 15 * MINUTE,
+    "mediastack": 15 * MINUTE,
+    "newsapi": 15 * MINUTE,
+    "newsdata": 15 * MINUTE,
+    "tavily_news": 15 * MINUTE,
+    "tavily_general": 6 * HOUR,
+    "tavily_context": 6 * HOUR,
+    "tavily_qna": 6 * HOUR,
+    "serpapi": 6 * HOUR,
+    "serpapi_kg": 7 * DAY,
+    "google_kg": 7 * DAY,
+}
+DEFAULT_TTL = HOUR
+
+# Parameter names that carry credentials; they are dropped before building the cache key
+SECRET_PARAMS = {"apikey", "api_key", "access_key", "key", "subscription_key", "token", "ocp-apim-subscription-key"}
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, (list, tuple, set)):
+        return sorted((_normalize(v) for v in value), key=str)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items()) if v is not None}
+    return value
+
+
+def normalize_params(params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Drop secrets and None values, collapse whitespace, sort keys and list values."""
+    return {
+        str(k): _normalize(v)
+        for k, v in sorted((params or {}).items())
+        if v is not None and str(k).lower() not in SECRET_PARAMS
+    }
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache with per-provider TTLs and size-bounded LRU eviction.
+
+    Args:
+        path (str): Location of the SQLite database file.
+        ttls (dict): Provider name to time-to-live in seconds.
+        default_ttl (int): TTL for providers missing from `ttls`.
+        max_bytes (int): Upper bound of the stored (compressed) payload size.
+        label (str): Name used in the statistics printout.
+    """
+
+    def __init__(self,
+                 path: str,
+                 ttls: Optional[Dict[str, int]] = None,
+                 default_ttl: int = DEFAULT_TTL,
+                 max_bytes: int = 256 * 1024 * 1024,
+                 label: str = "Response cache"):
+        self.path = path
+        self.label = label
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, provider TEXT NOT NULL, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._db.commit()
+
+    def ttl_for(self, provider: str) -> int:
+        return int(self.ttls.get(provider, self.default_ttl))
+
+    @staticmethod
+    def make_key(provider: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps([provider, endpoint, normalize_params(params)], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, provider: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Tuple[bool, Any]:
+        """Return (hit, value). Expired entries count as misses."""
+        key = self.make_key(provider, endpoint, params)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                self._misses[provider] += 1
+                return False, None
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self._hits[provider] += 1
+        return True, json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def set(self, provider: str, endpoint: str, params: Optional[Dict[str, Any]], value: Any, ttl: Optional[int] = None) -> None:
+        ttl = self.ttl_for(provider) if ttl is None else ttl
+        if ttl <= 0:
+            return
+        key = self.make_key(provider, endpoint, params)
+        blob = zlib.compress(json.dumps(value, default=str).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, provider, value, size, created, expires, accessed) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, blob, len(blob), now, now + ttl, now),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def get_or_set(self,
+                   provider: str,
+                   endpoint: str,
+                   params: Optional[Dict[str, Any]],
+                   fetch: Callable[[], Any],
+                   cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return the cached value, or call `fetch()` and store its result when `cacheable(result)` allows it."""
+        hit, value = self.get(provider, endpoint, params)
+        if hit:
+            return value
+        value = fetch()
+        if cacheable is None or cacheable(value):
+            self.set(provider, endpoint, params, value)
+        return value
+
+    def _evict(self, now: float) -> None:
+        # Caller holds the lock
+        self._db.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed ASC"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def clear(self, provider: Optional[str] = None) -> None:
+        with self._lock:
+            if provider is None:
+                self._db.execute("DELETE FROM entries")
+            else:
+                self._db.execute("DELETE FROM entries WHERE provider = ?", (provider,))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit/miss counters of this process, per provider."""
+        result = {}
+        for provider in sorted(set(self._hits) | set(self._misses)):
+            hits, misses = self._hits[provider], self._misses[provider]
+            result[provider] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+        return result
+
+    def metric_families(self):
+        """Hits and misses per provider for the metrics export."""
+        samples = []
+        for provider, counters in self.stats().items():
+            samples.append(({"provider": provider, "result": "hit"}, counters["hits"]))
+            samples.append(({"provider": provider, "result": "miss"}, counters["misses"]))
+        return [("crewai_response_cache_requests_total", "counter", "Response cache lookups of search provider requests.", samples)]
+
+    def print_stats(self) -> None:
+        stats = self.stats()
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {self.label}: {entries} entries, {size / 1024 / 1024:.1f} MB ({self.path})")
+        for provider, counters in stats.items():
+            print(f"    {provider:<16} hits: {counters['hits']:<5} misses: {counters['misses']:<5} hit rate: {counters['hit_rate']:.0%}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class CachedResponse:
+    """requests.Response look-alike served from the cache (always a successful 200 response)."""
+
+    status_code = 200
+    reason = "OK"
+
+    def __init__(self, url: str, text: str):
+        self.url = url
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = {"X-Response-Cache": "hit"}
+
+    def json(self, **kwargs):
+        return json.loads(self.text, **kwargs)
+
+    def raise_for_status(self):
+        return None
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+# Set by fresh_responses(): requests made in this context skip the cache lookup
+_fresh: contextvars.ContextVar = contextvars.ContextVar("fresh_responses", default=False)
+
+
+def _cache_enabled() -> bool:
+    return os.getenv("RESPONSE_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def default_cache_dir() -> str:
+    storage_dir = os.getenv("CREWAI_STORAGE_DIR") or os.path.join(os.path.expanduser("~"), ".crewai_cache")
+    return storage_dir.strip("'\"")
+
+
+@contextmanager
+def fresh_responses():
+    """
+    Within the block, requests made in this context (and tasks started from it) skip the cache lookup;
+    their answers are still stored. Used where a cached answer would hide new results, e.g. the news monitor.
+    """
+    token = _fresh.set(True)
+    try:
+        yield
+    finally:
+        _fresh.reset(token)
+
+
+def _lookup(cache: ResponseCache, provider: str, endpoint: str, params: Optional[Dict[str, Any]]) -> Tuple[bool, Any]:
+    return (False, None) if _fresh.get() else cache.get(provider, endpoint, params)
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Return the process-wide response cache, or None when RESPONSE_CACHE_ENABLED is false.
+
+    Settings: RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_MB and RESPONSE_CACHE_TTL_<PROVIDER> (seconds).
+    """
+    global _cache
+    if not _cache_enabled():
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                ttls = dict(DEFAULT_TTLS)
+                for name, value in os.environ.items():
+                    if name.startswith("RESPONSE_CACHE_TTL_") and value.strip():
+                        ttls[name[len("RESPONSE_CACHE_TTL_"):].lower()] = int(value)
+                _cache = ResponseCache(
+                    path=os.getenv("RESPONSE_CACHE_PATH") or os.path.join(default_cache_dir(), "response_cache.sqlite"),
+                    ttls=ttls,
+                    max_bytes=int(float(os.getenv("RESPONSE_CACHE_MAX_MB", 256)) * 1024 * 1024),
+                )
+                REGISTRY.register_collector(_cache.metric_families)
+    return _cache
+
+
+def _limited_get(provider: str, url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]):
+    limiter = get_rate_limiter()
+
+    def fetch():
+        if limiter is not None:
+            limiter.acquire(provider)
+        response = get_http_client().get(url, params=params, headers=headers)
+        if limiter is not None:
+            limiter.report_response(provider, response)
+        return response
+
+    return get_provider_policy().call(provider, fetch)
+
+
+async def _limited_aget(provider: str, url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]):
+    limiter = get_rate_limiter()
+
+    async def afetch():
+        if limiter is not None:
+            await limiter.aacquire(provider)
+        response = await get_async_http_client().get(url, params=params, headers=headers)
+        if limiter is not None:
+            limiter.report_response(provider, response)
+        return response
+
+    return await get_provider_policy().acall(provider, afetch)
+
+
+def _limited_call(provider: str, fetch: Callable[[], Any]) -> Any:
+    limiter = get_rate_limiter()
+
+    def limited_fetch():
+        if limiter is not None:
+            limiter.acquire(provider)
+        return fetch()
+
+    return get_provider_policy().call(provider, limited_fetch)
+
+
+async def _limited_acall(provider: str, afetch: Callable[[], Awaitable[Any]]) -> Any:
+    limiter = get_rate_limiter()
+
+    async def limited_afetch():
+        if limiter is not None:
+            await limiter.aacquire(provider)
+        return await afetch()
+
+    return await get_provider_policy().acall(provider, limited_afetch)
+
+
+def cached_get(provider: str, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None):
+    """
+    GET through the shared HTTP client with the persistent response cache in front of it.
+
+    Only successful (200) responses are stored. Headers are never part of the cache key.
+    Cache misses wait for the provider's rate limit and are retried on transient failures; they raise
+    QuotaExhaustedError or ProviderUnavailableError when the provider must not be called.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return _limited_get(provider, url, params, headers)
+    hit, text = _lookup(cache, provider, url, params)
+    if hit:
+        return CachedResponse(url, text)
+    response = _limited_get(provider, url, params, headers)
+    if response.status_code == 200:
+        cache.set(provider, url, params, response.text)
+    return response
+
+
+async def cached_aget(provider: str, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None):
+    """
+    Async version of cached_get, using the shared async HTTP client.
+    The SQLite reads and writes (which take the cache lock and may evict) run in a worker thread, not on the event loop.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return await _limited_aget(provider, url, params, headers)
+    hit, text = await asyncio.to_thread(_lookup, cache, provider, url, params)
+    if hit:
+        return CachedResponse(url, text)
+    response = await _limited_aget(provider, url, params, headers)
+    if response.status_code == 200:
+        await asyncio.to_thread(cache.set, provider, url, params, response.text)
+    return response
+
+
+def cached_call(provider: str, endpoint: str, params: Optional[Dict[str, Any]], fetch: Callable[[], Any]) -> Any:
+    """Cache the result of an SDK call (e.g. Tavily) the same way cached_get caches HTTP responses."""
+    cache = get_response_cache()
+    if cache is None:
+        return _limited_call(provider, fetch)
+    if _fresh.get():
+        value = _limited_call(provider, fetch)
+        cache.set(provider, endpoint, params, value)
+        return value
+    return cache.get_or_set(provider, endpoint, params, lambda: _limited_call(provider, fetch))
+
+
+async def cached_acall(provider: str, endpoint: str, params: Optional[Dict[str, Any]], afetch: Callable[[], Awaitable[Any]]) -> Any:
+    """Async version of cached_call; `afetch` returns an awaitable. Cache I/O runs in a worker thread, as in cached_aget."""
+    cache = get_response_cache()
+    if cache is None:
+        return await _limited_acall(provider, afetch)
+    hit, value = await asyncio.to_thread(_lookup, cache, provider, endpoint, params)
+    if hit:
+        return value
+    value = await _limited_acall(provider, afetch)
+    await asyncio.to_thread(cache.set, provider, endpoint, params, value)
+    return value
+
+
+def print_cache_stats() -> None:
+    """Print response cache statistics if the cache was used in this process."""
+    if _cache is not None:
+        _cache.print_stats()
@@ -1,11 +1,22 @@
 from crewai_tools import BaseTool
 import os
-from serpapi import GoogleSearch
 from dotenv import load_dotenv
 
+from .response_cache import cached_aget, cached_get
+
 # Load environment variables
 load_dotenv()
 SERPAPI_API_KEY = os.getenv('SERPAPI_API_KEY')
+SERPAPI_SEARCH_URL = "https://serpapi.com/search.json"
+
+
+def _serpapi_search(params: dict, provider: str = "serpapi") -> dict:
+    # Same endpoint GoogleSearch.get_dict() calls, but over the shared keep-alive client and response cache
+    return cached_get(provider, SERPAPI_SEARCH_URL, params=params).json()
+
+
+async def _serpapi_asearch(params: dict, provider: str = "serpapi") -> dict:
+    return (await cached_aget(provider, SERPAPI_SEARCH_URL, params=params)).json()
 
 # Knowledge Graph Tool
 class KnowledgeGraphTool(BaseTool):
@@ -16,13 +27,19 @@ class KnowledgeGraphTool(BaseTool):
     )
 
     def _run(self, query: str) -> dict:
-        params = {
+        return self._parse_results(_serpapi_search(self._build_params(query), provider="serpapi_kg"))
+
+    async def _arun(self, query: str) -> dict:
+        return self._parse_results(await _serpapi_asearch(self._build_params(query), provider="serpapi_kg"))
+
+    def _build_params(self, query: str) -> dict:
+        return {
             'engine': 'google',
             'q': query,
             'api_key': SERPAPI_API_KEY
         }
-        search = GoogleSearch(params)
-        results = search.get_dict()
+
+    def _parse_results(self, results: dict) -> dict:
         knowledge_graph = results.get('knowledge_graph', None)
         return {"knowledge_graph": knowledge_graph} if knowledge_graph else {"error": "No Knowledge Graph data found."}
 
@@ -35,13 +52,19 @@ class OrganicSearchTool(BaseTool):
     )
 
     def _run(self, query: str) -> dict:
-        params = {
+        return self._parse_results(_serpapi_search(self._build_params(query)))
+
+    async def _arun(self, query: str) -> dict:
+        return self._parse_results(await _serpapi_asearch(self._build_params(query)))
+
+    def _build_params(self, query: str) -> dict:
+        return {
             "engine": "google",
             "q": query,
             "api_key": SERPAPI_API_KEY
         }
-        search = GoogleSearch(params)
-        results = search.get_dict()
+
+    def _parse_results(self, results: dict) -> dict:
         organic_results = results.get("organic_results", None)
 
         return organic_results
\ No newline at end of file
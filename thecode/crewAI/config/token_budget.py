@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+"""
+token_budget.py: Live token and cost accounting per agent, task and LLM preset, with budgets.
+Every LLM preset is a BudgetedLLM: each completion is counted (prompt and completion tokens from the
+response's usage, and the cost when litellm knows the model's price) under the agent and task that made it.
+track_tokens() starts a crew run at its first task and task_finished(), called from the crews' task_callback,
+moves it to the next one. When a task goes over its budget (TOKEN_BUDGET_TASK or
+TOKEN_BUDGET_TASK_<TASK_NAME>) or the crew run over TOKEN_BUDGET_RUN, TOKEN_BUDGET_ACTION decides:
+"downgrade" sends the remaining calls to the economy deployment (TOKEN_BUDGET_ECONOMY_DEPLOYMENT),
+"abort" stops the run with TokenBudgetExceededError (resume it later with --resume) and "warn" only logs.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import contextvars
+import os
+import re
+import threading
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai import LLM
+
+from .metrics import REGISTRY, Counter
+from .output_formatter import estimate_tokens
+
+try:
+    import litellm
+    from litellm.integrations.custom_logger import CustomLogger
+except ImportError:  # crewai installs it; without it tokens are estimated and costs stay unknown
+    litellm = None
+    CustomLogger = object
+
+
+ACTIONS = ("downgrade", "abort", "warn")
+
+LLM_TOKENS = REGISTRY.add(Counter("crewai_llm_tokens_total", "LLM tokens by preset, agent, task and kind (prompt or completion).", ("preset", "agent", "task", "kind")))
+LLM_COST = REGISTRY.add(Counter("crewai_llm_cost_total", "Estimated LLM cost in USD by preset and task.", ("preset", "task")))
+
+# Where the current LLM call comes from; set by track_tokens() and task_finished() in the thread running the crew
+_run = contextvars.ContextVar("token_run", default="")
+_agent = contextvars.ContextVar("token_agent", default="")
+_task = contextvars.ContextVar("token_task", default="")
+# (task name, agent role) of the crew's tasks in execution order
+_plan = contextvars.ContextVar("token_plan", default=())
+
+
+class TokenBudgetExceededError(RuntimeError):
+    """A task or crew run went over its token budget and TOKEN_BUDGET_ACTION is abort."""
+
+
+def _log(message: str) -> None:
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+
+def _env_name(name: str) -> str:
+    return re.sub(r"[^A-Z0-9]+", "_", name.upper()).strip("_")
+
+
+def count_tokens(model: Optional[str], messages: Any = None, text: Optional[str] = None) -> int:
+    """Tokens of chat messages or a text, with litellm's tokenizer for the model, or estimated."""
+    if litellm is not None:
+        try:
+            if text is not None:
+                return int(litellm.token_counter(model=model or "gpt-4o", text=text))
+            if isinstance(messages, str):
+                return int(litellm.token_counter(model=model or "gpt-4o", text=messages))
+            return int(litellm.token_counter(model=model or "gpt-4o", messages=messages))
+        except Exception:
+            pass
+    if text is None:
+        text = messages if isinstance(messages, str) else " ".join(str(message.get("content", "")) for message in messages or [])
+    return estimate_tokens(text or "")
+
+
+def token_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """USD cost from litellm's price table, or None when the model is unknown."""
+    if litellm is None or not model:
+        return None
+    try:
+        prompt_cost, completion_cost = litellm.cost_per_token(model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return prompt_cost + completion_cost
+    except Exception:
+        return None
+
+
+class TokenLedger:
+    """
+    Token and cost totals per (run, preset, agent, task), and the budget checks made before each call.
+
+    Args:
+        run_budget (int): Tokens one crew run may use; 0 disables.
+        task_budget (int): Tokens one task may use unless TOKEN_BUDGET_TASK_<TASK_NAME> says otherwise; 0 disables.
+        action (str): What happens over budget: "downgrade", "abort" or "warn".
+        economy_deployment (str): Azure deployment of the cheaper model used by "downgrade".
+    """
+
+    def __init__(self,
+                 run_budget: int = 0,
+                 task_budget: int = 0,
+                 action: str = "downgrade",
+                 economy_deployment: str = ""):
+        if action not in ACTIONS:
+            raise ValueError(f"TOKEN_BUDGET_ACTION must be one of {', '.join(ACTIONS)}, not '{action}'")
+        self.run_budget = run_budget
+        self.task_budget = task_budget
+        self.action = action
+        self.economy_deployment = economy_deployment
+        self._lock = threading.Lock()
+        # (run, preset, agent, task) -> [calls, prompt tokens, completion tokens, cost]
+        self._usage: Dict[Tuple[str, str, str, str], List[float]] = defaultdict(lambda: [0, 0, 0, 0.0])
+        self._unpriced = set()
+        self._economy: Dict[str, "BudgetedLLM"] = {}
+        self._reported = set()
+
+    def task_limit(self, task: str) -> int:
+        value = os.getenv(f"TOKEN_BUDGET_TASK_{_env_name(task)}", "").strip() if task else ""
+        return int(value) if value else self.task_budget
+
+    def tokens(self, run: str, task: Optional[str] = None) -> int:
+        with self._lock:
+            return int(sum(entry[1] + entry[2] for key, entry in self._usage.items()
+                           if key[0] == run and (task is None or key[3] == task)))
+
+    def _over_budget(self, run: str, task: str) -> Optional[str]:
+        limit = self.task_limit(task)
+        if limit and task and self.tokens(run, task) >= limit:
+            return f"task '{task}' used {self.tokens(run, task)} of its {limit} tokens"
+        if self.run_budget and self.tokens(run) >= self.run_budget:
+            return f"the run used {self.tokens(run)} of its {self.run_budget} tokens"
+        return None
+
+    def before_call(self, llm: "BudgetedLLM") -> Optional["BudgetedLLM"]:
+        """Apply the budget action; return the economy LLM when the call is downgraded."""
+        run, task = _run.get(), _task.get()
+        reason = self._over_budget(run, task)
+        if reason is None or llm.is_economy:
+            return None
+        if self.action == "abort":
+            raise TokenBudgetExceededError(f"Token budget exceeded: {reason}. The run is stopped; continue it with --resume after raising the budget.")
+        economy = self.economy_llm(llm) if self.action == "downgrade" else None
+        once = (run, task, self.action)
+        with self._lock:
+            first_time = once not in self._reported
+            self._reported.add(once)
+        if first_time:
+            if economy is not None:
+                _log(f"Token budget: {reason}; further calls use the economy deployment '{self.economy_deployment}'")
+            else:
+                _log(f"Token budget: {reason}" + ("; set TOKEN_BUDGET_ECONOMY_DEPLOYMENT to downgrade" if self.action == "downgrade" else ""))
+        return economy
+
+    def economy_llm(self, llm: "BudgetedLLM") -> Optional["BudgetedLLM"]:
+        if not self.economy_deployment:
+            return None
+        with self._lock:
+            if llm.preset not in self._economy:
+                config = dict(llm.llm_config, model=f"azure/{self.economy_deployment}")
+                economy = BudgetedLLM(preset=f"{llm.preset}-economy", price_model=os.getenv("TOKEN_BUDGET_ECONOMY_MODEL") or None, **config)
+                economy.is_economy = True
+                self._economy[llm.preset] = economy
+            return self._economy[llm.preset]
+
+    def record(self, llm: "BudgetedLLM", messages: Any, answer: Any, usage: Any = None) -> None:
+        """Count one completion; `usage` is the response's usage, counted with the tokenizer only when it is missing."""
+        model = llm.price_model
+        prompt_tokens = _usage_field(usage, "prompt_tokens")
+        completion_tokens = _usage_field(usage, "completion_tokens")
+        if prompt_tokens is None or completion_tokens is None:
+            prompt_tokens = count_tokens(model, messages=messages)
+            completion_tokens = count_tokens(model, text=answer if isinstance(answer, str) else str(answer or ""))
+        cost = token_cost(model, prompt_tokens, completion_tokens)
+        run, agent, task = _run.get(), _agent.get(), _task.get()
+        with self._lock:
+            entry = self._usage[(run, llm.preset, agent, task)]
+            entry[0] += 1
+            entry[1] += prompt_tokens
+            entry[2] += completion_tokens
+            if cost is None:
+                self._unpriced.add(llm.preset)
+            else:
+                entry[3] += cost
+        LLM_TOKENS.inc((llm.preset, agent, task, "prompt"), prompt_tokens)
+        LLM_TOKENS.inc((llm.preset, agent, task, "completion"), completion_tokens)
+        if cost:
+            LLM_COST.inc((llm.preset, task), cost)
+
+    def totals(self, field: int) -> List[Tuple[str, List[float]]]:
+        """Usage summed by one key field (1 preset, 2 agent, 3 task), largest first."""
+        sums: Dict[str, List[float]] = defaultdict(lambda: [0, 0, 0, 0.0])
+        with self._lock:
+            for key, entry in self._usage.items():
+                for i, value in enumerate(entry):
+                    sums[key[field] or "(none)"][i] += value
+        return sorted(sums.items(), key=lambda item: item[1][1] + item[1][2], reverse=True)
+
+    def print_report(self) -> None:
+        with self._lock:
+            if not self._usage:
+                return
+        _log("Token usage (prompt + completion tokens, cost from litellm prices)")
+        for title, field in (("preset", 1), ("agent", 2), ("task", 3)):
+            print(f"  by {title}:")
+            for name, (calls, prompt, completion, cost) in self.totals(field):
+                print(f"    {name[:44]:<45} calls: {int(calls):<5} tokens: {int(prompt + completion):<8} "
+                      f"(prompt {int(prompt)}, completion {int(completion)})  ${cost:.4f}")
+        if self._unpriced:
+            print(f"    no price known for: {', '.join(sorted(self._unpriced))} (set AZURE_CHAT_DEPLOYMENT_MODEL / TOKEN_BUDGET_ECONOMY_MODEL)")
+
+
+def _usage_field(usage: Any, name: str) -> Optional[int]:
+    value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+    return int(value) if isinstance(value, (int, float)) else None
+
+
+class _UsageCapture(CustomLogger):
+    """LLM.call callback that keeps the usage of the provider's response, as crewai's own token counter does."""
+
+    def __init__(self):
+        super().__init__()
+        self.usage = None
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        self.usage = response_obj.get("usage") if isinstance(response_obj, dict) else getattr(response_obj, "usage", None)
+
+
+class BudgetedLLM(LLM):
+    """
+    crewai.LLM that counts every completion in the token ledger and applies the token budgets.
+
+    Args:
+        preset (str): Name of the LLM preset, used in the accounting.
+        price_model (str): litellm model name used for token counting and prices (e.g. gpt-4o);
+            the Azure deployment name in `model` usually does not identify the model.
+    """
+
+    def __init__(self, preset: str = "llm", price_model: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.preset = preset
+        self.price_model = price_model
+        self.llm_config = dict(kwargs)
+        self.is_economy = False
+
+    def complete(self, messages, *args, **kwargs) -> Tuple[Any, bool]:
+        """Return the completion and whether it was served without calling the model."""
+        return super().call(messages, *args, **kwargs), False
+
+    def call(self, messages, *args, **kwargs):
+        ledger = get_token_ledger()
+        economy = ledger.before_call(self)
+        if economy is not None:
+            return economy.call(messages, *args, **kwargs)
+        capture = _UsageCapture()
+        if len(args) > 1:  # callbacks passed positionally after tools
+            args = (args[0], [*(args[1] or []), capture], *args[2:])
+        else:
+            kwargs["callbacks"] = [*(kwargs.get("callbacks") or []), capture]
+        answer, served = self.complete(messages, *args, **kwargs)
+        if not served:
+            ledger.record(self, messages, answer, capture.usage)
+        return answer
+
+
+def _start_task(name: str, agent: str) -> None:
+    _task.set(name)
+    _agent.set(agent)
+
+
+def track_tokens(crew: Any, run_name: str) -> None:
+    """
+    Start a new run scope for the run budget and attribute the next LLM calls to the crew's first task.
+
+    Call it in the thread that calls crew.kickoff(), before kickoff; task_finished() moves the
+    attribution on from the crews' task_callback. Attribution follows the task order, so while an async
+    task runs alongside later tasks, their calls count under the async task; its own calls count under
+    the run when CrewAI runs it in a copy of this thread's context.
+    """
+    manager = getattr(crew, "manager_agent", None)
+    manager_role = manager.role if manager is not None else ""
+    plan = tuple((task.name or task.description[:60], task.agent.role if task.agent else manager_role) for task in crew.tasks)
+    _run.set(run_name)
+    _plan.set(plan)
+    _start_task(*(plan[0] if plan else ("", "")))
+
+
+def task_finished(output: Any) -> None:
+    """Report the tokens of a finished task (a TaskOutput passed to task_callback) and count the next calls under the next task."""
+    name = output.name or output.description[:60]
+    ledger = get_token_ledger()
+    limit = ledger.task_limit(name)
+    _log(f"Tokens: '{name}' used {ledger.tokens(_run.get(), name)}" + (f" of its {limit} budget" if limit else ""))
+    names = [task_name for task_name, _ in _plan.get()]
+    if name in names and names.index(name) + 1 < len(names):
+        _start_task(*_plan.get()[names.index(name) + 1])
+
+
+_ledger: Optional[TokenLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_token_ledger() -> TokenLedger:
+    """
+    Return the process-wide token ledger.
+
+    Settings: TOKEN_BUDGET_RUN, TOKEN_BUDGET_TASK, TOKEN_BUDGET_TASK_<TASK_NAME>, TOKEN_BUDGET_ACTION
+    and TOKEN_BUDGET_ECONOMY_DEPLOYMENT.
+    """
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = TokenLedger(
+                    run_budget=int(os.getenv("TOKEN_BUDGET_RUN") or 0),
+                    task_budget=int(os.getenv("TOKEN_BUDGET_TASK") or 0),
+                    action=os.getenv("TOKEN_BUDGET_ACTION", "downgrade").strip().lower(),
+                    economy_deployment=os.getenv("TOKEN_BUDGET_ECONOMY_DEPLOYMENT", "").strip(),
+                )
+    return _ledger
+
+
+def print_token_report() -> None:
+    """Print token usage by preset, agent and task if any LLM call was counted in this process."""
+    if _ledger is not None:
+        _ledger.print_report()
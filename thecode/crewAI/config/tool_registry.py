@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+tool_registry.py: Lazy, on-demand registry of CrewAI tools.
+Tools are registered as factories and constructed the first time a Task asks for them, so a crew
+only pays for the tools it actually uses. The registry keeps the plain `tools['name']` dict interface
+and records how long each tool took to build for the startup report. Built tools are instrumented
+for the run metrics (metrics.py).
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import threading
+import time
+
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from .metrics import instrument_tool
+
+
+class LazyToolRegistry(Mapping):
+    """
+    Read-only mapping of tool name to tool instance, built lazily from registered factories.
+
+    Iterating over the registry (keys(), len(), `in`) never builds a tool; only item access does.
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], Any]] = None):
+        self._factories: Dict[str, Callable[[], Any]] = dict(factories or {})
+        self._instances: Dict[str, Any] = {}
+        self._build_times: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._reported = False
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """Register (or replace) the factory for a tool. An already built instance is discarded."""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+            self._build_times.pop(name, None)
+
+    def __getitem__(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            factory = self._factories[name]
+            start = time.perf_counter()
+            instance = instrument_tool(name, factory())
+            self._build_times[name] = time.perf_counter() - start
+            self._instances[name] = instance
+            return instance
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._factories
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def build_report(self) -> List[Tuple[str, float]]:
+        """Return (tool name, build seconds) for every built tool, slowest first."""
+        return sorted(self._build_times.items(), key=lambda item: item[1], reverse=True)
+
+    def print_build_report(self, once: bool = False) -> None:
+        """
+        Print how long each tool took to build and which registered tools were never built.
+
+        With once, only the first call prints, e.g. for the first crew of a batch.
+        """
+        with self._lock:
+            if once and self._reported:
+                return
+            self._reported = True
+        report = self.build_report()
+        total = sum(seconds for _, seconds in report)
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Tool startup report: {len(report)}/{len(self)} tools built in {total:.2f}s")
+        for name, seconds in report:
+            print(f"    {name:<20} {seconds:8.3f}s")
+        skipped = [name for name in self._factories if name not in self._instances]
+        if skipped:
+            print(f"    not built: {', '.join(skipped)}")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+topic_batch.py: Batch mode (--topics_file) of the PROD crew scripts.
+The script imports config, builds the LLM presets and the tool registry once; each topic of the file then
+gets its own crew (agents and tasks hold per-run state, so they are not shared) and its own output folder,
+and up to `concurrency` topics run at the same time on a thread pool. Crews spend most of their time
+waiting on LLM and search calls, so a few topics in flight overlap that waiting. CrewAI's crew memory
+is a single store keyed by agent role, so the scripts turn it off when more than one topic runs at a time.
+A failing topic is reported in the summary and does not stop the batch.
+author: https://github.com/voytas75
+repo: https://github.com/voytas75/VoytasCodeLab
+"""
+
+__author__ = 'https://github.com/voytas75'
+
+
+import os
+import re
+import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+
+def log(message: str) -> None:
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+
+def load_topics(path: str) -> List[str]:
+    """Topics of a topics file: one per line, blank lines and lines starting with # skipped, repeats dropped."""
+    topics: List[str] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            topic = line.strip()
+            if topic and not topic.startswith("#") and topic not in topics:
+                topics.append(topic)
+    return topics
+
+
+def topic_folder_name(index: int, topic: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", topic).strip("_")[:50] or "topic"
+    return f"{index:02d}_{slug}"
+
+
+def format_seconds(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{int(hours)}h {int(minutes)}m {seconds:.2f}s" if hours else f"{int(minutes)}m {seconds:.2f}s"
+
+
+def run_topic_batch(topics: List[str],
+                    run_topic: Callable[[str, str], Any],
+                    base_folder: str,
+                    concurrency: int = None) -> List[Dict[str, Any]]:
+    """
+    Run `run_topic(topic, output_folder)` for every topic, at most `concurrency` at a time.
+
+    Args:
+        topics (list): The topics, in file order.
+        run_topic (callable): Builds and runs the crew of one topic and returns the crew.
+        base_folder (str): Folder that gets one numbered output folder per topic.
+        concurrency (int): Topics running at the same time; BATCH_CONCURRENCY by default.
+
+    Returns:
+        One entry per topic, in file order: topic, folder, status ("ok" or "error"), seconds,
+        total_tokens (when the crew reports usage metrics) and error.
+    """
+    concurrency = max(1, concurrency or int(os.getenv("BATCH_CONCURRENCY", 3)))
+    results: List[Dict[str, Any]] = [
+        {"topic": topic, "folder": os.path.join(base_folder, topic_folder_name(index, topic)),
+         "status": "pending", "seconds": 0.0, "total_tokens": None, "error": ""}
+        for index, topic in enumerate(topics, start=1)
+    ]
+
+    def run(entry: Dict[str, Any]) -> Dict[str, Any]:
+        os.makedirs(entry["folder"], exist_ok=True)
+        log(f"Batch: starting '{entry['topic']}' ({entry['folder']})")
+        start_time = time.time()
+        try:
+            crew = run_topic(entry["topic"], entry["folder"])
+            entry["status"] = "ok"
+            entry["total_tokens"] = getattr(getattr(crew, "usage_metrics", None), "total_tokens", None)
+        except Exception as e:
+            entry["status"] = "error"
+            entry["error"] = f"{type(e).__name__}: {e}"
+        entry["seconds"] = time.time() - start_time
+        log(f"Batch: '{entry['topic']}' finished with {entry['status']} in {format_seconds(entry['seconds'])}")
+        return entry
+
+    log(f"Batch: {len(topics)} topics, {concurrency} at a time")
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="topic") as executor:
+        for future in as_completed([executor.submit(run, entry) for entry in results]):
+            future.result()
+    return results
+
+
+def print_batch_summary(results: List[Dict[str, Any]], total_seconds: float) -> None:
+    """Print per-topic timing and status, and how much the concurrency saved against running one by one."""
+    print("\nBatch summary:")
+    print(f"    {'#':<4}{'Status':<8}{'Time':>14}{'Tokens':>10}  Topic")
+    for index, entry in enumerate(results, start=1):
+        tokens = entry["total_tokens"] if entry["total_tokens"] is not None else "-"
+        print(f"    {index:<4}{entry['status']:<8}{format_seconds(entry['seconds']):>14}{tokens:>10}  {entry['topic']}")
+        if entry["error"]:
+            print(f"            {entry['error']}")
+    sequential = sum(entry["seconds"] for entry in results)
+    failed = sum(1 for entry in results if entry["status"] != "ok")
+    print(f"    {len(results) - failed} ok, {failed} failed. Wall clock {format_seconds(total_seconds)}, "
+          f"sum of topic times {format_seconds(sequential)}\n")
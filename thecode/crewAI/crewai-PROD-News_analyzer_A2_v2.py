@@ -9,6 +9,9 @@ repo: https://github.com/voytas75/VoytasCodeLab
 """
 
 __author__ = 'https://github.com/voytas75'
+# The PDF extraction pool starts its workers with multiprocessing's spawn method, and they re-import this
+# script as '__mp_main__'. Only the process started from the command line imports the crew and runs it.
+is_main_process = __name__ == "__main__"
 __name__ = 'News Analyzer Crew'
 
 
@@ -18,70 +21,119 @@ import sys
 #import agentops
 import argparse
 
-from crewai import Agent, Task, Crew, Process
-
-from config.config import (
-    initialize_tools,
-    current_date,
-    current_readable_date,
-    log_file,
-    task_callback_function,
-    step_callback_function,
-    raport_base_folder,
-    llm_balanced,
-    llm_focused,
-    llm_conversational,
-    llm_creative,
-    llm_deterministic,
-    llm_exploratory,
-    author,
-    print_time_taken,
-    embedder_config,
-)
+if is_main_process:
+    from crewai import Agent, Task, Crew, Process
+
+    from config.config import (
+        initialize_tools,
+        current_date,
+        current_readable_date,
+        log_file,
+        task_callback_function,
+        step_callback_function,
+        raport_base_folder,
+        llm_balanced,
+        llm_focused,
+        llm_conversational,
+        llm_creative,
+        llm_deterministic,
+        llm_exploratory,
+        author,
+        print_time_taken,
+        embedder_config,
+        shutdown_driver_pool,
+        close_http_client,
+        close_memory_store,
+        print_cache_stats,
+        print_quota_stats,
+        print_resilience_stats,
+        start_metrics_server,
+        start_task_timer,
+        track_tokens,
+        print_token_report,
+        write_metrics,
+        print_llm_cache_stats,
+        print_pdf_cache_stats,
+        print_embedding_cache_stats,
+        CrewCheckpoint,
+        load_checkpoint_inputs,
+        NewsMonitor,
+        articles_task_output,
+        load_topics,
+        run_topic_batch,
+        print_batch_summary,
+    )
 
 
 #region CONFIGURATION
 
-parser = argparse.ArgumentParser(description="Run CrewAI for News Search.")
-parser.add_argument("--topic", type=str, help="Specify the topic to analyze in News")
-parser.add_argument("--planning", action="store_true", help="Enable crew planning mode")
-parser.add_argument("--manager", action="store_true", help="Enable crew manager (hierarchical)")
-parser.add_argument("--verbose", action="store_true", help="Enable crew verbose output")
-parser.add_argument("--result_count", type=int, default=10, help="Specify the number of web results per provider to retrieve")
-parser.add_argument("--nocache", action="store_false", help="Disable caching for the crew")
-parser.add_argument("--nomemory", action="store_false", help="Disable memory for the crew")
-args = parser.parse_args()
-
-topic = args.topic if args.topic else ""
-if not topic:
-    while not topic:
-        topic = input("Please provide a topic to analyze in News: ").strip()
-
-
-#agentops.init() # Agent Monitoring with AgentOps
-
-tools = initialize_tools()
-
-
-# remove because i do not use openai but ollama/lmstudio where this env is used but it makes crewai embed stop working.
-if "OPENAI_API_BASE" in os.environ:
-    os.environ.pop("OPENAI_API_BASE", None)
-
-llm=llm_focused
-# Setup file paths
-readable_date = current_readable_date
-
-script_name = os.path.splitext(os.path.basename(__file__))[0]
-output_folder_path = os.path.join(raport_base_folder, f"{script_name}_{current_date}")
-os.makedirs(output_folder_path, exist_ok=True)  # Create the output folder if it doesn't exist
+    parser = argparse.ArgumentParser(description="Run CrewAI for News Search.")
+    parser.add_argument("--topic", type=str, help="Specify the topic to analyze in News")
+    parser.add_argument("--planning", action="store_true", help="Enable crew planning mode")
+    parser.add_argument("--manager", action="store_true", help="Enable crew manager (hierarchical)")
+    parser.add_argument("--verbose", action="store_true", help="Enable crew verbose output")
+    parser.add_argument("--result_count", type=int, default=10, help="Specify the number of web results per provider to retrieve")
+    parser.add_argument("--nocache", action="store_false", help="Disable caching for the crew")
+    parser.add_argument("--nomemory", action="store_false", help="Disable memory for the crew")
+    parser.add_argument("--nofanout", action="store_false", help="Disable the concurrent news fan-out and run one search task per provider")
+    parser.add_argument("--provider_deadline", type=float, default=None, help="Seconds each news provider gets in the fan-out before it is reported as timed out")
+    parser.add_argument("--resume", type=str, default=None, help="Output folder of an interrupted run: reuse its finished task outputs and run only the missing or invalidated tasks")
+    parser.add_argument("--monitor", action="store_true", help="Keep monitoring the topic: search for new articles every --interval minutes and run an analysis when enough have arrived")
+    parser.add_argument("--interval", type=float, default=float(os.getenv("NEWS_MONITOR_INTERVAL", 60)), help="Minutes between the searches of --monitor")
+    parser.add_argument("--min_new_articles", type=int, default=None, help="New articles --monitor needs before it starts an analysis (NEWS_MONITOR_MIN_NEW by default)")
+    parser.add_argument("--articles_file", type=str, default=None, help="Analyze the articles collected by --monitor instead of searching the news providers")
+    parser.add_argument("--topics_file", "--topics-file", type=str, default=None, help="Run every topic of this file (one per line, # comments) with the tools and LLM clients built once")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", 3)), help="Number of topics of --topics_file that run at the same time; above 1 the crews run without memory")
+    args = parser.parse_args()
+    if args.monitor and (args.resume or args.articles_file):
+        parser.error("--monitor cannot be combined with --resume or --articles_file")
+    if args.topics_file and (args.topic or args.resume or args.monitor or args.articles_file):
+        parser.error("--topics_file cannot be combined with --topic, --resume, --monitor or --articles_file")
+
+    resume_inputs = {}
+    if args.resume:
+        try:
+            resume_inputs = load_checkpoint_inputs(args.resume)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+
+    topics = load_topics(args.topics_file) if args.topics_file else []
+    # Crew memory (short-term and entity) is one store keyed by agent role, the same for every topic:
+    # topics running at the same time would read each other's context, so a concurrent batch runs without it
+    if topics and args.concurrency > 1 and args.nomemory:
+        print("Crew memory is off for --topics_file with --concurrency above 1, because concurrent topics would share it. Use --concurrency 1 to keep it.")
+        args.nomemory = False
+    topic = args.topic if args.topic else resume_inputs.get('topic', "")
+    if not topic and not topics:
+        while not topic:
+            topic = input("Please provide a topic to analyze in News: ").strip()
+
+
+    #agentops.init() # Agent Monitoring with AgentOps
+
+    tools = initialize_tools()
+    # METRICS_PORT serves the run metrics on localhost while the script runs
+    start_metrics_server()
+
+    # remove because i do not use openai but ollama/lmstudio where this env is used but it makes crewai embed stop working.
+    if "OPENAI_API_BASE" in os.environ:
+        os.environ.pop("OPENAI_API_BASE", None)
+
+    llm=llm_focused
+    # Setup file paths
+    readable_date = current_readable_date
+
+    script_name = os.path.splitext(os.path.basename(__file__))[0]
+    output_folder_path = args.resume if args.resume else os.path.join(raport_base_folder, f"{script_name}_{current_date}")
+    os.makedirs(output_folder_path, exist_ok=True)  # Create the output folder if it doesn't exist (in batch mode it holds one folder per topic)
 
 #endregion
 
 
 #region WELCOME
 
-# Define the purpose of the script
-script_purpose = """
+    # Define the purpose of the script
+    script_purpose = """
 Welcome to your CrewAI Team! 🚀  
 
 This crew is designed to streamline your work with specialized agents for data gathering, analysis, content creation, and reporting. Each agent is equipped with tools and expertise to ensure efficiency, accuracy, and actionable results across diverse tasks.  
@@ -89,132 +141,141 @@ This crew is designed to streamline your work with specialized agents for data g
 Whether it's identifying trends, crafting reports, verifying data, or building timelines, your team is here to help you achieve your goals effortlessly. Let's get started! 🌟  
 
 """
-print(script_purpose)
+    print(script_purpose)
 
 
-print(f"\033[92mTopic: {topic}\033[0m\n\n")
+    if topics:
+        print(f"\033[92mTopics ({len(topics)}, {args.concurrency} at a time): {'; '.join(topics)}\033[0m\n\n")
+    else:
+        print(f"\033[92mTopic: {topic}\033[0m\n\n")
 
 
-start_time = time.time()
+    start_time = time.time()
 
 #endregion
 
 
-#region AGENTS
-
-# Define the manager agent
-manager = Agent(
-    role="Project Manager",
-    goal="Efficiently manage the crew and ensure high-quality task completion",
-    backstory="You're an experienced project manager, skilled in overseeing complex projects and guiding teams to success. Your role is to coordinate the efforts of the crew members, ensuring that each task is completed.",
-    llm=llm_exploratory,
-)
-
-general_purpose_agent = Agent(
-    role="General Purpose Analyst",
-    goal="Undertake and successfully complete any task assigned, utilizing extensive data gathering, analysis, and synthesis methodologies.",
-    backstory=(
-        "A highly skilled generalist proficient in multiple domains, including advanced web research, precise data scraping, "
-        "thorough information synthesis, and detailed content creation. This agent ensures rigor and quality in all analyses, "
-        "producing actionable insights with a commitment to accuracy and professionalism."
-    ),
-    llm=llm,
-    verbose=False,
-)
-
-web_search_agent = Agent(
-    role="Web Search Agent",
-    goal="Perform web searches across multiple news platforms.",
-    backstory=(
-        "A versatile agent proficient in conducting web searches across various news platforms, ensuring comprehensive data collection. "
-        "Skilled in data aggregation and synthesis to provide a unified view of the gathered information."
-    ),
-    llm=llm,
-    verbose=False, 
-)
-
-content_scraping_agent = Agent(
-    role="Content Scraping Agent",
-    goal="Scrape content from identified web sources.",
-    backstory=(
-        "An expert in web scraping, capable of extracting relevant content from various online sources. "
-        "Ensures that the scraped data is accurate, well-organized, and ready for further analysis."
-    ),
-    llm=llm,
-    verbose=False, 
-)
-
-trend_analysis_agent = Agent(
-    role="Trend Analysis Agent",
-    goal="Critically assess the organized data, drawing comparisons and identifying trends among the different articles and perspectives. Highlight significant patterns, differences, and insights that contribute to a deeper understanding of the topic, providing valuable commentary for the final report.",
-    backstory=(
-        "As a former data analyst in a prestigious research firm, you spent years interpreting data and uncovering trends in various industries. Your analytical "
-        "mindset allows you to see beyond the surface, identifying subtle patterns and correlations that others might overlook. With a passion for storytelling "
-        "through data, you transitioned into a role that combines your analytical skills with your love for journalism. Now, as a Trend Analysis Agent, "
-        "you utilize your expertise to provide insightful comparisons and highlight emerging trends, ensuring that each report is not only informative but also impactful."
-    ),
-    llm=llm,
-    verbose=False,
-)
-
-twitter_posts_writer = Agent(
-    role="Social Media Content Strategist",
-    goal="Craft engaging and informative Twitter/X posts related to {topic}.",
-    backstory=(
-        "An expert social media strategist with a strong background in creating impactful social media content. "
-        "Possesses the ability to distill complex information into concise and captivating posts, driving engagement and effectively communicating key insights."
-    ),
-    max_iter=3,
-    llm=llm,
-    verbose=False,
-)
-
-data_verification_agent = Agent(
-    role="Data Verification Specialist",
-    goal="Verify the accuracy and authenticity of gathered data related to {topic}.",
-    backstory=(
-        "A meticulous and detail-oriented specialist, dedicated to ensuring the integrity and reliability of data. "
-        "Possesses extensive experience in cross-referencing sources, validating information, and identifying any discrepancies. "
-        "Committed to maintaining the highest standards of data accuracy in all analyses."
-    ),
-    llm=llm,
-    verbose=False,
-)
-
-report_writer = Agent(
-    role="Technical Report Specialist",
-    goal="Write a detailed and professional report on '{topic}'.",
-    backstory=(
-        "A dedicated technical writer with extensive experience in integrating and organizing complex data from multiple sources into coherent, "
-        "insightful reports. This specialist ensures the production of high-quality, well-structured reports that meet stringent standards of clarity and depth."
-    ),
-    llm=llm,
-    verbose=False, 
-)
-
-news_timeline_builder = Agent(
-    role="News Timeline Builder",
-    goal="Focus on gathering events related to a given topic and constructing a chronological timeline.",
-    backstory=(
-        "This agent specializes in organizing information temporally, ensuring clarity and relevance in presenting how events unfold. "
-        "With a background in historical research and data journalism, the News Timeline Builder excels at piecing together events from various sources "
-        "to create a coherent and informative timeline. This agent's meticulous approach ensures that each event is accurately placed in context, "
-        "providing a clear narrative of the topic's development over time."
-    ),
-    llm=llm,
-    verbose=False,
-)
-
-#endregion
-
-
-#region TASKS
-
-analyze_user_topic_task = Task(
-    name="Analyze User Topic Task",
-    description="""Analyze the user-provided topic '{topic}'. Understand what the user is asking for, and suggest relevant web search queries. Provide query phrases ranging from short to advanced ones. 
-""",
-    expected_output="""A markdown-formatted report with sections: 
+def run_crew(topic, output_folder_path, articles_file=None):
+    """
+    Build the agents, tasks and crew of one topic, run it with its output in output_folder_path and return the crew.
+    With articles_file (collected by the news monitor) the crew analyzes those articles instead of searching.
+    """
+
+    #region AGENTS
+
+    # Define the manager agent
+    manager = Agent(
+        role="Project Manager",
+        goal="Efficiently manage the crew and ensure high-quality task completion",
+        backstory="You're an experienced project manager, skilled in overseeing complex projects and guiding teams to success. Your role is to coordinate the efforts of the crew members, ensuring that each task is completed.",
+        llm=llm_exploratory,
+    )
+
+    general_purpose_agent = Agent(
+        role="General Purpose Analyst",
+        goal="Undertake and successfully complete any task assigned, utilizing extensive data gathering, analysis, and synthesis methodologies.",
+        backstory=(
+            "A highly skilled generalist proficient in multiple domains, including advanced web research, precise data scraping, "
+            "thorough information synthesis, and detailed content creation. This agent ensures rigor and quality in all analyses, "
+            "producing actionable insights with a commitment to accuracy and professionalism."
+        ),
+        llm=llm,
+        verbose=False,
+    )
+
+    web_search_agent = Agent(
+        role="Web Search Agent",
+        goal="Perform web searches across multiple news platforms.",
+        backstory=(
+            "A versatile agent proficient in conducting web searches across various news platforms, ensuring comprehensive data collection. "
+            "Skilled in data aggregation and synthesis to provide a unified view of the gathered information."
+        ),
+        llm=llm,
+        verbose=False, 
+    )
+
+    content_scraping_agent = Agent(
+        role="Content Scraping Agent",
+        goal="Scrape content from identified web sources.",
+        backstory=(
+            "An expert in web scraping, capable of extracting relevant content from various online sources. "
+            "Ensures that the scraped data is accurate, well-organized, and ready for further analysis."
+        ),
+        llm=llm,
+        verbose=False, 
+    )
+
+    trend_analysis_agent = Agent(
+        role="Trend Analysis Agent",
+        goal="Critically assess the organized data, drawing comparisons and identifying trends among the different articles and perspectives. Highlight significant patterns, differences, and insights that contribute to a deeper understanding of the topic, providing valuable commentary for the final report.",
+        backstory=(
+            "As a former data analyst in a prestigious research firm, you spent years interpreting data and uncovering trends in various industries. Your analytical "
+            "mindset allows you to see beyond the surface, identifying subtle patterns and correlations that others might overlook. With a passion for storytelling "
+            "through data, you transitioned into a role that combines your analytical skills with your love for journalism. Now, as a Trend Analysis Agent, "
+            "you utilize your expertise to provide insightful comparisons and highlight emerging trends, ensuring that each report is not only informative but also impactful."
+        ),
+        llm=llm,
+        verbose=False,
+    )
+
+    twitter_posts_writer = Agent(
+        role="Social Media Content Strategist",
+        goal="Craft engaging and informative Twitter/X posts related to {topic}.",
+        backstory=(
+            "An expert social media strategist with a strong background in creating impactful social media content. "
+            "Possesses the ability to distill complex information into concise and captivating posts, driving engagement and effectively communicating key insights."
+        ),
+        max_iter=3,
+        llm=llm,
+        verbose=False,
+    )
+
+    data_verification_agent = Agent(
+        role="Data Verification Specialist",
+        goal="Verify the accuracy and authenticity of gathered data related to {topic}.",
+        backstory=(
+            "A meticulous and detail-oriented specialist, dedicated to ensuring the integrity and reliability of data. "
+            "Possesses extensive experience in cross-referencing sources, validating information, and identifying any discrepancies. "
+            "Committed to maintaining the highest standards of data accuracy in all analyses."
+        ),
+        llm=llm,
+        verbose=False,
+    )
+
+    report_writer = Agent(
+        role="Technical Report Specialist",
+        goal="Write a detailed and professional report on '{topic}'.",
+        backstory=(
+            "A dedicated technical writer with extensive experience in integrating and organizing complex data from multiple sources into coherent, "
+            "insightful reports. This specialist ensures the production of high-quality, well-structured reports that meet stringent standards of clarity and depth."
+        ),
+        llm=llm,
+        verbose=False, 
+    )
+
+    news_timeline_builder = Agent(
+        role="News Timeline Builder",
+        goal="Focus on gathering events related to a given topic and constructing a chronological timeline.",
+        backstory=(
+            "This agent specializes in organizing information temporally, ensuring clarity and relevance in presenting how events unfold. "
+            "With a background in historical research and data journalism, the News Timeline Builder excels at piecing together events from various sources "
+            "to create a coherent and informative timeline. This agent's meticulous approach ensures that each event is accurately placed in context, "
+            "providing a clear narrative of the topic's development over time."
+        ),
+        llm=llm,
+        verbose=False,
+    )
+
+    #endregion
+
+
+    #region TASKS
+
+    analyze_user_topic_task = Task(
+        name="Analyze User Topic Task",
+        description="""Analyze the user-provided topic '{topic}'. Understand what the user is asking for, and suggest relevant web search queries. Provide query phrases ranging from short to advanced ones. 
+""",
+        expected_output="""A markdown-formatted report with sections: 
 1. original topic: {topic}
 2. **Basic Search Queries**:
     - [queries]
@@ -223,18 +284,18 @@ analyze_user_topic_task = Task(
 4. **Advanced Search Queries**:
     - [queries]    
 """,
-    agent=general_purpose_agent,
-    tools=[
-    ],
-    output_file=os.path.join(output_folder_path, f"analyze_user_topic_task_{script_name}_{current_date}.txt"),
-)
+        agent=general_purpose_agent,
+        tools=[
+        ],
+        output_file=os.path.join(output_folder_path, f"analyze_user_topic_task_{script_name}_{current_date}.txt"),
+    )
 
 
-web_search_bingnews_task = Task(
-    name="Bing News Web Search Task",
-    description="""Perform a web search. Perform a comprehensive bing news web search on the given topic '{topic}' using the provided search queries or create query text to get results. 
+    web_search_bingnews_task = Task(
+        name="Bing News Web Search Task",
+        description="""Perform a web search. Perform a comprehensive bing news web search on the given topic '{topic}' using the provided search queries or create query text to get results. 
 """,
-    expected_output="""A markdown-formatted report with the following structure:
+        expected_output="""A markdown-formatted report with the following structure:
 
 # Structure
 
@@ -255,19 +316,19 @@ web_search_bingnews_task = Task(
 - Summarize the key points and insights from the content.
 
 """,
-    agent=web_search_agent,
-    context=[analyze_user_topic_task],
-    tools=[
-        tools['bingnews'],
-    ],
-    output_file=os.path.join(output_folder_path, f"web_search_bingnews_task_{script_name}_{current_date}.txt"),
-)
+        agent=web_search_agent,
+        context=[analyze_user_topic_task],
+        tools=[
+            tools['bingnews'],
+        ],
+        output_file=os.path.join(output_folder_path, f"web_search_bingnews_task_{script_name}_{current_date}.txt"),
+    )
 
-web_search_mediastack_task = Task(
-    name="Mediastack News Web Search Task",
-    description="""Perform a web search. Perform a comprehensive Mediastack news web search on the given topic '{topic}' using the provided search queries or create query text to get results. If there are no results, must search web again by changing your query.
+    web_search_mediastack_task = Task(
+        name="Mediastack News Web Search Task",
+        description="""Perform a web search. Perform a comprehensive Mediastack news web search on the given topic '{topic}' using the provided search queries or create query text to get results. If there are no results, must search web again by changing your query.
 """,
-    expected_output="""A markdown-formatted report with the following structure:
+        expected_output="""A markdown-formatted report with the following structure:
 
 # Structure
 
@@ -288,19 +349,19 @@ web_search_mediastack_task = Task(
 - Summarize the key points and insights from the content.
 
 """,
-    agent=web_search_agent,
-    context=[analyze_user_topic_task],
-    tools=[
-        tools['media_stack'],
-    ],
-    output_file=os.path.join(output_folder_path, f"web_search_mediastack_task_{script_name}_{current_date}.txt"),
-)
+        agent=web_search_agent,
+        context=[analyze_user_topic_task],
+        tools=[
+            tools['media_stack'],
+        ],
+        output_file=os.path.join(output_folder_path, f"web_search_mediastack_task_{script_name}_{current_date}.txt"),
+    )
 
-web_search_newsapi_task = Task(
-    name="Newsapi News Web Search Task",
-    description="""Perform a web search. Perform a comprehensive Newsapi news web search on the given topic '{topic}' using the provided search queries or create query text to get results. If there are no results, must search web again by changing your query.
+    web_search_newsapi_task = Task(
+        name="Newsapi News Web Search Task",
+        description="""Perform a web search. Perform a comprehensive Newsapi news web search on the given topic '{topic}' using the provided search queries or create query text to get results. If there are no results, must search web again by changing your query.
 """,
-    expected_output="""A markdown-formatted report with the following structure:
+        expected_output="""A markdown-formatted report with the following structure:
 
 # Structure
 
@@ -321,19 +382,19 @@ web_search_newsapi_task = Task(
 - Summarize the key points and insights from the content.
 
 """,
-    agent=web_search_agent,
-    context=[analyze_user_topic_task],
-    tools=[
-        tools['newsapi_everything'],
-    ],
-    output_file=os.path.join(output_folder_path, f"web_search_newsapi_task_{script_name}_{current_date}.txt"),
-)
+        agent=web_search_agent,
+        context=[analyze_user_topic_task],
+        tools=[
+            tools['newsapi_everything'],
+        ],
+        output_file=os.path.join(output_folder_path, f"web_search_newsapi_task_{script_name}_{current_date}.txt"),
+    )
 
-web_search_newsdata_task = Task(
-    name="Newsdata News Web Search Task",
-    description="""Perform a web search. Perform a comprehensive Newsdata news web search on the given topic '{topic}' using the provided search queries or create query text to get results. If there are no results, must search web again by changing your query.
+    web_search_newsdata_task = Task(
+        name="Newsdata News Web Search Task",
+        description="""Perform a web search. Perform a comprehensive Newsdata news web search on the given topic '{topic}' using the provided search queries or create query text to get results. If there are no results, must search web again by changing your query.
 """,
-    expected_output="""A markdown-formatted report with the following structure:
+        expected_output="""A markdown-formatted report with the following structure:
 
 # Structure
 
@@ -354,19 +415,19 @@ web_search_newsdata_task = Task(
 - Summarize the key points and insights from the content.
 
 """,
-    agent=web_search_agent,
-    context=[analyze_user_topic_task],
-    tools=[
-        tools['newsdata'],
-    ],
-    output_file=os.path.join(output_folder_path, f"web_search_newsdata_task_{script_name}_{current_date}.txt"),
-)
+        agent=web_search_agent,
+        context=[analyze_user_topic_task],
+        tools=[
+            tools['newsdata'],
+        ],
+        output_file=os.path.join(output_folder_path, f"web_search_newsdata_task_{script_name}_{current_date}.txt"),
+    )
 
-web_search_exa_task = Task(
-    name="EXA News Web Search Task",
-    description="""Perform a web search. Perform a comprehensive EXA news web search on the given topic '{topic}' using the provided search queries or create query text to get results. If there are no results, must search web again by changing your query.
+    web_search_exa_task = Task(
+        name="EXA News Web Search Task",
+        description="""Perform a web search. Perform a comprehensive EXA news web search on the given topic '{topic}' using the provided search queries or create query text to get results. If there are no results, must search web again by changing your query.
 """,
-    expected_output="""A markdown-formatted report with the following structure:
+        expected_output="""A markdown-formatted report with the following structure:
 
 # Structure
 
@@ -387,19 +448,19 @@ web_search_exa_task = Task(
 - Summarize the key points and insights from the content.
 
 """,
-    agent=web_search_agent,
-    context=[analyze_user_topic_task],
-    tools=[
-        tools['exa'],
-    ],
-    output_file=os.path.join(output_folder_path, f"web_search_exa_task_{script_name}_{current_date}.txt"),
-)
+        agent=web_search_agent,
+        context=[analyze_user_topic_task],
+        tools=[
+            tools['exa'],
+        ],
+        output_file=os.path.join(output_folder_path, f"web_search_exa_task_{script_name}_{current_date}.txt"),
+    )
 
-web_search_tavily_news_task = Task(
-    name="Tavily News Web Search Task",
-    description="""Perform a web search. Perform a comprehensive Tavily news web search on the given topic '{topic}' using the provided search queries or create query text to get results. If there are no results, must search web again by changing your query.
+    web_search_tavily_news_task = Task(
+        name="Tavily News Web Search Task",
+        description="""Perform a web search. Perform a comprehensive Tavily news web search on the given topic '{topic}' using the provided search queries or create query text to get results. If there are no results, must search web again by changing your query.
 """,
-    expected_output="""A markdown-formatted report with the following structure:
+        expected_output="""A markdown-formatted report with the following structure:
 
 # Structure
 
@@ -420,19 +481,67 @@ web_search_tavily_news_task = Task(
 - Summarize the key points and insights from the content.
 
 """,
-    agent=web_search_agent,
-    context=[analyze_user_topic_task],
-    tools=[
-        tools['tavily_news'],
-    ],
-    output_file=os.path.join(output_folder_path, f"web_search_tavily_news_task_{script_name}_{current_date}.txt"),
-)
+        agent=web_search_agent,
+        context=[analyze_user_topic_task],
+        tools=[
+            tools['tavily_news'],
+        ],
+        output_file=os.path.join(output_folder_path, f"web_search_tavily_news_task_{script_name}_{current_date}.txt"),
+    )
+
+    web_search_fanout_task = Task(
+        name="News Fan-out Web Search Task",
+        description="""Perform a web search. Search all news providers at once on the given topic '{topic}' by calling the News Fan-out Search Tool ONCE with the list of search queries from the topic analysis and result_count {result_count}. Do not call the tool again for single providers. If a provider timed out or returned an error, note it and continue with the other providers.
+""",
+        expected_output="""A markdown-formatted report with the following structure:
+
+# Structure
+
+1. **Queries**: [List the queries used in the search.]
+2. **Providers**: [For each provider state its status (ok, partial, error, timeout) and the number of articles found.]
+3. **Results**: List the articles (they are already deduplicated across providers) with the following details:
+    - **Title/Name**: [State the title of the web page.]
+    - **Address/URL**: [Provide the URL of the web page.]
+    - **Source**: [State the source of the news article. This could be the name of the news outlet, the author's name, or any other relevant information that indicates the origin of the article.]
+    - **Content**: [Provide the main content retrieved from the result. The content MUST be relevant and succinct, focusing on the topic at hand.]
+    - **Publication Date**: [Include the publication date of the article.]
+    - **Other**: [Additional information about the result, including the providers that reported it.]
+
+# Analysis
+
+- Ensure the content is relevant to the topic and provides a comprehensive overview.
+- Verify the credibility of the sources and the accuracy of the information.
+- Summarize the key points and insights from the content.
 
-aggregate_news_data_task = Task(
-    name="Aggregate News Data Task",
-    description="""Aggregate. Ensure that all relevant information is included, and each entry is properly formatted and categorized.
 """,
-    expected_output="""A comprehensive markdown-formatted report with the following structure:
+        agent=web_search_agent,
+        context=[analyze_user_topic_task],
+        tools=[
+            tools['news_fanout'],
+        ],
+        output_file=os.path.join(output_folder_path, f"web_search_fanout_task_{script_name}_{current_date}.txt"),
+    )
+    if args.provider_deadline:
+        tools['news_fanout'].deadline = args.provider_deadline
+
+    # With fan-out enabled one task replaces the per-provider search tasks (mediastack is off in both modes; the fan-out queries it only when NEWS_FANOUT_PROVIDERS lists it)
+    if args.nofanout or articles_file:
+        news_search_tasks = [web_search_fanout_task]
+    else:
+        news_search_tasks = [
+            web_search_bingnews_task, 
+            #web_search_mediastack_task, 
+            web_search_exa_task, 
+            web_search_newsdata_task, 
+            web_search_tavily_news_task, 
+            web_search_newsapi_task,
+        ]
+
+    aggregate_news_data_task = Task(
+        name="Aggregate News Data Task",
+        description="""Aggregate. Ensure that all relevant information is included, and each entry is properly formatted and categorized.
+""",
+        expected_output="""A comprehensive markdown-formatted report with the following structure:
 
 # Aggregated News Data Report
 
@@ -459,23 +568,16 @@ For each news item, include the following details:
 - Include any recommendations or next steps based on the findings.
 
 """,
-    context=[
-        web_search_bingnews_task, 
-        web_search_mediastack_task, 
-        web_search_exa_task, 
-        web_search_newsdata_task, 
-        web_search_tavily_news_task, 
-        web_search_newsapi_task,
-    ],
-    agent=general_purpose_agent,
-    output_file=os.path.join(output_folder_path, f"aggregate_news_data_task_{script_name}_{current_date}.txt"),
-)
+        context=news_search_tasks,
+        agent=general_purpose_agent,
+        output_file=os.path.join(output_folder_path, f"aggregate_news_data_task_{script_name}_{current_date}.txt"),
+    )
 
-web_scraping_task = Task(
-    name="Web Data Scraping Task",
-    description="""Scrape URL's content. Perform read website content. You MUST read all URLs website content and create a report. Ensure that the website content exists, and the site is valid (there is no 404 errors, there is no non-existent sites, there is no paywall). 
+    web_scraping_task = Task(
+        name="Web Data Scraping Task",
+        description="""Scrape URL's content. Perform read website content. You MUST read all URLs website content and create a report. Ensure that the website content exists, and the site is valid (there is no 404 errors, there is no non-existent sites, there is no paywall). 
 """,
-    expected_output="""A markdown-formatted report with the following structure:
+        expected_output="""A markdown-formatted report with the following structure:
 
 # Web Data Scraping Report
 
@@ -487,20 +589,20 @@ web_scraping_task = Task(
     - **Content**: Provide detailed content retrieved from the website.
     - **Other Information**: Include additional information about the news website or page, such as language, country, etc. If available, include any additional details that might be useful for further analysis or interpretation of the data, such as the language of the content, the country of origin, or any other relevant details that could impact the analysis or interpretation of the data.
 """,
-    context=[aggregate_news_data_task],
-    agent=content_scraping_agent,
-    tools=[
-        tools['scrape'],
-        tools['selenium'],
-    ],
-    output_file=os.path.join(output_folder_path, f"web_scraping_task_{script_name}_{current_date}.txt"),
-)
+        context=[aggregate_news_data_task],
+        agent=content_scraping_agent,
+        tools=[
+            tools['scrape'],
+            tools['selenium'],
+        ],
+        output_file=os.path.join(output_folder_path, f"web_scraping_task_{script_name}_{current_date}.txt"),
+    )
 
-social_media_posts_task = Task(
-    name="Social Media Posts Creation Task",
-    description="""Create five engaging, catchy, creative and concise posts for Platform X (formerly Twitter)
+    social_media_posts_task = Task(
+        name="Social Media Posts Creation Task",
+        description="""Create five engaging, catchy, creative and concise posts for Platform X (formerly Twitter)
 """,
-    expected_output="""A plain-text report with the following structure:
+        expected_output="""A plain-text report with the following structure:
 
 # Posts List
 
@@ -513,17 +615,17 @@ social_media_posts_task = Task(
 1. Ensure each post uses 3 to 5 hashtags, emojis, and includes a URL if available.
 2. Add the URL as is. DO NOT use the [text](url) format.
 """,
-    agent=twitter_posts_writer,
-    context=[web_scraping_task],
-    async_execution=True,
-    output_file=os.path.join(output_folder_path, f"output_twitter_posts_task_{script_name}_{current_date}.txt"),
-)
+        agent=twitter_posts_writer,
+        context=[web_scraping_task],
+        async_execution=True,
+        output_file=os.path.join(output_folder_path, f"output_twitter_posts_task_{script_name}_{current_date}.txt"),
+    )
 
-verification_data_task = Task(
-    name="Verification Data Task",
-    description="""Verify the accuracy and authenticity of gathered news data related to the topic '{topic}'.  Ensure that the news data is accurate, credible, and relevant to the topic. This includes cross-referencing sources, checking for biases, and confirming the validity of the information. Ensure that urls are valid. 
+    verification_data_task = Task(
+        name="Verification Data Task",
+        description="""Verify the accuracy and authenticity of gathered news data related to the topic '{topic}'.  Ensure that the news data is accurate, credible, and relevant to the topic. This includes cross-referencing sources, checking for biases, and confirming the validity of the information. Ensure that urls are valid. 
 """,
-    expected_output="""A markdown-formatted report with the following sections:
+        expected_output="""A markdown-formatted report with the following sections:
 
 # Web Data Verification Report
 
@@ -537,16 +639,16 @@ verification_data_task = Task(
 8. **External Validation**: Summarize the findings from external validation services or additional agents used in the verification process.
 9. **Conclusion**: Summarize the overall results of the verification process and confirm the authenticity and credibility of the data.
 """,
-    context=[web_scraping_task],
-    agent=data_verification_agent,
-    output_file=os.path.join(output_folder_path, f"verification_data_task_{script_name}_{current_date}.txt"),
-)
+        context=[web_scraping_task],
+        agent=data_verification_agent,
+        output_file=os.path.join(output_folder_path, f"verification_data_task_{script_name}_{current_date}.txt"),
+    )
 
-task_analyze_trends_and_compare = Task(
-    name="Trends Analysis and Comparison Task",
-    description="""Analyze the information to identify trends, commonalities, and differences across the News articles by topic '{topic}'.
+    task_analyze_trends_and_compare = Task(
+        name="Trends Analysis and Comparison Task",
+        description="""Analyze the information to identify trends, commonalities, and differences across the News articles by topic '{topic}'.
 """,
-    expected_output="""A markdown-formatted report with the following structure:
+        expected_output="""A markdown-formatted report with the following structure:
 
 # Key Trends
 Identify and elaborate on common patterns, themes, or insights emerging from multiple articles. Ensure that each trend is substantiated with relevant data points and examples for enhanced credibility.
@@ -563,35 +665,35 @@ Provide a formal, objective analysis throughout, utilizing bullet points for cla
 # Professional Relevance
 Construct the summary with a specific focus on the needs of data analysts and decision-makers, emphasizing clarity, coherence, and actionable insights. Ensure the analysis offers practical value and facilitates informed decision-making.
 """,
-    agent=trend_analysis_agent,
-    context=[web_scraping_task, 
-             verification_data_task],
-    output_file=os.path.join(output_folder_path, f"trend_analysis_task_{script_name}_{current_date}.txt"),
-)
+        agent=trend_analysis_agent,
+        context=[web_scraping_task, 
+                 verification_data_task],
+        output_file=os.path.join(output_folder_path, f"trend_analysis_task_{script_name}_{current_date}.txt"),
+    )
 
-analyze_to_report_findings_task = Task(
-    name="Analyze Data to Report Findings Task",
-    description="""Analyze the collected data. The focus MUST be on summarizing key insights, trends, and unique observations relevant to the topic '{topic}' and compiling these into a coherent report. 
+    analyze_to_report_findings_task = Task(
+        name="Analyze Data to Report Findings Task",
+        description="""Analyze the collected data. The focus MUST be on summarizing key insights, trends, and unique observations relevant to the topic '{topic}' and compiling these into a coherent report. 
 """,
-    expected_output="""Generate a markdown-formatted report with the following structure:
+        expected_output="""Generate a markdown-formatted report with the following structure:
 1. **Introduction**: Provide a brief overview of the collected data and explain the purpose of the analysis.
 2. **Key Trends**: Identify and describe the main trends observed in the data.
 3. **Unique Insights**: Elaborate on any unique insights and findings derived from the data.
 4. **Comparison**: Conduct a comparative analysis of differing perspectives and data points.
 5. **Conclusion**: Summarize the findings and provide final thoughts on the analysis.
 """,
-    agent=report_writer,
-    context=[web_scraping_task, 
-             verification_data_task],
-    output_file=os.path.join(output_folder_path, f"analyze_to_report_findings_task_{script_name}_{current_date}.txt"),
-)
+        agent=report_writer,
+        context=[web_scraping_task, 
+                 verification_data_task],
+        output_file=os.path.join(output_folder_path, f"analyze_to_report_findings_task_{script_name}_{current_date}.txt"),
+    )
 
-analyze_to_report_recommendations_task = Task(
-    name="Analyze Data to Report Recommendations Task",
-    description="""
+    analyze_to_report_recommendations_task = Task(
+        name="Analyze Data to Report Recommendations Task",
+        description="""
 Analyze the collected data. The focus MUST be on summarizing key insights, trends, and unique observations relevant to the topic '{topic}' and compiling these into a coherent report.
 """,
-    expected_output="""Generate a markdown-formatted report with the following sections:
+        expected_output="""Generate a markdown-formatted report with the following sections:
 1. **Introduction**: Provide a brief overview of the collected data and explain the purpose of the analysis.
 2. **Key Trends**: Identify and describe the main trends observed in the data, substantiating each trend with relevant data points and examples.
 3. **Unique Insights**: Elaborate on any unique insights and findings derived from the data, ensuring these insights are clearly distinguished and contextually well-explained.
@@ -599,18 +701,18 @@ Analyze the collected data. The focus MUST be on summarizing key insights, trend
 5. **Recommendations**: Offer actionable recommendations based on the conclusions drawn from the analysis, emphasizing practical value and informed decision-making.
 6. **Conclusion**: Summarize the findings and provide final thoughts on the analysis, ensuring clarity and coherence.
 """,
-    agent=report_writer,
-    context=[web_scraping_task, 
-             verification_data_task, 
-             analyze_to_report_findings_task],
-    output_file=os.path.join(output_folder_path, f"analyze_to_report_recommendations_task_{script_name}_{current_date}.txt"),
-)
+        agent=report_writer,
+        context=[web_scraping_task, 
+                 verification_data_task, 
+                 analyze_to_report_findings_task],
+        output_file=os.path.join(output_folder_path, f"analyze_to_report_recommendations_task_{script_name}_{current_date}.txt"),
+    )
 
-build_timeline_task = Task(
-    name="Build Timeline of Events Task",
-    description="""Build timeline. Extract and organize key events related to the topic '{topic}' from the collected news data. The events should be presented in a chronological timeline, ensuring each event includes a detailed description, source, and timestamp. Optionally, categorize the events with relevant tags.
+    build_timeline_task = Task(
+        name="Build Timeline of Events Task",
+        description="""Build timeline. Extract and organize key events related to the topic '{topic}' from the collected news data. The events should be presented in a chronological timeline, ensuring each event includes a detailed description, source, and timestamp. Optionally, categorize the events with relevant tags.
 """,
-    expected_output="""Generate a markdown-formatted report with the following structure:
+        expected_output="""Generate a markdown-formatted report with the following structure:
 1. **List of Events**: Provide a detailed list of events in either JSON, markdown, or table format. Each event should include:
     - **Event Description**: A brief summary or headline of the event.
     - **Source**: The source from which the event information was obtained.
@@ -624,23 +726,16 @@ build_timeline_task = Task(
 - **Timestamp**: The date or time when the event occurred.
 - **Tags**: Optional tags or categorization (e.g., type of event).
 """,
-    agent=news_timeline_builder,
-    context=[
-        web_search_bingnews_task, 
-        web_search_tavily_news_task,
-        #web_search_mediastack_task, 
-        web_search_newsapi_task, 
-        web_search_newsdata_task, 
-        web_search_exa_task,         
-    ],
-    output_file=os.path.join(output_folder_path, f"build_timeline_task_{script_name}_{current_date}.txt"),
-)
+        agent=news_timeline_builder,
+        context=news_search_tasks,
+        output_file=os.path.join(output_folder_path, f"build_timeline_task_{script_name}_{current_date}.txt"),
+    )
 
-final_comprehensive_report_task = Task(
-    name="Final Comprehensive News Report",
-    description="""Create a comprehensive and professional final news report on the topic '{topic}'. Ensure the report is thoroughly verified by analyzing the content five times and asking clarifying questions to validate accuracy. MUST include hyperlinks in relevant sections to guide reader to the news or articles.
+    final_comprehensive_report_task = Task(
+        name="Final Comprehensive News Report",
+        description="""Create a comprehensive and professional final news report on the topic '{topic}'. Ensure the report is thoroughly verified by analyzing the content five times and asking clarifying questions to validate accuracy. MUST include hyperlinks in relevant sections to guide reader to the news or articles.
 """,
-    expected_output="""Generate a comprehensive markdown-formatted report with the following structure:
+        expected_output="""Generate a comprehensive markdown-formatted report with the following structure:
 
 1. **Title**: Provide a concise and descriptive title for the report.
     - Include the date of creation: {date}
@@ -719,53 +814,48 @@ Example:
 
 NOTE: Do not use the Markdown block "```" at the beginning and end of a report!
 """,
-    agent=report_writer,
-    context=[
-        verification_data_task, 
-        web_scraping_task, 
-        social_media_posts_task, 
-        analyze_to_report_findings_task, 
-        analyze_to_report_recommendations_task, 
-        task_analyze_trends_and_compare,
-        build_timeline_task
-    ],
-    output_file=os.path.join(output_folder_path, f"Report.md"),
-)
-
-# Define a task for the general_purpose_agent to create an auto-generated .MD file name based on context and save a summary of data in the file
-generate_summary_report_task = Task(
-    name="Generate Summary Report",
-    description="""Generate a concise and informative summary of the data.
-""",
-    expected_output="A well-structured markdown-formatted summary report.",
-    context=[final_comprehensive_report_task],
-    agent=general_purpose_agent,
-    output_file=os.path.join(output_folder_path, f"Summary_Report.md"),
-)
-
-#endregion
-
-#region Crew
-# Update the crew with the new agents and tasks
-crew = Crew(
-    agents=[
-        general_purpose_agent,
-        web_search_agent,
-        content_scraping_agent,
-        twitter_posts_writer,
-        trend_analysis_agent,
-        data_verification_agent,
-        news_timeline_builder,
-        report_writer,
-    ],
-    tasks=[
-        analyze_user_topic_task,
-        web_search_bingnews_task,
-        #web_search_mediastack_task, 
-        web_search_exa_task, 
-        web_search_newsdata_task, 
-        web_search_tavily_news_task, 
-        web_search_newsapi_task,        
+        agent=report_writer,
+        context=[
+            verification_data_task, 
+            web_scraping_task, 
+            social_media_posts_task, 
+            analyze_to_report_findings_task, 
+            analyze_to_report_recommendations_task, 
+            task_analyze_trends_and_compare,
+            build_timeline_task
+        ],
+        output_file=os.path.join(output_folder_path, f"Report.md"),
+    )
+
+    # Define a task for the general_purpose_agent to create an auto-generated .MD file name based on context and save a summary of data in the file
+    generate_summary_report_task = Task(
+        name="Generate Summary Report",
+        description="""Generate a concise and informative summary of the data.
+""",
+        expected_output="A well-structured markdown-formatted summary report.",
+        context=[final_comprehensive_report_task],
+        agent=general_purpose_agent,
+        output_file=os.path.join(output_folder_path, f"Summary_Report.md"),
+    )
+
+    #endregion
+
+    #region Crew
+    crew_inputs = {
+        'topic': topic,
+        'date': readable_date,
+        'author': author,
+        'result_count': args.result_count,
+        'output_dir': output_folder_path,
+        }
+
+    # Finished task outputs are recorded in the output folder; with --resume only the remaining tasks run
+    checkpoint = CrewCheckpoint(output_folder_path, crew_inputs, script_name)
+    # With --articles_file the monitor's new articles stand in for the topic analysis and the news search
+    if articles_file:
+        web_search_fanout_task.output = articles_task_output(web_search_fanout_task, articles_file)
+    crew_tasks = checkpoint.restore([
+        *([] if articles_file else [analyze_user_topic_task, *news_search_tasks]),
         aggregate_news_data_task,
         web_scraping_task,
         social_media_posts_task,
@@ -776,43 +866,113 @@ crew = Crew(
         build_timeline_task,
         final_comprehensive_report_task,
         generate_summary_report_task,
-    ],
-    full_output=False,
-    process = Process.hierarchical if args.manager else Process.sequential, 
-    manager_agent = manager,
-    cache=args.nocache,
-    memory=args.nomemory,
-    embedder=embedder_config if args.nomemory else None, 
-    planning=args.planning, planning_llm=llm_creative,
-    #step_callback=step_callback_function,
-    #task_callback=callback_function,
-    share_crew=False,
-    output_log_file=os.path.join(output_folder_path, log_file),
-    verbose=args.verbose,
-)
-
-# Execute the crew tasks
-result = crew.kickoff({
-    'topic': topic,
-    'date': readable_date,
-    'author': author,
-    'result_count': args.result_count,
-    'output_dir': output_folder_path,
-    })
+    ])
+
+    # Update the crew with the new agents and tasks
+    crew = Crew(
+        agents=[
+            general_purpose_agent,
+            web_search_agent,
+            content_scraping_agent,
+            twitter_posts_writer,
+            trend_analysis_agent,
+            data_verification_agent,
+            news_timeline_builder,
+            report_writer,
+        ],
+        tasks=crew_tasks,
+        full_output=False,
+        process = Process.hierarchical if args.manager else Process.sequential, 
+        manager_agent = manager,
+        cache=args.nocache,
+        memory=args.nomemory,
+        embedder=embedder_config if args.nomemory else None, 
+        planning=args.planning, planning_llm=llm_creative,
+        step_callback=step_callback_function,
+        task_callback=checkpoint.task_callback(task_callback_function),
+        share_crew=False,
+        output_log_file=os.path.join(output_folder_path, log_file),
+        verbose=args.verbose,
+    )
+
+    # Report which tools were built and how long each took (once, for the first crew of a batch or monitor)
+    tools.print_build_report(once=True)
+
+    # Execute the crew tasks
+    if crew_tasks:
+        start_task_timer()
+        track_tokens(crew, output_folder_path)
+        result = crew.kickoff(crew_inputs)
+    else:
+        print(f"All tasks were restored from {checkpoint.path}, nothing to run.")
+
+    #endregion
+
+    return crew
+
+
+#region Run
+
+if is_main_process:
+    # Monitor mode: poll the providers for articles newer than the stored watermarks and analyze each batch
+    # in this process, in its own folder under the output folder
+    if args.monitor:
+        def analyze_new_articles(articles_file):
+            analysis_folder = os.path.join(output_folder_path, f"analysis_{time.strftime('%Y-%m-%d_%H-%M-%S')}")
+            os.makedirs(analysis_folder, exist_ok=True)
+            try:
+                run_crew(topic, analysis_folder, articles_file)
+                return True
+            except Exception as e:
+                print(f"Analysis of {articles_file} failed: {type(e).__name__}: {e}")
+                return False
+            finally:
+                # A monitor runs for days; keep the metrics textfile current instead of writing it only on exit
+                write_metrics(output_folder_path)
+
+        if args.provider_deadline:
+            tools['news_fanout'].deadline = args.provider_deadline
+        monitor = NewsMonitor(topic, tools['news_fanout'], result_count=args.result_count, min_new_articles=args.min_new_articles)
+        monitor.run_forever(args.interval * 60, analyze_new_articles)
+        monitor.store.close()
+    # With --topics_file every topic gets its own crew and folder, up to --concurrency at a time
+    elif topics:
+        batch_results = run_topic_batch(topics, run_crew, output_folder_path, args.concurrency)
+    else:
+        crew = run_crew(topic, output_folder_path, args.articles_file)
 
 #endregion
 
 
 #region Output
 
-# Output the result
-print("\n" + "-" * 50 + "\n")
-# Print the usage metrics of the crew
-print(crew.usage_metrics)
-print("\n" + "-" * 50 + "\n")
-# Print the time taken to execute the task
-print_time_taken(time.time() - start_time)
-print("\n" + "-" * 50 + "\n\n")
-print("Goodbye!\n\n")
+    # Output the result
+    print("\n" + "-" * 50 + "\n")
+    # Print the usage metrics of the crew, or the per-topic summary of a batch
+    if topics:
+        print_batch_summary(batch_results, time.time() - start_time)
+    elif not args.monitor:
+        print(crew.usage_metrics)
+    print("\n" + "-" * 50 + "\n")
+    # Close the pooled Chrome drivers used for scraping
+    shutdown_driver_pool()
+    # Close the pooled HTTP connections of the search tools
+    close_http_client()
+    # Flush and close the Chroma memory store used by the nlp_search tool
+    close_memory_store()
+    # Print the provider response, LLM, PDF text and embedding cache statistics, the provider quotas and retries
+    print_cache_stats()
+    print_quota_stats()
+    print_resilience_stats()
+    # Write the tool, task and provider metrics in the Prometheus text format
+    write_metrics(output_folder_path)
+    print_llm_cache_stats()
+    print_token_report()
+    print_pdf_cache_stats()
+    print_embedding_cache_stats()
+    # Print the time taken to execute the task
+    print_time_taken(time.time() - start_time)
+    print("\n" + "-" * 50 + "\n\n")
+    print("Goodbye!\n\n")
 
 #endregion
@@ -10,6 +10,9 @@ example report: https://github.com/voytas75/ReportHub/blob/master/reports/WhatsN
 """
 
 __author__ = 'https://github.com/voytas75'
+# The PDF extraction pool starts its workers with multiprocessing's spawn method, and they re-import this
+# script as '__mp_main__'. Only the process started from the command line imports the crew and runs it.
+is_main_process = __name__ == "__main__"
 __name__ = 'Tech Discussion Assistent Crew'
 
 import os
@@ -18,71 +21,111 @@ import sys
 import argparse
 #import agentops
 
-from crewai import Agent, Task, Crew, Process
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
-
-from config.config import (
-    initialize_tools,
-    current_date,
-    current_readable_date,
-    log_file,
-    task_callback_function,
-    step_callback_function,
-    raport_base_folder,
-    llm_balanced,
-    llm_focused,
-    llm_conversational,
-    llm_creative,
-    llm_deterministic,
-    llm_exploratory,
-    author,
-    print_time_taken,
-    embedder_config,
-)
+if is_main_process:
+    from crewai import Agent, Task, Crew, Process
+    from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+
+    from config.config import (
+        initialize_tools,
+        current_date,
+        current_readable_date,
+        log_file,
+        task_callback_function,
+        step_callback_function,
+        raport_base_folder,
+        llm_balanced,
+        llm_focused,
+        llm_conversational,
+        llm_creative,
+        llm_deterministic,
+        llm_exploratory,
+        author,
+        print_time_taken,
+        embedder_config,
+        shutdown_driver_pool,
+        close_http_client,
+        close_memory_store,
+        print_cache_stats,
+        print_quota_stats,
+        print_resilience_stats,
+        start_metrics_server,
+        start_task_timer,
+        track_tokens,
+        print_token_report,
+        write_metrics,
+        print_llm_cache_stats,
+        print_pdf_cache_stats,
+        print_embedding_cache_stats,
+        CrewCheckpoint,
+        load_checkpoint_inputs,
+        load_topics,
+        run_topic_batch,
+        print_batch_summary,
+    )
 
 
 
 #region Configuration
 
-parser = argparse.ArgumentParser(description="Run CrewAI for Technical Discussions.")
-parser.add_argument("--topic", type=str, help="Specify the topic for the technical discussion")
-parser.add_argument("--planning", action="store_true", help="Enable crew planning mode")
-parser.add_argument("--manager", action="store_true", help="Enable crew manager (hierarchical)")
-parser.add_argument("--verbose", action="store_true", help="Enable crew verbose output")
-parser.add_argument("--result_count", type=int, default=15, help="Specify the number of web results to retrieve")
-parser.add_argument("--nocache", action="store_false", help="Disable caching for the crew")
-parser.add_argument("--nomemory", action="store_false", help="Disable memory for the crew")
-args = parser.parse_args()
-
-topic = args.topic if args.topic else ""
-if not topic:
-    while not topic:
-        topic = input("Please provide a topic for the technical discussion: ").strip()
-
-#agentops.init() # Agent Monitoring with AgentOps
-
-tools = initialize_tools()
-
-
-# remove because i do not use openai but ollama/lmstudio where this env is used but it makes crewai embed stop working.
-#if "OPENAI_API_BASE" in os.environ:
-#    os.environ.pop("OPENAI_API_BASE", None)
-
-llm=llm_deterministic
-
-# Setup file paths
-readable_date = current_readable_date
-script_name = os.path.splitext(os.path.basename(__file__))[0]
-output_folder_path = os.path.join(raport_base_folder, f"{script_name}_{current_date}")
-os.makedirs(output_folder_path, exist_ok=True)  # Create the output folder if it doesn't exist
+    parser = argparse.ArgumentParser(description="Run CrewAI for Technical Discussions.")
+    parser.add_argument("--topic", type=str, help="Specify the topic for the technical discussion")
+    parser.add_argument("--planning", action="store_true", help="Enable crew planning mode")
+    parser.add_argument("--manager", action="store_true", help="Enable crew manager (hierarchical)")
+    parser.add_argument("--verbose", action="store_true", help="Enable crew verbose output")
+    parser.add_argument("--result_count", type=int, default=15, help="Specify the number of web results to retrieve")
+    parser.add_argument("--nocache", action="store_false", help="Disable caching for the crew")
+    parser.add_argument("--nomemory", action="store_false", help="Disable memory for the crew")
+    parser.add_argument("--resume", type=str, default=None, help="Output folder of an interrupted run: reuse its finished task outputs and run only the missing or invalidated tasks")
+    parser.add_argument("--topics_file", "--topics-file", type=str, default=None, help="Run every topic of this file (one per line, # comments) with the tools and LLM clients built once")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", 3)), help="Number of topics of --topics_file that run at the same time; above 1 the crews run without memory")
+    args = parser.parse_args()
+    if args.topics_file and (args.topic or args.resume):
+        parser.error("--topics_file cannot be combined with --topic or --resume")
+
+    resume_inputs = {}
+    if args.resume:
+        try:
+            resume_inputs = load_checkpoint_inputs(args.resume)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+
+    topics = load_topics(args.topics_file) if args.topics_file else []
+    # Crew memory (short-term and entity) is one store keyed by agent role, the same for every topic:
+    # topics running at the same time would read each other's context, so a concurrent batch runs without it
+    if topics and args.concurrency > 1 and args.nomemory:
+        print("Crew memory is off for --topics_file with --concurrency above 1, because concurrent topics would share it. Use --concurrency 1 to keep it.")
+        args.nomemory = False
+    topic = args.topic if args.topic else resume_inputs.get('question', "")
+    if not topic and not topics:
+        while not topic:
+            topic = input("Please provide a topic for the technical discussion: ").strip()
+
+    #agentops.init() # Agent Monitoring with AgentOps
+
+    tools = initialize_tools()
+    # METRICS_PORT serves the run metrics on localhost while the script runs
+    start_metrics_server()
+
+
+    # remove because i do not use openai but ollama/lmstudio where this env is used but it makes crewai embed stop working.
+    #if "OPENAI_API_BASE" in os.environ:
+    #    os.environ.pop("OPENAI_API_BASE", None)
+
+    llm=llm_deterministic
+
+    # Setup file paths
+    readable_date = current_readable_date
+    script_name = os.path.splitext(os.path.basename(__file__))[0]
+    output_folder_path = args.resume if args.resume else os.path.join(raport_base_folder, f"{script_name}_{current_date}")
+    os.makedirs(output_folder_path, exist_ok=True)  # Create the output folder if it doesn't exist (in batch mode it holds one folder per topic)
 
 #endregion
 
 
 #region WELCOME
 
-# Define the purpose of the script
-script_purpose = """
+    # Define the purpose of the script
+    script_purpose = """
 Here's a friendly and professional welcome script message for your CrewAI:  
 
 **Welcome to Tech Discussion Assistant!**  
@@ -95,98 +138,104 @@ Hi there! 👋 I'm here to help you explore and discuss topics related to any te
 
 📘 Ready to dive in? Just type your question, and let's get started!  
 """
-print(script_purpose)
-
-print(f"\033[92mTopic: {topic}\033[0m\n\n")
+    print(script_purpose)
 
-start_time = time.time()
-
-#endregion
+    if topics:
+        print(f"\033[92mTopics ({len(topics)}, {args.concurrency} at a time): {'; '.join(topics)}\033[0m\n\n")
+    else:
+        print(f"\033[92mTopic: {topic}\033[0m\n\n")
 
-
-#region AGENTS
-
-# Define the manager agent
-manager = Agent(
-    role="Project Manager",
-    goal="Efficiently manage the crew and ensure high-quality task completion",
-    backstory="You're an experienced project manager, skilled in overseeing complex projects and guiding teams to success. Your role is to coordinate the efforts of the crew members, ensuring that each task is completed.",
-    llm=llm_exploratory,
-)
-
-search_facilitator = Agent(
-    role="Search Facilitator",
-    goal="Conduct a web search to gather information about the user's query.",
-    backstory=(
-        "A proficient search expert skilled in using various search engines and APIs to find relevant articles, blogs, and documentation websites. "
-        "This agent ensures the retrieval of high-quality and credible information."
-    ),
-    allow_delegation=False,
-    llm=llm,
-    verbose=False,
-)
-
-relevance_analyzer = Agent(
-    role="Relevance Analyzer",
-    goal="Analyze the content of search results for alignment with the user's question.",
-    backstory=(
-        "An analytical expert with a keen eye for detail, specializing in evaluating and ranking search results based on relevance and credibility. "
-        "This agent ensures that the most pertinent information is highlighted for the user."
-    ),
-    llm=llm,
-    verbose=False,
-)
-
-document_recommender = Agent(
-    role="Document Recommender",
-    goal="Suggest high-quality documentation or resources for further reading.",
-    backstory=(
-        "A knowledgeable resource curator with extensive experience in identifying and recommending official and credible documentation. "
-        "This agent provides concise summaries and highlights the best resources for the user's needs."
-    ),
-    llm=llm,
-    verbose=False,
-)
-
-discussion_manager = Agent(
-    role="Discussion Manager",
-    goal="Facilitate conversation by answering follow-up questions using retrieved data.",
-    backstory=(
-        "An engaging conversationalist with a strong background in customer support and information dissemination. "
-        "This agent excels at providing clear and concise answers, guiding users through complex topics with ease."
-    ),
-    llm=llm,
-    verbose=False,
-)
+    start_time = time.time()
 
 #endregion
 
-#region TASKS
 
-conduct_web_search_task = Task(
-    name="Web Search",
-    description="""Perform a web search for the user-provided question '{question}' using search engines. Gather the top {result_count} results, including titles and descriptions.""",
-    expected_output="""A markdown-formatted report with sections: 
+def run_crew(topic, output_folder_path):
+    """Build the agents, tasks and crew of one topic, run it with its output in output_folder_path and return the crew."""
+
+    #region AGENTS
+
+    # Define the manager agent
+    manager = Agent(
+        role="Project Manager",
+        goal="Efficiently manage the crew and ensure high-quality task completion",
+        backstory="You're an experienced project manager, skilled in overseeing complex projects and guiding teams to success. Your role is to coordinate the efforts of the crew members, ensuring that each task is completed.",
+        llm=llm_exploratory,
+    )
+
+    search_facilitator = Agent(
+        role="Search Facilitator",
+        goal="Conduct a web search to gather information about the user's query.",
+        backstory=(
+            "A proficient search expert skilled in using various search engines and APIs to find relevant articles, blogs, and documentation websites. "
+            "This agent ensures the retrieval of high-quality and credible information."
+        ),
+        allow_delegation=False,
+        llm=llm,
+        verbose=False,
+    )
+
+    relevance_analyzer = Agent(
+        role="Relevance Analyzer",
+        goal="Analyze the content of search results for alignment with the user's question.",
+        backstory=(
+            "An analytical expert with a keen eye for detail, specializing in evaluating and ranking search results based on relevance and credibility. "
+            "This agent ensures that the most pertinent information is highlighted for the user."
+        ),
+        llm=llm,
+        verbose=False,
+    )
+
+    document_recommender = Agent(
+        role="Document Recommender",
+        goal="Suggest high-quality documentation or resources for further reading.",
+        backstory=(
+            "A knowledgeable resource curator with extensive experience in identifying and recommending official and credible documentation. "
+            "This agent provides concise summaries and highlights the best resources for the user's needs."
+        ),
+        llm=llm,
+        verbose=False,
+    )
+
+    discussion_manager = Agent(
+        role="Discussion Manager",
+        goal="Facilitate conversation by answering follow-up questions using retrieved data.",
+        backstory=(
+            "An engaging conversationalist with a strong background in customer support and information dissemination. "
+            "This agent excels at providing clear and concise answers, guiding users through complex topics with ease."
+        ),
+        llm=llm,
+        verbose=False,
+    )
+
+    #endregion
+
+    #region TASKS
+
+    conduct_web_search_task = Task(
+        name="Web Search",
+        description="""Perform a web search for the user-provided question '{question}' using search engines. Gather the top {result_count} results, including titles and descriptions.""",
+        expected_output="""A markdown-formatted report with sections: 
 1. Title: [Title]
 2. URL: [url]
 3. Description: [description]
 4. Publish Date: [publish_date]
 """,
-    agent=search_facilitator,
-    tools=[
-        tools['exa'],
-        tools['serpapi_google'],
-        tools['bing'],
-    ],
-    output_file=os.path.join(output_folder_path, f"web_search_task_{script_name}_{current_date}.txt"),
-)
-
-analyze_relevance_task = Task(
-    name="Relevance analyzer",
-    description="""Analyze and save the search results for relevance to the user-provided question '{question}'. Score each result based on keyword matches and semantic similarity. Ensure that the website content exists, and the site is valid (no 404 errors, non-existent sites, or behind a paywall).
+        agent=search_facilitator,
+        tools=[
+            tools['exa'],
+            tools['serpapi_google'],
+            tools['bing'],
+        ],
+        output_file=os.path.join(output_folder_path, f"web_search_task_{script_name}_{current_date}.txt"),
+    )
+
+    analyze_relevance_task = Task(
+        name="Relevance analyzer",
+        description="""Analyze and save the search results for relevance to the user-provided question '{question}'. Score each result based on keyword matches and semantic similarity. Ensure that the website content exists, and the site is valid (no 404 errors, non-existent sites, or behind a paywall).
 Save every url analyze result as separate .TXT file. The file names MUST start with 'webanalyze_' and be stored in the output directory: {output_dir}.   
 """,
-    expected_output="""A markdown-formatted report with sections: 
+        expected_output="""A markdown-formatted report with sections: 
 1. Title: [Title]
 2. URL: [url]
 3. Description: [description]
@@ -194,108 +243,155 @@ Save every url analyze result as separate .TXT file. The file names MUST start w
 5. Content Confidence Score: [low/medium/high]
 6. Relevance Score: [score]
 """,
-    agent=relevance_analyzer,
-    context=[conduct_web_search_task],
-    tools=[
-        tools['selenium'],
-        tools['website_search'],
-        tools['scrape'],
-        tools['file_writer'],
-        tools['file_read'],
-    ],
-)
-
-recommend_documents_task = Task(
-    name="Document recommendations",
-    description="""Identify and recommend high-quality documentation or resources from the ranked search results. Provide a short summary for each recommended link. Read every TXT file starts with name 'webanalyze_'
+        agent=relevance_analyzer,
+        context=[conduct_web_search_task],
+        tools=[
+            tools['selenium'],
+            tools['website_search'],
+            tools['scrape'],
+            tools['file_writer'],
+            tools['file_read'],
+        ],
+    )
+
+    recommend_documents_task = Task(
+        name="Document recommendations",
+        description="""Identify and recommend high-quality documentation or resources from the ranked search results. Provide a short summary for each recommended link. Read every TXT file starts with name 'webanalyze_'
 The report MUST be saved as a user-friendly .TXT document with a name dynamically generated to reflect the question and date. The document MUST be stored in the output directory: {output_dir}.    
 """,
-    expected_output="""A markdown-formatted report with sections: 
+        expected_output="""A markdown-formatted report with sections: 
 1. Title: [Title]
 2. URL: [url]
 3. Publish Date: [publish_date]
 4. Summary: [summary]
 """,
-    agent=document_recommender,
-    context=[analyze_relevance_task],
-    tools=[
-        tools['file_writer'],
-        tools['file_read'],
-        tools['directory'],
-    ],    
-)
-
-engage_in_discussion_task = Task(
-    name="Discussion",
-    description="""Answer the user-provided question '{question}' using the recommended links and provide suggestions for further exploration.""",
-    expected_output="""Generate a final report in  based on the provided URLs. The conversational style report MUST include the following sections:
+        agent=document_recommender,
+        context=[analyze_relevance_task],
+        tools=[
+            tools['file_writer'],
+            tools['file_read'],
+            tools['directory'],
+        ],    
+    )
+
+    engage_in_discussion_task = Task(
+        name="Discussion",
+        description="""Answer the user-provided question '{question}' using the recommended links and provide suggestions for further exploration.""",
+        expected_output="""Generate a final report in  based on the provided URLs. The conversational style report MUST include the following sections:
 1. Title: [Title]
 2. Author: {author}
 3. Date: {date}
 4. Response: Provide a detailed answer to the user-provided question '{question}' using the recommended links.
 5. Recommended Links: List the relevant URLs with a brief description for each. Ensure that the URLs are accurate and do not use placeholders like example.com.
 """,
-    agent=discussion_manager,
-    context=[recommend_documents_task],
-    output_file=os.path.join(output_folder_path, f"Report.md"),
-)
-
-#endregion
-
-#region Crew
-# Update the crew with the new agents and tasks
-crew = Crew(
-    agents=[
-        search_facilitator,
-        relevance_analyzer,
-        document_recommender,
-        discussion_manager,
-    ],
-    tasks=[
+        agent=discussion_manager,
+        context=[recommend_documents_task],
+        output_file=os.path.join(output_folder_path, f"Report.md"),
+    )
+
+    #endregion
+
+    #region Crew
+    crew_inputs = {
+        'question': topic,
+        'date': readable_date,
+        'author': author,
+        'result_count': args.result_count,
+        'output_dir': output_folder_path,
+        }
+
+    # Finished task outputs are recorded in the output folder; with --resume only the remaining tasks run
+    checkpoint = CrewCheckpoint(output_folder_path, crew_inputs, script_name)
+    crew_tasks = checkpoint.restore([
         conduct_web_search_task,
         analyze_relevance_task,
         recommend_documents_task,
         engage_in_discussion_task,
-    ],
-    full_output=False,
-    process = Process.hierarchical if args.manager else Process.sequential, 
-    manager_agent = manager,
-    cache=args.nocache,
-    memory=args.nomemory,
-    embedder=embedder_config if args.nomemory else None,
-    planning=args.planning, planning_llm=llm_creative,
-    step_callback=step_callback_function,
-    task_callback=task_callback_function,
-    share_crew=False,
-    output_log_file=os.path.join(output_folder_path, log_file),
-    verbose=args.verbose,
-)
-
-# Execute the crew tasks
-result = crew.kickoff({
-    'question': topic,
-    'date': readable_date,
-    'author': author,
-    'result_count': args.result_count,
-    'output_dir': output_folder_path,
-    })
+    ])
+
+    # Update the crew with the new agents and tasks
+    crew = Crew(
+        agents=[
+            search_facilitator,
+            relevance_analyzer,
+            document_recommender,
+            discussion_manager,
+        ],
+        tasks=crew_tasks,
+        full_output=False,
+        process = Process.hierarchical if args.manager else Process.sequential, 
+        manager_agent = manager,
+        cache=args.nocache,
+        memory=args.nomemory,
+        embedder=embedder_config if args.nomemory else None,
+        planning=args.planning, planning_llm=llm_creative,
+        step_callback=step_callback_function,
+        task_callback=checkpoint.task_callback(task_callback_function),
+        share_crew=False,
+        output_log_file=os.path.join(output_folder_path, log_file),
+        verbose=args.verbose,
+    )
+
+    # Report which tools were built and how long each took (once, for the first crew of a batch or monitor)
+    tools.print_build_report(once=True)
+
+    # Execute the crew tasks
+    if crew_tasks:
+        start_task_timer()
+        track_tokens(crew, output_folder_path)
+        result = crew.kickoff(crew_inputs)
+    else:
+        print(f"All tasks were restored from {checkpoint.path}, nothing to run.")
+
+    #endregion
+
+    return crew
+
+
+#region Run
+
+if is_main_process:
+    # With --topics_file every topic gets its own crew and folder, up to --concurrency at a time
+    if topics:
+        batch_results = run_topic_batch(topics, run_crew, output_folder_path, args.concurrency)
+    else:
+        crew = run_crew(topic, output_folder_path)
 
 #endregion
 
 
 #region Output
 
-# Output the result
-print("\n" + "-" * 50 + "\n")
-"""print(result)
+    # Output the result
+    print("\n" + "-" * 50 + "\n")
+    """print(result)
 print("\n" + "-" * 50 + "\n")
 """
-# Print the usage metrics of the crew
-print(crew.usage_metrics)
-print("\n" + "-" * 50 + "\n")
-# Print the time taken to execute the task
-print_time_taken(time.time() - start_time)
-print("\n" + "-" * 50 + "\n\n")
-print("Goodbye!\n\n")
+    # Print the usage metrics of the crew, or the per-topic summary of a batch
+    if topics:
+        print_batch_summary(batch_results, time.time() - start_time)
+    else:
+        print(crew.usage_metrics)
+    print("\n" + "-" * 50 + "\n")
+    # Close the pooled Chrome drivers used for scraping
+    shutdown_driver_pool()
+    # Close the pooled HTTP connections of the search tools
+    close_http_client()
+    # Flush and close the Chroma memory store used by the nlp_search tool
+    close_memory_store()
+    # Print the provider response, LLM, PDF text and embedding cache statistics, the provider quotas and retries
+    print_cache_stats()
+    print_quota_stats()
+    print_resilience_stats()
+    # Write the tool, task and provider metrics in the Prometheus text format
+    write_metrics(output_folder_path)
+    print_llm_cache_stats()
+    print_token_report()
+    print_pdf_cache_stats()
+    print_embedding_cache_stats()
+    # Print the time taken to execute the task
+    print_time_taken(time.time() - start_time)
+    print("\n" + "-" * 50 + "\n\n")
+    print("Goodbye!\n\n")
 
 #endregion
\ No newline at end of file